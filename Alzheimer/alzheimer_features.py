@@ -0,0 +1,34 @@
+"""Feature vector for the Alzheimer model.
+
+Shared by the prediction page and the inference service so both one-hot
+encode the patient's answers identically (column order as in training).
+"""
+from config import (APOE4_CATEGORIES, APOE_CATEGORIES, IMPUTED_CATEGORIES, PTGENDER_CATEGORIES,
+                    PTHETHCAT_CATEGORIES, PTRACCAT_CATEGORIES)
+
+# Accepted answers for the categorical fields, as offered on the prediction page
+CHOICES = {
+    'gender': ['Male', 'Female'],
+    'ethnicity': ['Hisp/Latino', 'Not Hisp/Latino', 'Unknown'],
+    'race_cat': ['White', 'Black', 'Asian'],
+    'apoe_allele_type': list(APOE4_CATEGORIES),
+    'apoe_genotype': ['2,2', '2,3', '2,4', '3,3', '3,4', '4,4'],
+    'imputed_genotype': ['True', 'False'],
+}
+
+
+def convert_to_one_hot(selected_category, all_categories):
+    return [category == selected_category for category in all_categories]
+
+
+def encode_patient(age, gender, education, ethnicity, race_cat, apoe_allele_type, apoe_genotype,
+                   imputed_genotype, mmse):
+    """Return the model's input row for one patient."""
+    row = [age, education, mmse]
+    row.extend(convert_to_one_hot("PTRACCAT_" + race_cat, PTRACCAT_CATEGORIES))
+    row.extend(convert_to_one_hot("APOE Genotype_" + apoe_genotype, APOE_CATEGORIES))
+    row.extend(convert_to_one_hot("PTETHCAT_" + ethnicity, PTHETHCAT_CATEGORIES))
+    row.extend(convert_to_one_hot(apoe_allele_type, APOE4_CATEGORIES))
+    row.extend(convert_to_one_hot("PTGENDER_" + gender, PTGENDER_CATEGORIES))
+    row.extend(convert_to_one_hot("imputed_genotype_" + imputed_genotype, IMPUTED_CATEGORIES))
+    return row
@@ -1,5 +1,4 @@
 import os
-import streamlit as st
 
 # Define base path
 base_path = os.path.dirname(os.path.abspath(__file__))
@@ -1,6 +1,16 @@
-import base64
+import os
+import sys
 import streamlit as st
+
+# Make the shared helpers at the repository root importable; Streamlit re-executes
+# this script on every interaction, so only add the path once
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
 from config import *
+from common.static_assets import asset_bytes, asset_url
+from common.profiling import profile_rerun
+from common.readiness import start_warmup
 from streamlit_pages._home_page import home_page
 from streamlit_pages._predict_alzheimer import prediction_page
 
@@ -11,26 +21,30 @@ st.set_page_config(
     page_icon=":brain:",
 )
 
+# Sampled per rerun when BCU_PROFILE selects this app (see common.profiling)
+profile_rerun('alzheimer')
+
+# Load the model and run a known-good row through it in the background; `python -m common.serve`
+# starts this at server start, plain `streamlit run` when a session first runs this script.
+# The sidecar's /readyz reports when it is warm
+start_warmup(['alzheimer'])
+
 # Apply custom CSS
 st.markdown(f"<style>{CSS}</style>", unsafe_allow_html=True)
 
 def set_page_background(png_file):
-    @st.cache_data()
-    def get_base64_of_bin_file(bin_file):
-        try:
-            with open(bin_file, 'rb') as f:
-                data = f.read()
-            return base64.b64encode(data).decode()
-        except FileNotFoundError:
-            st.error(f"Background image file not found: {bin_file}")
-            return None
-    
-    bin_str = get_base64_of_bin_file(png_file)
-    if bin_str:
+    # Served once per process from the static route; reruns only send the short URL
+    try:
+        url = asset_url(png_file)
+    except FileNotFoundError:
+        st.error(f"Background image file not found: {png_file}")
+        url = None
+
+    if url:
         page_bg_img = f'''
             <style>
             .stApp {{
-                background-image: url("data:image/png;base64,{bin_str}");
+                background-image: url("{url}");
                 background-size: cover;
                 background-position: center;
             }}
@@ -44,7 +58,7 @@ set_page_background(BACKGROUND)
 # STREAMLIT APP
 if SIDE_BANNER:
     if os.path.isfile(SIDE_BANNER):
-        st.sidebar.image(SIDE_BANNER)
+        st.sidebar.image(asset_bytes(SIDE_BANNER))
     else:
         st.sidebar.error(f"Side banner image file not found: {SIDE_BANNER}")
 
@@ -1,24 +1,25 @@
-import time
-import joblib
 import pandas as pd
 from config import *
 import streamlit as st
+from common.model_registry import load_artifact
+from common.tracing import Trace
+from alzheimer_features import encode_patient
 
 def prediction_page():
-    def convert_to_one_hot(selected_category, all_categories):
-        one_hot = [True if category == selected_category else False for category in all_categories]
-        return one_hot
-
-    def predict_alzheimer(input_data):
+    def predict_alzheimer(input_data, trace):
         try:
-            # Load the model using the path from config
-            loaded_model = joblib.load(MODEL_PATH)
-            predictions = loaded_model.predict(input_data)
+            # Load the model using the path from config (loaded once per process)
+            with trace.stage('model_load'):
+                loaded_model = load_artifact(MODEL_PATH, loader='joblib')
+            with trace.stage('inference'):
+                predictions = loaded_model.predict(input_data)
             return predictions
         except FileNotFoundError:
+            trace.annotate(error='model file not found')
             st.error(f"Model file not found: {MODEL_PATH}")
             return None
         except Exception as e:
+            trace.annotate(error=str(e))
             st.error(f"An error occurred during prediction: {e}")
             return None
 
@@ -50,33 +51,28 @@ def prediction_page():
 
     loading_bar = st.empty()
     if predict_button:
-        user_input = [age, education, mmse]
-
-        user_input.extend(convert_to_one_hot("PTRACCAT_" + race_cat, PTRACCAT_CATEGORIES))
-        user_input.extend(convert_to_one_hot("APOE Genotype_" + apoe_genotype, APOE_CATEGORIES))
-        user_input.extend(convert_to_one_hot("PTETHCAT_" + ethnicity, PTHETHCAT_CATEGORIES))
-        user_input.extend(convert_to_one_hot(apoe_allele_type, APOE4_CATEGORIES))
-        user_input.extend(convert_to_one_hot("PTGENDER_" + gender, PTGENDER_CATEGORIES))
-        user_input.extend(convert_to_one_hot("imputed_genotype_" + imputed_genotype, IMPUTED_CATEGORIES))
-
-        data = pd.DataFrame([user_input])
-
-        # Show loading bar while predicting
+        # Show loading bar while predicting; it advances as each real stage completes
         with loading_bar.container():
             st.write("Thank you for entering the patient's information.")
             progress_text = "Please wait, we're predicting your clinical condition..."
             my_bar = loading_bar.progress(0, text=progress_text)
 
-            for percent_complete in range(100):
-                time.sleep(0.02)
-                my_bar.progress(percent_complete + 1, text=progress_text)
-
-        predicted_condition = predict_alzheimer(data)
-        
-        if predicted_condition is not None:
-            loading_bar.empty()
-            st.write("")
-            st.write("")
-            st.write("### Predicted Clinical Condition:", unsafe_allow_html=True)
-            st.write(f"## <b>{ABBREVIATION.get(predicted_condition[0], 'Unknown')}</b> ({predicted_condition[0]})", unsafe_allow_html=True)
-            st.write(f"{CONDITION_DESCRIPTION.get(predicted_condition[0], 'Description not available.')}", unsafe_allow_html=True)
+        def show_progress(done, total, stage):
+            my_bar.progress(done / total, text=progress_text)
+
+        with Trace('alzheimer', stages=['preprocess', 'model_load', 'inference'], on_progress=show_progress) as trace:
+            with trace.stage('preprocess'):
+                user_input = encode_patient(age, gender, education, ethnicity, race_cat, apoe_allele_type,
+                                            apoe_genotype, imputed_genotype, mmse)
+                data = pd.DataFrame([user_input])
+
+            predicted_condition = predict_alzheimer(data, trace)
+
+            if predicted_condition is not None:
+                with trace.stage('render'):
+                    loading_bar.empty()
+                    st.write("")
+                    st.write("")
+                    st.write("### Predicted Clinical Condition:", unsafe_allow_html=True)
+                    st.write(f"## <b>{ABBREVIATION.get(predicted_condition[0], 'Unknown')}</b> ({predicted_condition[0]})", unsafe_allow_html=True)
+                    st.write(f"{CONDITION_DESCRIPTION.get(predicted_condition[0], 'Description not available.')}", unsafe_allow_html=True)
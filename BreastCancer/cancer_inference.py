@@ -0,0 +1,86 @@
+"""Single-pass breast cancer inference for the app and for batch scoring.
+
+``scaler.transform`` and ``model.predict_proba`` run once per call and the
+predicted class is taken from the probabilities, instead of separate
+``predict`` and ``predict_proba`` calls on the same array.  Inputs can be one
+row of 30 features or an (N, 30) array, so a whole cohort is scored in one
+vectorized call.
+"""
+import os
+import sys
+from collections import namedtuple
+
+import numpy as np
+
+# Make the shared helpers at the repository root importable
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+from common.model_registry import load_artifact
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MODEL_PATH = os.path.join(BASE_DIR, 'model.pkl')
+SCALER_PATH = os.path.join(BASE_DIR, 'scaler.pkl')
+DATA_PATH = os.path.join(BASE_DIR, 'data.csv')
+
+# Feature order expected by the scaler and model (same order as data.csv)
+FEATURES = [
+    'radius_mean', 'texture_mean', 'perimeter_mean', 'area_mean', 'smoothness_mean',
+    'compactness_mean', 'concavity_mean', 'concave points_mean', 'symmetry_mean',
+    'fractal_dimension_mean',
+    'radius_se', 'texture_se', 'perimeter_se', 'area_se', 'smoothness_se',
+    'compactness_se', 'concavity_se', 'concave points_se', 'symmetry_se',
+    'fractal_dimension_se',
+    'radius_worst', 'texture_worst', 'perimeter_worst', 'area_worst', 'smoothness_worst',
+    'compactness_worst', 'concavity_worst', 'concave points_worst', 'symmetry_worst',
+    'fractal_dimension_worst',
+]
+
+LABELS = {0: 'Benign', 1: 'Malicious'}
+
+CancerPrediction = namedtuple('CancerPrediction', ['classes', 'proba'])
+
+
+def predict_cancer(X, model=None, scaler=None):
+    """Return predicted classes (N,) and class probabilities (N, 2) for (N, 30) inputs."""
+    model = model if model is not None else load_artifact(MODEL_PATH)
+    scaler = scaler if scaler is not None else load_artifact(SCALER_PATH)
+
+    X = np.asarray(X, dtype=np.float64)
+    if X.ndim == 1:
+        X = X.reshape(1, -1)
+    if X.shape[1] != len(FEATURES):
+        raise ValueError(f"Expected {len(FEATURES)} features per row, got {X.shape[1]}")
+
+    proba = model.predict_proba(scaler.transform(X))
+    return CancerPrediction(model.classes_[proba.argmax(axis=1)], proba)
+
+
+def score_csv(data_path=DATA_PATH):
+    """Score every row of a data.csv-shaped file in one call; returns a DataFrame."""
+    import pandas as pd
+
+    data = pd.read_csv(data_path)
+    result = predict_cancer(data[FEATURES].to_numpy(dtype=np.float64))
+    scored = pd.DataFrame({
+        'predicted': result.classes,
+        'prob_benign': result.proba[:, 0],
+        'prob_malicious': result.proba[:, 1],
+    })
+    if 'id' in data.columns:
+        scored.insert(0, 'id', data['id'])
+    if 'diagnosis' in data.columns:
+        scored['diagnosis'] = data['diagnosis'].map({'M': 1, 'B': 0})
+    return scored
+
+
+if __name__ == '__main__':
+    import time
+
+    path = sys.argv[1] if len(sys.argv) > 1 else DATA_PATH
+    start = time.perf_counter()
+    scored = score_csv(path)
+    elapsed = time.perf_counter() - start
+    print(f"Scored {len(scored)} rows in {elapsed * 1000:.1f} ms")
+    if 'diagnosis' in scored.columns:
+        print(f"Agreement with diagnosis: {(scored['predicted'] == scored['diagnosis']).mean():.3f}")
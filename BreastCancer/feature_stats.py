@@ -0,0 +1,110 @@
+"""Per-feature min / max / mean for the breast cancer sliders and radar chart.
+
+``main.py`` used to parse ``data.csv`` with pandas twice on every rerun just to
+get slider ranges and radar-chart scaling.  ``python BreastCancer/feature_stats.py``
+writes those statistics to ``feature_stats.json`` next to ``model.pkl``; the app
+reads that manifest once per process.  The manifest records the SHA-256 of the
+CSV it was built from, and is rebuilt automatically when ``data.csv`` changes.
+"""
+import csv
+import hashlib
+import json
+import os
+import threading
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_PATH = os.path.join(BASE_DIR, 'data.csv')
+MANIFEST_PATH = os.path.join(BASE_DIR, 'feature_stats.json')
+
+# Columns in data.csv that are not model features
+NON_FEATURE_COLUMNS = ('id', 'diagnosis', 'Unnamed: 32', '')
+
+
+def _sha256(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def compute_stats(data_path=DATA_PATH):
+    """Single pass over the CSV with the stdlib reader; no pandas needed."""
+    with open(data_path, newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        columns = [(i, name) for i, name in enumerate(header) if name not in NON_FEATURE_COLUMNS]
+        mins = {name: float('inf') for _, name in columns}
+        maxs = {name: float('-inf') for _, name in columns}
+        sums = {name: 0.0 for _, name in columns}
+        counts = {name: 0 for _, name in columns}
+        for row in reader:
+            for i, name in columns:
+                if i >= len(row) or row[i] == '':
+                    continue
+                value = float(row[i])
+                mins[name] = min(mins[name], value)
+                maxs[name] = max(maxs[name], value)
+                sums[name] += value
+                counts[name] += 1
+    return {
+        name: {'min': mins[name], 'max': maxs[name], 'mean': sums[name] / counts[name]}
+        for _, name in columns if counts[name]
+    }
+
+
+def build_manifest(data_path=DATA_PATH, manifest_path=MANIFEST_PATH):
+    manifest = {
+        'source': {'file': os.path.basename(data_path), 'sha256': _sha256(data_path)},
+        'columns': compute_stats(data_path),
+    }
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+        f.write('\n')
+    return manifest
+
+
+_memo = {'stat': None, 'columns': None}
+_memo_lock = threading.Lock()
+
+
+def load_feature_stats(data_path=DATA_PATH, manifest_path=MANIFEST_PATH):
+    """Return ``{column: {'min', 'max', 'mean'}}``, memoized until data.csv changes.
+
+    After the first call this is a single ``os.stat`` of data.csv.  Returns an
+    empty dict if data.csv is missing.
+    """
+    try:
+        st = os.stat(data_path)
+    except FileNotFoundError:
+        return {}
+    stat_key = (st.st_mtime_ns, st.st_size)
+    if _memo['stat'] == stat_key:
+        return _memo['columns']
+
+    with _memo_lock:
+        if _memo['stat'] == stat_key:
+            return _memo['columns']
+
+        source_sha256 = _sha256(data_path)
+        columns = None
+        try:
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+            if manifest.get('source', {}).get('sha256') == source_sha256:
+                columns = manifest['columns']
+        except (OSError, ValueError, KeyError):
+            pass
+
+        if columns is None:
+            # Manifest missing or built from a different data.csv
+            try:
+                columns = build_manifest(data_path, manifest_path)['columns']
+            except OSError:
+                columns = compute_stats(data_path)
+
+        _memo['columns'] = columns
+        _memo['stat'] = stat_key
+        return columns
+
+
+if __name__ == '__main__':
+    built = build_manifest()
+    print(f"Wrote {MANIFEST_PATH} ({len(built['columns'])} columns)")
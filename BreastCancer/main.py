@@ -1,28 +1,28 @@
 import streamlit as st
-import pickle
-import pandas as pd
 import plotly.graph_objects as go
 import numpy as np
 import os
-
-# Function to get cleaned data
-def get_clean_data():
-    data_path = "BreastCancer/data.csv"
-    if not os.path.exists(data_path):
-        st.error(f"File {data_path} not found.")
-        return pd.DataFrame()  # Return an empty DataFrame if file not found
-
-    data = pd.read_csv(data_path)
-    data = data.drop(['Unnamed: 32', 'id'], axis=1)
-    data['diagnosis'] = data['diagnosis'].map({'M': 1, 'B': 0})
-    return data
-
-# Function to add sidebar with input sliders
+import sys
+
+# Make the shared helpers at the repository root importable; Streamlit re-executes
+# this script on every interaction, so only add the path once
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+from common.model_registry import load_artifact
+from common.tracing import Trace
+from common.profiling import profile_rerun
+from common.readiness import start_warmup
+from feature_stats import load_feature_stats
+from cancer_inference import FEATURES, predict_cancer
+
+# Function to add the input sliders (called inside the sidebar)
 def add_sidebar():
-    st.sidebar.header("Cell Nuclei Measurements")
+    st.header("Cell Nuclei Measurements")
 
-    data = get_clean_data()
-    if data.empty:
+    # Precomputed min/max/mean per column, no CSV parsing on reruns
+    stats = load_feature_stats()
+    if not stats:
         st.warning("Data is not available.")
         return {}
 
@@ -61,93 +61,75 @@ def add_sidebar():
 
     input_dict = {}
     for label, key in slider_labels:
-        if key in data.columns:
-            input_dict[key] = st.sidebar.slider(
+        if key in stats:
+            input_dict[key] = st.slider(
                 label,
                 min_value=float(0),
-                max_value=float(data[key].max()),
-                value=float(data[key].mean())
+                max_value=float(stats[key]['max']),
+                value=float(stats[key]['mean'])
             )
         else:
             st.warning(f"Column `{key}` is missing from the data.")
             input_dict[key] = 0  # Default value or handle as appropriate
 
-    st.write("Sidebar input values:", input_dict)  # Debugging line
     return input_dict
 
+RADAR_CATEGORIES = ['Radius', 'Texture', 'Perimeter', 'Area',
+                    'Smoothness', 'Compactness',
+                    'Concavity', 'Concave Points',
+                    'Symmetry', 'Fractal Dimension']
+# One trace per block of 10 features in FEATURES (mean, standard error, worst)
+RADAR_TRACES = ['Mean Value', 'Standard Error', 'Worst Value']
+
+_scaling = {'stats': None, 'offset': None, 'inv_range': None}
+
+
+# Function to get the min-max scaling vectors
+def get_scaling_vectors():
+    """``(min, 1 / (max - min))`` per feature in FEATURES order, rebuilt only when the stats change."""
+    stats = load_feature_stats()
+    if _scaling['stats'] is not stats:
+        offset = np.array([stats[key]['min'] if key in stats else 0.0 for key in FEATURES])
+        span = np.array([stats[key]['max'] - stats[key]['min'] if key in stats else 0.0 for key in FEATURES])
+        # Features without data (or with a constant column) scale to 0
+        inv_range = np.divide(1.0, span, out=np.zeros_like(span), where=span != 0)
+        _scaling.update(stats=stats, offset=offset, inv_range=inv_range)
+    return _scaling['offset'], _scaling['inv_range']
+
+
 # Function to scale input values
-def get_scaled_values(input_dict):
-    data = get_clean_data()
-    if data.empty:
-        return {key: 0 for key in input_dict}  # Return default values if data is empty
-
-    X = data.drop(['diagnosis'], axis=1)
-    scaled_dict = {}
-
-    for key, value in input_dict.items():
-        if key in X.columns:
-            max_val = X[key].max()
-            min_val = X[key].min()
-            scaled_value = (value - min_val) / (max_val - min_val)
-            scaled_dict[key] = scaled_value
-        else:
-            scaled_dict[key] = 0  # Default scaling
+def get_scaled_values(input_data):
+    """Min-max scaled inputs as a (3, 10) array: one row per radar trace."""
+    offset, inv_range = get_scaling_vectors()
+    values = np.array([input_data.get(key, 0) for key in FEATURES], dtype=np.float64)
+    return ((values - offset) * inv_range).reshape(len(RADAR_TRACES), -1)
 
-    return scaled_dict
 
 # Function to get radar chart
-def get_radar_chart(input_data):
-    input_data = get_scaled_values(input_data)
-    categories = ['Radius', 'Texture', 'Perimeter', 'Area',
-                  'Smoothness', 'Compactness',
-                  'Concavity', 'Concave Points',
-                  'Symmetry', 'Fractal Dimension']
-
-    fig = go.Figure()
-
-    fig.add_trace(go.Scatterpolar(
-        r=[
-            input_data.get('radius_mean', 0), input_data.get('texture_mean', 0), input_data.get('perimeter_mean', 0),
-            input_data.get('area_mean', 0), input_data.get('smoothness_mean', 0), input_data.get('compactness_mean', 0),
-            input_data.get('concavity_mean', 0), input_data.get('concave points_mean', 0), input_data.get('symmetry_mean', 0),
-            input_data.get('fractal_dimension_mean', 0)
-        ],
-        theta=categories,
-        fill='toself',
-        name='Mean Value'
-    ))
-    fig.add_trace(go.Scatterpolar(
-        r=[
-            input_data.get('radius_se', 0), input_data.get('texture_se', 0), input_data.get('perimeter_se', 0),
-            input_data.get('area_se', 0), input_data.get('smoothness_se', 0), input_data.get('compactness_se', 0),
-            input_data.get('concavity_se', 0), input_data.get('concave points_se', 0), input_data.get('symmetry_se', 0),
-            input_data.get('fractal_dimension_se', 0)
-        ],
-        theta=categories,
-        fill='toself',
-        name='Standard Error'
-    ))
-    fig.add_trace(go.Scatterpolar(
-        r=[
-            input_data.get('radius_worst', 0), input_data.get('texture_worst', 0), input_data.get('perimeter_worst', 0),
-            input_data.get('area_worst', 0), input_data.get('smoothness_worst', 0), input_data.get('compactness_worst', 0),
-            input_data.get('concavity_worst', 0), input_data.get('concave points_worst', 0), input_data.get('symmetry_worst', 0),
-            input_data.get('fractal_dimension_worst', 0)
-        ],
-        theta=categories,
-        fill='toself',
-        name='Worst Value'
-    ))
-
-    fig.update_layout(
-        polar=dict(
-            radialaxis=dict(
-                visible=True,
-                range=[0, 1]
-            )),
-        showlegend=True
-    )
+def get_radar_chart():
+    """The session's radar figure; built once, later reruns only patch its ``r`` arrays."""
+    fig = st.session_state.get('radar_chart')
+    if fig is None:
+        fig = go.Figure([
+            go.Scatterpolar(r=[0] * len(RADAR_CATEGORIES), theta=RADAR_CATEGORIES, fill='toself', name=name)
+            for name in RADAR_TRACES
+        ])
+        fig.update_layout(
+            polar=dict(
+                radialaxis=dict(
+                    visible=True,
+                    range=[0, 1]
+                )),
+            showlegend=True
+        )
+        st.session_state['radar_chart'] = fig
+    return fig
 
+
+def update_radar_chart(fig, input_data):
+    with fig.batch_update():
+        for trace, radii in zip(fig.data, get_scaled_values(input_data)):
+            trace.r = radii
     return fig
 
 # Function to add predictions
@@ -159,31 +141,54 @@ def add_predictions(input_data):
         st.error(f"Model file `{model_file}` or scaler file `{scaler_file}` not found.")
         return
 
+    trace = Trace('breast_cancer')
     try:
-        model = pickle.load(open(model_file, "rb"))
-        scaler = pickle.load(open(scaler_file, "rb"))
+        with trace.stage('model_load'):
+            model = load_artifact(model_file)
+            scaler = load_artifact(scaler_file)
     except Exception as e:
+        trace.annotate(error=str(e))
+        trace.finish()
         st.error(f"Error loading model or scaler: {e}")
         return
 
-    st.write("Input Data for Prediction:", input_data)  # Debugging line
-
     try:
-        input_array = np.array(list(input_data.values())).reshape(1, -1)
-        input_array_scaled = scaler.transform(input_array)
-        prediction = model.predict(input_array_scaled)
-
-        st.write("The predicted cell cluster is:")
-        if prediction[0] == 0:
-            st.write("Benign", unsafe_allow_html=True)
-        else:
-            st.write("Malicious", unsafe_allow_html=True)
-
-        st.write("Probability of Benign: ", model.predict_proba(input_array_scaled)[0][0])
-        st.write("Probability of Malicious: ", model.predict_proba(input_array_scaled)[0][1])
+        with trace:
+            # One scaler.transform + predict_proba; the class comes from the probabilities
+            with trace.stage('preprocess'):
+                input_array = np.array([input_data.get(key, 0) for key in FEATURES]).reshape(1, -1)
+            with trace.stage('inference'):
+                prediction, proba = predict_cancer(input_array, model=model, scaler=scaler)
+
+            with trace.stage('render'):
+                st.write("The predicted cell cluster is:")
+                if prediction[0] == 0:
+                    st.write("Benign", unsafe_allow_html=True)
+                else:
+                    st.write("Malicious", unsafe_allow_html=True)
+
+                st.write("Probability of Benign: ", proba[0][0])
+                st.write("Probability of Malicious: ", proba[0][1])
     except Exception as e:
         st.error(f"Error during prediction: {e}")
 
+# Streamlit >= 1.37 has st.fragment; older releases only the experimental name
+fragment = getattr(st, 'fragment', None) or st.experimental_fragment
+
+
+# Moving a slider reruns only this fragment: the sliders, the radar chart and the
+# prediction pane, not the page set-up, title and layout around them
+@fragment
+def measurements(chart_slot, prediction_slot):
+    input_data = add_sidebar()
+    if not input_data:
+        return  # No valid input data
+
+    chart_slot.plotly_chart(update_radar_chart(get_radar_chart(), input_data))
+    with prediction_slot.container():
+        add_predictions(input_data)
+
+
 # Main function to run the app
 def main():
     st.set_page_config(
@@ -193,23 +198,24 @@ def main():
         initial_sidebar_state="expanded"
     )
 
-    input_data = add_sidebar()
+    # Sampled per rerun when BCU_PROFILE selects this app (see common.profiling)
+    profile_rerun('breast_cancer')
 
-    if not input_data:
-        return  # Exit if no valid input data
+    # Load the model and run a known-good row through it in the background; `python -m common.serve`
+    # starts this at server start, plain `streamlit run` when a session first runs this script.
+    # The sidecar's /readyz reports when it is warm
+    start_warmup(['breast_cancer'])
 
     with st.container():
         st.title("Breast Cancer Diagnosis")
         st.write("This app predicts using a machine learning model whether a breast mass is benign or malignant based on the measurements it receives from your cytosis lab. You can also update the measurements by hand using the sliders in the sidebar.")
 
     col1, col2 = st.columns([4, 1])
+    chart_slot = col1.empty()
+    prediction_slot = col2.empty()
 
-    with col1:
-        radar_chart = get_radar_chart(input_data)
-        st.plotly_chart(radar_chart)
-
-    with col2:
-        add_predictions(input_data)
+    with st.sidebar:
+        measurements(chart_slot, prediction_slot)
 
 if __name__ == '__main__':
     main()
@@ -1,10 +1,19 @@
 import streamlit as st
 import numpy as np
-import pandas as pd
-import pickle
 import json
 import os
-import base64
+import sys
+from ckd_pipeline import get_pipeline
+
+# Make the shared helpers at the repository root importable; Streamlit re-executes
+# this script on every interaction, so only add the path once
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+from common.tracing import Trace
+from common.static_assets import asset_url
+from common.profiling import profile_rerun
+from common.readiness import start_warmup
 
 # Set up the Streamlit app configuration
 st.set_page_config(
@@ -13,20 +22,22 @@ st.set_page_config(
     layout="wide"
 )
 
+# Sampled per rerun when BCU_PROFILE selects this app (see common.profiling)
+profile_rerun('ckd')
+
+# Load the model and run a known-good row through it in the background; `python -m common.serve`
+# starts this at server start, plain `streamlit run` when a session first runs this script.
+# The sidecar's /readyz reports when it is warm
+start_warmup(['ckd'])
+
 # Function to set background image
 def set_page_background(image_path):
-    @st.cache_data
-    def get_base64_of_bin_file(filename):
-        with open(filename, 'rb') as f:
-            data = f.read()
-        return base64.b64encode(data).decode()
-
     if os.path.exists(image_path):
-        bin_str = get_base64_of_bin_file(image_path)
+        # Served once per process from the static route; reruns only send the short URL
         page_bg_img = f'''
             <style>
             .stApp {{
-                background-image: url("data:image/webp;base64,{bin_str}");
+                background-image: url("{asset_url(image_path)}");
                 background-size: cover;
             }}
             </style>
@@ -57,6 +68,79 @@ def home_page():
     """)
     
 # Predictor Page
+# Numeric inputs by column index; the sensitivity sweep varies them over the same ranges
+SLIDERS = {
+    0: dict(min_value=0, max_value=120, value=50),
+    1: dict(min_value=0, max_value=200, value=76),
+    9: dict(min_value=0, max_value=500, value=150),
+    10: dict(min_value=0, max_value=400, value=60),
+    11: dict(min_value=0.0, max_value=80.0, value=3.1, step=0.1),
+    12: dict(min_value=0.0, max_value=180.0, value=137.5, step=0.5),
+    13: dict(min_value=0.0, max_value=50.0, value=4.6, step=0.1),
+    14: dict(min_value=0.0, max_value=20.0, value=12.6, step=0.1),
+    15: dict(min_value=0, max_value=60, value=39),
+    16: dict(min_value=2000, max_value=26400, value=2600, step=10),
+    17: dict(min_value=2.0, max_value=10.0, value=4.7, step=0.1),
+}
+SELECT_SLIDERS = {
+    2: dict(options=[1.005, 1.010, 1.015, 1.020, 1.025], value=1.015),
+    3: dict(options=[0, 1, 2, 3, 4, 5], value=1),
+    4: dict(options=[0, 1, 2, 3, 4, 5], value=0),
+}
+SWEEP_FEATURES = sorted(list(SLIDERS) + list(SELECT_SLIDERS))
+MAX_SWEEP_POINTS_2D = 60  # 60 x 60 = 3600 rows
+
+
+def sweep_grid(i, points):
+    """Values tried for feature ``i``: the slider range, or every option of a select slider."""
+    if i in SELECT_SLIDERS:
+        return np.asarray(SELECT_SLIDERS[i]['options'], dtype=np.float64)
+    return np.linspace(SLIDERS[i]['min_value'], SLIDERS[i]['max_value'], points)
+
+
+def sensitivity_sweep(pipeline, values, labels, features, points):
+    """Score every grid combination in one batch and plot P(CKD) over it."""
+    import pandas as pd
+
+    if len(features) == 2:
+        points = min(points, MAX_SWEEP_POINTS_2D)
+    grids = {i: sweep_grid(i, points) for i in features}
+    ckd = list(pipeline.classes_).index(1)
+
+    with Trace('ckd_sweep') as trace:
+        with trace.stage('inference'):
+            # One (N, 24) batch through imputation, scaling, KernelPCA and the forest
+            proba = pipeline.sweep(values, grids)[..., ckd]
+        trace.annotate(rows=int(proba.size), features=[pipeline.columns[i] for i in features])
+
+        with trace.stage('render'):
+            if len(features) == 1:
+                (i,) = features
+                grid = grids[i]
+                st.line_chart(pd.DataFrame({labels[i]: grid, 'P(CKD)': proba}).set_index(labels[i]))
+                flips = np.flatnonzero(np.diff(proba > 0.5))
+                if len(flips) == 0:
+                    st.write(f"The prediction stays **{'CKD' if proba[0] > 0.5 else 'no CKD'}** over the whole range.")
+                for k in flips:
+                    st.write(f"Between {labels[i]} = {grid[k]:g} and {grid[k + 1]:g} the prediction changes to "
+                             f"**{'CKD' if proba[k + 1] > 0.5 else 'no CKD'}**.")
+            else:
+                import altair as alt
+
+                i, j = features
+                xs, ys = np.meshgrid(grids[i], grids[j], indexing='ij')
+                data = pd.DataFrame({'x': xs.ravel(), 'y': ys.ravel(), 'p': proba.ravel()})
+                chart = alt.Chart(data).mark_rect().encode(
+                    x=alt.X('x:O', title=labels[i], axis=alt.Axis(format='~g', labelOverlap=True)),
+                    y=alt.Y('y:O', title=labels[j], sort='descending', axis=alt.Axis(format='~g', labelOverlap=True)),
+                    color=alt.Color('p:Q', title='P(CKD)', scale=alt.Scale(domain=[0, 1], scheme='redyellowblue', reverse=True)),
+                    tooltip=[alt.Tooltip('x:Q', title=labels[i]), alt.Tooltip('y:Q', title=labels[j]),
+                             alt.Tooltip('p:Q', title='P(CKD)', format='.3f')],
+                )
+                st.altair_chart(chart, use_container_width=True)
+            st.caption(f"{proba.size} combinations scored in one batch.")
+
+
 def predictor_page():
     st.title('👨‍⚕️ Chronic Kidney Disease Predictor')
 
@@ -77,7 +161,7 @@ def predictor_page():
         column_info = json.load(file)
 
     labels = column_info['full']
-    X = pd.DataFrame(np.empty((1, total_features)), columns=labels)
+    values = [None] * total_features
 
     def disable_widgets():
         st.session_state.omit_feat_mat = np.zeros(total_features, dtype=bool)
@@ -96,91 +180,76 @@ def predictor_page():
     with st.form("my_form"):
         cols = st.columns(4)
         with cols[0]:
-            X[labels[0]] = st.slider(labels[0], min_value=0, max_value=120, value=50, disabled=st.session_state.omit_feat_mat[0])
-            X[labels[1]] = st.slider(labels[1], min_value=0, max_value=200, value=76, disabled=st.session_state.omit_feat_mat[1])
-            X[labels[2]] = st.select_slider(labels[2], options=[1.005, 1.010, 1.015, 1.020, 1.025], value=1.015, disabled=st.session_state.omit_feat_mat[2])
-            X[labels[3]] = st.select_slider(labels[3], options=[0, 1, 2, 3, 4, 5], value=1, disabled=st.session_state.omit_feat_mat[3])
-            X[labels[4]] = st.select_slider(labels[4], options=[0, 1, 2, 3, 4, 5], value=0, disabled=st.session_state.omit_feat_mat[4])
+            values[0] = st.slider(labels[0], **SLIDERS[0], disabled=st.session_state.omit_feat_mat[0])
+            values[1] = st.slider(labels[1], **SLIDERS[1], disabled=st.session_state.omit_feat_mat[1])
+            values[2] = st.select_slider(labels[2], **SELECT_SLIDERS[2], disabled=st.session_state.omit_feat_mat[2])
+            values[3] = st.select_slider(labels[3], **SELECT_SLIDERS[3], disabled=st.session_state.omit_feat_mat[3])
+            values[4] = st.select_slider(labels[4], **SELECT_SLIDERS[4], disabled=st.session_state.omit_feat_mat[4])
 
         with cols[1]:
-            X[labels[5]] = st.selectbox(labels[5], ('Normal', 'Abnormal'), disabled=st.session_state.omit_feat_mat[5])
-            X[labels[6]] = st.selectbox(labels[6], ('Normal', 'Abnormal'), disabled=st.session_state.omit_feat_mat[6])
-            X[labels[7]] = st.selectbox(labels[7], ('Not Present', 'Present'), disabled=st.session_state.omit_feat_mat[7])
-            X[labels[8]] = st.selectbox(labels[8], ('Not Present', 'Present'), disabled=st.session_state.omit_feat_mat[8])
-            X[labels[9]] = st.slider(labels[9], min_value=0, max_value=500, value=150, disabled=st.session_state.omit_feat_mat[9])
-            X[labels[10]] = st.slider(labels[10], min_value=0, max_value=400, value=60, disabled=st.session_state.omit_feat_mat[10])
-            X[labels[11]] = st.slider(labels[11], min_value=0.0, max_value=80.0, value=3.1, step=0.1, disabled=st.session_state.omit_feat_mat[11])
+            values[5] = st.selectbox(labels[5], ('Normal', 'Abnormal'), disabled=st.session_state.omit_feat_mat[5])
+            values[6] = st.selectbox(labels[6], ('Normal', 'Abnormal'), disabled=st.session_state.omit_feat_mat[6])
+            values[7] = st.selectbox(labels[7], ('Not Present', 'Present'), disabled=st.session_state.omit_feat_mat[7])
+            values[8] = st.selectbox(labels[8], ('Not Present', 'Present'), disabled=st.session_state.omit_feat_mat[8])
+            values[9] = st.slider(labels[9], **SLIDERS[9], disabled=st.session_state.omit_feat_mat[9])
+            values[10] = st.slider(labels[10], **SLIDERS[10], disabled=st.session_state.omit_feat_mat[10])
+            values[11] = st.slider(labels[11], **SLIDERS[11], disabled=st.session_state.omit_feat_mat[11])
 
         with cols[2]:
-            X[labels[12]] = st.slider(labels[12], min_value=0.0, max_value=180.0, value=137.5, step=0.5, disabled=st.session_state.omit_feat_mat[12])
-            X[labels[13]] = st.slider(labels[13], min_value=0.0, max_value=50.0, value=4.6, step=0.1, disabled=st.session_state.omit_feat_mat[13])
-            X[labels[14]] = st.slider(labels[14], min_value=0.0, max_value=20.0, value=12.6, step=0.1, disabled=st.session_state.omit_feat_mat[14])
-            X[labels[15]] = st.slider(labels[15], min_value=0, max_value=60, value=39, disabled=st.session_state.omit_feat_mat[15])
-            X[labels[16]] = st.slider(labels[16], min_value=2000, max_value=26400, value=2600, step=10, disabled=st.session_state.omit_feat_mat[16])
-            X[labels[17]] = st.slider(labels[17], min_value=2.0, max_value=10.0, value=4.7, step=0.1, disabled=st.session_state.omit_feat_mat[17])
+            values[12] = st.slider(labels[12], **SLIDERS[12], disabled=st.session_state.omit_feat_mat[12])
+            values[13] = st.slider(labels[13], **SLIDERS[13], disabled=st.session_state.omit_feat_mat[13])
+            values[14] = st.slider(labels[14], **SLIDERS[14], disabled=st.session_state.omit_feat_mat[14])
+            values[15] = st.slider(labels[15], **SLIDERS[15], disabled=st.session_state.omit_feat_mat[15])
+            values[16] = st.slider(labels[16], **SLIDERS[16], disabled=st.session_state.omit_feat_mat[16])
+            values[17] = st.slider(labels[17], **SLIDERS[17], disabled=st.session_state.omit_feat_mat[17])
 
         with cols[3]:
-            X[labels[18]] = st.selectbox(labels[18], ('No', 'Yes'), disabled=st.session_state.omit_feat_mat[18])
-            X[labels[19]] = st.selectbox(labels[19], ('No', 'Yes'), disabled=st.session_state.omit_feat_mat[19])
-            X[labels[20]] = st.selectbox(labels[20], ('No', 'Yes'), disabled=st.session_state.omit_feat_mat[20])
-            X[labels[21]] = st.selectbox(labels[21], ('Good', 'Poor'), disabled=st.session_state.omit_feat_mat[21])
-            X[labels[22]] = st.selectbox(labels[22], ('No', 'Yes'), disabled=st.session_state.omit_feat_mat[22])
-            X[labels[23]] = st.selectbox(labels[23], ('No', 'Yes'), disabled=st.session_state.omit_feat_mat[23])
+            values[18] = st.selectbox(labels[18], ('No', 'Yes'), disabled=st.session_state.omit_feat_mat[18])
+            values[19] = st.selectbox(labels[19], ('No', 'Yes'), disabled=st.session_state.omit_feat_mat[19])
+            values[20] = st.selectbox(labels[20], ('No', 'Yes'), disabled=st.session_state.omit_feat_mat[20])
+            values[21] = st.selectbox(labels[21], ('Good', 'Poor'), disabled=st.session_state.omit_feat_mat[21])
+            values[22] = st.selectbox(labels[22], ('No', 'Yes'), disabled=st.session_state.omit_feat_mat[22])
+            values[23] = st.selectbox(labels[23], ('No', 'Yes'), disabled=st.session_state.omit_feat_mat[23])
         
         predict_btn = st.form_submit_button("Predict")
 
-    if predict_btn:
-        # Handle omitted features
-        X[st.session_state.omit_feat] = np.nan
-        X_proc = X.copy()
-
-        # Define the correct column names
-        cols = ['age', 'bp', 'sg', 'al', 'su', 'rbc', 'pc', 'pcc', 'ba',
-                'bgr', 'bu',  'sc', 'sod', 'pot', 'hemo', 'pcv', 'wbcc',
-                'rbcc', 'htn', 'dm', 'cad', 'appet', 'pe', 'ane']
-
-        rename_dict = {labels[i]: cols[i] for i in range(len(labels))}
-        X_proc.rename(columns=rename_dict, inplace=True)
-
-        # Apply preprocessing
-        X_proc = X_proc.applymap(lambda s: s.lower().replace(' ', '') if isinstance(s, str) else s)
+    # Handle omitted features
+    for item in st.session_state.omit_feat:
+        values[labels.index(item)] = None
 
-        # Load preprocessing objects
-        with open(os.path.join(base_dir, 'assets', 'cat_imputer.pickle'), 'rb') as file:
-            cat_imputer = pickle.load(file)
-
-        with open(os.path.join(base_dir, 'assets', 'encoder.pickle'), 'rb') as file:
-            encoder = pickle.load(file)
-
-        with open(os.path.join(base_dir, 'assets', 'cont_imputer.pickle'), 'rb') as file:
-            cont_imputer = pickle.load(file)
-
-        with open(os.path.join(base_dir, 'assets', 'scaler.pickle'), 'rb') as file:
-            scaler = pickle.load(file)
-
-        with open(os.path.join(base_dir, 'assets', 'feat_extraction.pickle'), 'rb') as file:
-            feat_extraction = pickle.load(file)
-
-        with open(os.path.join(base_dir, 'assets', 'model.pickle'), 'rb') as file:
-            model = pickle.load(file)
-
-        # Preprocess the data
-        X_proc[column_info['cat_imputer']] = cat_imputer.transform(X_proc[column_info['cat_imputer']])
-        X_proc[column_info['encoder']] = encoder.transform(X_proc[column_info['encoder']])
-        X_proc = cont_imputer.transform(X_proc)
-        X_proc = pd.DataFrame(X_proc, columns=column_info['abbrev'])
-        X_proc[column_info['scaler']] = scaler.transform(X_proc[column_info['scaler']])
-        X_proc = feat_extraction.transform(X_proc)
-
-        # Make prediction
-        y_pred = model.predict(X_proc)
-
-        # Display the result
-        st.header("🎯 Prediction")
-        if y_pred[0] == 1:
-            st.error("The Patient has Chronic Kidney Disease (CKD).", icon='🩺')
+    if predict_btn:
+        with Trace('ckd') as trace:
+            # Compiled preprocessing + model, built once per process from the pickles in assets/
+            with trace.stage('model_load'):
+                pipeline = get_pipeline(os.path.join(base_dir, 'assets'))
+            with trace.stage('preprocess'):
+                X_proc = pipeline.preprocess(pipeline.encode_one(values))
+            with trace.stage('inference'):
+                y_pred = pipeline.model.predict(X_proc)[0]
+
+            # Display the result
+            with trace.stage('render'):
+                st.header("🎯 Prediction")
+                if y_pred == 1:
+                    st.error("The Patient has Chronic Kidney Disease (CKD).", icon='🩺')
+                else:
+                    st.success("The Patient does not have Chronic Kidney Disease (CKD).", icon='🩺')
+
+    st.header("🔬 What if?")
+    st.markdown("Vary one or two measurements over their whole range, keeping the other inputs as submitted above, "
+                "and see how the predicted probability of CKD changes.")
+    with st.form("sweep_form"):
+        sweep_labels = st.multiselect("Measurements to vary", [labels[i] for i in SWEEP_FEATURES], max_selections=2)
+        points = st.slider("Values per measurement", min_value=10, max_value=200, value=200, step=10,
+                           help=f"With two measurements at most {MAX_SWEEP_POINTS_2D} values each are tried.")
+        sweep_btn = st.form_submit_button("Run sweep")
+
+    if sweep_btn:
+        if not sweep_labels:
+            st.warning("Select one or two measurements to vary.")
         else:
-            st.success("The Patient does not have Chronic Kidney Disease (CKD).", icon='🩺')
+            pipeline = get_pipeline(os.path.join(base_dir, 'assets'))
+            sensitivity_sweep(pipeline, values, labels, [labels.index(label) for label in sweep_labels], points)
 
 # Sidebar navigation
 st.sidebar.title("Navigation")
@@ -0,0 +1,262 @@
+"""Compiled CKD preprocessing + inference pipeline.
+
+The predictor page used to push a 1x24 DataFrame through ``applymap``, a column
+rename and five sklearn transforms with a DataFrame rebuild between each.  This
+module reads the same pickles once and turns the categorical imputer, ordinal
+encoder and scaler into lookup tables and fill / offset / scale vectors, so a
+prediction is a few in-place NumPy operations on a float64 array followed by
+``feat_extraction`` and ``model``.  The KNN imputer cannot be folded into a
+vector; it is only called when a continuous feature was left out.
+
+Run ``python CKD12/ckd_pipeline.py`` to check the compiled path against the
+original DataFrame path on ``datasets/kidney_disease.csv``.
+"""
+import contextlib
+import json
+import os
+import sys
+import threading
+import warnings
+
+import numpy as np
+
+# Make the shared helpers at the repository root importable
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+from common.model_registry import load_artifact
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ASSETS_DIR = os.path.join(BASE_DIR, 'assets')
+ARTIFACTS = ('cat_imputer', 'encoder', 'cont_imputer', 'scaler', 'feat_extraction', 'model')
+
+# Column names used in datasets/kidney_disease.csv that differ from column_info['abbrev']
+CSV_RENAME = {'wc': 'wbcc', 'rc': 'rbcc'}
+
+
+@contextlib.contextmanager
+def _array_input():
+    # The imputers and KernelPCA were fitted on DataFrames; we pass plain arrays in
+    # the same column order.  Only silence sklearn's warning about that here, not
+    # for the other models of the process.
+    with warnings.catch_warnings():
+        warnings.filterwarnings('ignore', message='X does not have valid feature names', category=UserWarning)
+        yield
+
+
+def normalize_category(value):
+    # Same normalisation the predictor page applied with applymap
+    return value.lower().replace(' ', '')
+
+
+class CKDPipeline:
+    def __init__(self, column_info, cat_imputer, encoder, cont_imputer, scaler, feat_extraction, model):
+        self.columns = list(column_info['abbrev'])
+        self.labels = list(column_info['full'])
+        self.n_features = len(self.columns)
+        index = {name: i for i, name in enumerate(self.columns)}
+
+        # Ordinal encoder -> one dict per encoded column
+        self.lookup = {
+            index[c]: {str(cat): float(code) for code, cat in enumerate(cats)}
+            for c, cats in zip(column_info['encoder'], encoder.categories_)
+        }
+
+        # Categorical imputer -> fill vector, expressed in encoded space
+        self.fill = np.full(self.n_features, np.nan)
+        for c, stat in zip(column_info['cat_imputer'], cat_imputer.statistics_):
+            i = index[c]
+            self.fill[i] = self.lookup[i][str(stat)] if i in self.lookup else float(stat)
+        self.has_fill = ~np.isnan(self.fill)
+
+        # Scaler -> offset / scale over the full row, identity on unscaled columns
+        self.offset = np.zeros(self.n_features)
+        self.scale = np.ones(self.n_features)
+        scaled_idx = [index[c] for c in column_info['scaler']]
+        if scaler.with_mean:
+            self.offset[scaled_idx] = scaler.mean_
+        if scaler.with_std:
+            self.scale[scaled_idx] = scaler.scale_
+
+        self.cont_imputer = cont_imputer
+        self.feat_extraction = feat_extraction
+        self.model = model
+        self.classes_ = model.classes_
+        self._local = threading.local()
+
+    def _row_buffer(self):
+        # One preallocated 1xN buffer per thread; Streamlit runs each session in its own thread
+        buf = getattr(self._local, 'row', None)
+        if buf is None:
+            buf = self._local.row = np.empty((1, self.n_features))
+        return buf
+
+    def encode_value(self, i, value):
+        if value is None or (isinstance(value, float) and np.isnan(value)):
+            return np.nan
+        if i in self.lookup:
+            key = normalize_category(value) if isinstance(value, str) else str(value)
+            try:
+                return self.lookup[i][key]
+            except KeyError:
+                raise ValueError(f"Found unknown category '{value}' in column '{self.columns[i]}'") from None
+        return float(value)
+
+    def encode_rows(self, rows, out=None):
+        """Turn raw rows (numbers, widget strings, ``None``/NaN for omitted) into float64 codes."""
+        if out is None:
+            out = np.empty((len(rows), self.n_features))
+        for r, row in enumerate(rows):
+            for i, value in enumerate(row):
+                out[r, i] = self.encode_value(i, value)
+        return out
+
+    def preprocess(self, X):
+        """Impute, encode-fill and scale an encoded (N, 24) float64 array in place."""
+        missing = np.isnan(X)
+        if missing.any():
+            np.copyto(X, self.fill, where=missing & self.has_fill)
+            if np.isnan(X).any():
+                with _array_input():
+                    X = self.cont_imputer.transform(X)
+        X -= self.offset
+        X /= self.scale
+        with _array_input():
+            return self.feat_extraction.transform(X)
+
+    def predict_encoded(self, X):
+        X = self.preprocess(X)
+        with _array_input():
+            return self.model.predict(X)
+
+    def predict_proba_encoded(self, X):
+        X = self.preprocess(X)
+        with _array_input():
+            return self.model.predict_proba(X)
+
+    def predict(self, rows):
+        return self.predict_encoded(self.encode_rows(rows))
+
+    def predict_proba(self, rows):
+        return self.predict_proba_encoded(self.encode_rows(rows))
+
+    def sweep(self, row, grids):
+        """Class probabilities of ``row`` with one or two numeric features varied over a grid.
+
+        ``grids`` maps a column index to the raw values to try.  Every
+        combination is scored as one (N, 24) batch through the same
+        preprocessing and model as ``predict``; the result has shape
+        ``(len(grid_1)[, len(grid_2)], n_classes)``.
+        """
+        indices = list(grids)
+        for i in indices:
+            if i in self.lookup:
+                raise ValueError(f"'{self.columns[i]}' is categorical; only numeric features can be swept")
+        mesh = np.meshgrid(*(np.asarray(grids[i], dtype=np.float64) for i in indices), indexing='ij')
+        X = np.repeat(self.encode_rows([row]), mesh[0].size, axis=0)
+        for i, values in zip(indices, mesh):
+            X[:, i] = values.ravel()
+        proba = self.predict_proba_encoded(X)
+        return proba.reshape(mesh[0].shape + (proba.shape[1],))
+
+    def encode_one(self, row):
+        """Encode a single raw row into this thread's preallocated 1xN buffer."""
+        return self.encode_rows([row], out=self._row_buffer())
+
+    def predict_one(self, row):
+        return self.predict_encoded(self.encode_one(row))[0]
+
+
+_cache = {'key': None, 'pipeline': None}
+_cache_lock = threading.Lock()
+
+
+def get_pipeline(assets_dir=ASSETS_DIR):
+    """Return the process-wide pipeline, rebuilding it only if an artifact was reloaded."""
+    artifacts = [load_artifact(os.path.join(assets_dir, f'{name}.pickle')) for name in ARTIFACTS]
+    column_info_path = os.path.join(assets_dir, 'column_info.json')
+    key = (assets_dir, os.stat(column_info_path).st_mtime_ns) + tuple(id(a) for a in artifacts)
+    with _cache_lock:
+        if _cache['key'] != key:
+            with open(column_info_path, 'r') as file:
+                column_info = json.load(file)
+            _cache['pipeline'] = CKDPipeline(column_info, *artifacts)
+            _cache['key'] = key
+        return _cache['pipeline']
+
+
+def load_reference_rows(csv_path, columns):
+    """Read kidney_disease.csv into raw rows ordered like column_info['abbrev']."""
+    import pandas as pd
+
+    data = pd.read_csv(csv_path).rename(columns=CSV_RENAME)
+    rows = []
+    for record in data[columns].itertuples(index=False):
+        row = []
+        for value in record:
+            if isinstance(value, str):
+                value = value.strip()
+                if value in ('', '?'):
+                    value = None
+                else:
+                    try:
+                        value = float(value)
+                    except ValueError:
+                        pass
+            row.append(value)
+        rows.append(row)
+    return rows
+
+
+def legacy_predict(rows, column_info, assets_dir=ASSETS_DIR):
+    """The original predictor-page DataFrame path, kept as the reference implementation."""
+    import pandas as pd
+
+    cat_imputer, encoder, cont_imputer, scaler, feat_extraction, model = (
+        load_artifact(os.path.join(assets_dir, f'{name}.pickle')) for name in ARTIFACTS)
+    predictions = []
+    for row in rows:
+        X_proc = pd.DataFrame([[np.nan if v is None else v for v in row]], columns=column_info['abbrev'])
+        X_proc = X_proc.applymap(lambda s: s.lower().replace(' ', '') if isinstance(s, str) else s)
+        X_proc[column_info['cat_imputer']] = cat_imputer.transform(X_proc[column_info['cat_imputer']])
+        X_proc[column_info['encoder']] = encoder.transform(X_proc[column_info['encoder']])
+        X_proc = cont_imputer.transform(X_proc)
+        X_proc = pd.DataFrame(X_proc, columns=column_info['abbrev'])
+        X_proc[column_info['scaler']] = scaler.transform(X_proc[column_info['scaler']])
+        X_proc = feat_extraction.transform(X_proc)
+        predictions.append(model.predict(X_proc)[0])
+    return np.array(predictions)
+
+
+def verify(csv_path=os.path.join(BASE_DIR, 'datasets', 'kidney_disease.csv'), assets_dir=ASSETS_DIR):
+    """Compare compiled and legacy predictions on every row of the CSV and time both paths."""
+    import time
+
+    with open(os.path.join(assets_dir, 'column_info.json'), 'r') as file:
+        column_info = json.load(file)
+    pipeline = get_pipeline(assets_dir)
+    rows = load_reference_rows(csv_path, column_info['abbrev'])
+
+    start = time.perf_counter()
+    expected = legacy_predict(rows, column_info, assets_dir)
+    legacy_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    compiled = np.array([pipeline.predict_one(row) for row in rows])
+    compiled_seconds = time.perf_counter() - start
+
+    batched = pipeline.predict(rows)
+    return {
+        'rows': len(rows),
+        'mismatches': int((compiled != expected).sum()),
+        'batch_mismatches': int((batched != expected).sum()),
+        'legacy_ms_per_row': 1000 * legacy_seconds / len(rows),
+        'compiled_ms_per_row': 1000 * compiled_seconds / len(rows),
+    }
+
+
+if __name__ == '__main__':
+    report = verify()
+    for name, value in report.items():
+        print(f"{name}: {value:.4f}" if isinstance(value, float) else f"{name}: {value}")
+    sys.exit(1 if report['mismatches'] or report['batch_mismatches'] else 0)
@@ -1,8 +1,19 @@
 import numpy as np
 import streamlit as st
-import cv2
-from keras.models import load_model
 import os
+import sys
+
+# Make the shared helpers at the repository root importable; Streamlit re-executes
+# this script on every interaction, so only add the path once
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+from common.inference_executor import Busy, InferenceTimeout
+from common.model_registry import load_artifact, registry
+from common.prediction_cache import content_key, upload_cache
+from common.tracing import Trace
+from common.profiling import profile_rerun
+from common.readiness import start_warmup
 
 
 st.set_page_config(
@@ -11,11 +22,25 @@ st.set_page_config(
     layout="wide"
 )
 
+# Sampled per rerun when BCU_PROFILE selects this app (see common.profiling)
+profile_rerun('malaria')
+
+# Load the model and run a sample image through it in the background; `python -m common.serve`
+# starts this at server start, plain `streamlit run` when a session first runs this script.
+# The sidecar's /readyz reports when it is warm
+start_warmup(['malaria'])
+
+# Shown when the shared inference executor turns a request away or it times out
+BUSY_MESSAGE = "The server is busy right now; please try again in a moment."
+TIMEOUT_MESSAGE = "The prediction took too long; please try again in a moment."
+
 # Function to load the model with error handling
 def load_model_safely(model_path):
     try:
-        model = load_model(model_path)
-        st.success("Model loaded successfully.")
+        first_load = not registry.is_loaded(model_path)
+        model = load_artifact(model_path, loader='keras')
+        if first_load:
+            st.success("Model loaded successfully.")
         return model
     except IOError as e:
         st.error(f"Error loading model: {e}")
@@ -64,14 +89,25 @@ def show_disclaimer_page():
     """)
 
 def show_prediction_page():
+    # OpenCV (and, through the model loader, TensorFlow) are only imported once
+    # someone opens this page, so Home and Disclaimer start instantly
+    import cv2
+    from malaria_batch import CLASS_NAMES, predict_cell
+
     # Loading the Model
     model = load_model_safely(model_path)
 
-    # Name of Classes
-    CLASS_NAMES = ['Parasitized', 'Healthy']
-
     # Setting Title of App
     st.title("Malarial Cell Disease Detection")
+
+    mode = st.radio("Mode", ["Single cell", "Batch (multiple images or ZIP)", "Whole smear (parasitemia)"], horizontal=True)
+    if mode == "Batch (multiple images or ZIP)":
+        show_batch_prediction(model)
+        return
+    if mode == "Whole smear (parasitemia)":
+        show_smear_prediction(model)
+        return
+
     st.markdown("Upload an image of the cell")
 
     # Uploading the cell image
@@ -82,24 +118,45 @@ def show_prediction_page():
     if submit:
         if cell_image is not None:
             try:
-                # Convert the file to an OpenCV image
-                file_bytes = np.asarray(bytearray(cell_image.read()), dtype=np.uint8)
-                opencv_image = cv2.imdecode(file_bytes, 1)
-
-                # Displaying the image
-                st.image(opencv_image, channels="BGR")
-                st.write(opencv_image.shape)
-
-                # Resizing the image
-                opencv_image = cv2.resize(opencv_image, (64, 64))
-
-                # Convert image to 4 dimensions
-                opencv_image = np.expand_dims(opencv_image, axis=0)
-
-                # Make prediction
-                Y_pred = model.predict(opencv_image)
-                result = CLASS_NAMES[np.argmax(Y_pred)]
-                st.title(f"Cell is {result}")
+                data = cell_image.getvalue()
+                trace = Trace('malaria', stages=['decode', 'preprocess', 'inference', 'render'])
+                trace.annotate(cache='hit')
+
+                def preprocess_and_predict():
+                    trace.annotate(cache='miss')
+                    # Convert the file to an OpenCV image
+                    with trace.stage('decode'):
+                        file_bytes = np.frombuffer(data, dtype=np.uint8)
+                        opencv_image = cv2.imdecode(file_bytes, 1)
+                        original_shape = opencv_image.shape
+
+                    with trace.stage('preprocess'):
+                        # Resizing the image
+                        opencv_image = cv2.resize(opencv_image, (64, 64))
+
+                        # Convert image to 4 dimensions
+                        opencv_image = np.expand_dims(opencv_image, axis=0)
+
+                    # Make prediction; concurrent sessions share one model.predict call
+                    with trace.stage('inference'):
+                        return opencv_image, predict_cell(model, opencv_image[0])[np.newaxis], original_shape
+
+                with trace:
+                    # Same upload + same model version -> cached tensor and scores
+                    key = content_key(data, registry.version(model_path), namespace='malaria')
+                    opencv_image, Y_pred, original_shape = upload_cache.get_or_compute(key, preprocess_and_predict)
+
+                    with trace.stage('render'):
+                        # Displaying the image
+                        st.image(data)
+                        st.write(original_shape)
+
+                        result = CLASS_NAMES[np.argmax(Y_pred)]
+                        st.title(f"Cell is {result}")
+            except Busy:
+                st.warning(BUSY_MESSAGE)
+            except InferenceTimeout:
+                st.warning(TIMEOUT_MESSAGE)
             except Exception as e:
                 st.error(f"Error processing the image: {e}")
         else:
@@ -107,5 +164,86 @@ def show_prediction_page():
     else:
         st.info("Click 'Predict' to analyze the image.")
 
+def show_batch_prediction(model):
+    from malaria_batch import classify_uploads
+
+    st.markdown("Upload cell crops as PNG files, or a ZIP archive of them")
+    uploads = st.file_uploader("Choose images...", type=["png", "zip"], accept_multiple_files=True)
+    submit = st.button('Predict all')
+
+    if not submit:
+        st.info("Click 'Predict all' to analyze the images.")
+        return
+    if not uploads:
+        st.error("Please upload at least one image.")
+        return
+
+    progress_bar = st.progress(0.0, text="Classifying cells...")
+    try:
+        rows, summary = classify_uploads(
+            model, uploads,
+            progress=lambda done, total: progress_bar.progress(done / total, text=f"Classified {done}/{total} images"))
+    except Busy:
+        progress_bar.empty()
+        st.warning(BUSY_MESSAGE)
+        return
+    except InferenceTimeout:
+        progress_bar.empty()
+        st.warning(TIMEOUT_MESSAGE)
+        return
+    except Exception as e:
+        st.error(f"Error processing the images: {e}")
+        return
+    progress_bar.empty()
+
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Parasitized", summary['Parasitized'])
+    col2.metric("Healthy", summary['Healthy'])
+    col3.metric("Unreadable", summary['unreadable'])
+    col4.metric("Throughput", f"{summary['images_per_second']:.1f} images/s")
+    st.dataframe(rows, use_container_width=True)
+
+def show_smear_prediction(model):
+    import cv2
+    from malaria_smear import analyze_smear
+
+    st.markdown("Upload a full thin-smear micrograph; every cell is segmented and classified")
+    smear_image = st.file_uploader("Choose a smear image...", type=["png", "jpg", "jpeg", "tif", "tiff"])
+    submit = st.button('Analyze smear')
+
+    if not submit:
+        st.info("Click 'Analyze smear' to estimate parasitemia.")
+        return
+    if smear_image is None:
+        st.error("Please upload an image.")
+        return
+
+    try:
+        file_bytes = np.frombuffer(smear_image.getvalue(), dtype=np.uint8)
+        opencv_image = cv2.imdecode(file_bytes, cv2.IMREAD_COLOR)
+        if opencv_image is None:
+            st.error("Could not decode the uploaded image.")
+            return
+        with st.spinner('Segmenting and classifying cells...'):
+            result = analyze_smear(model, opencv_image)
+    except Busy:
+        st.warning(BUSY_MESSAGE)
+        return
+    except InferenceTimeout:
+        st.warning(TIMEOUT_MESSAGE)
+        return
+    except Exception as e:
+        st.error(f"Error processing the image: {e}")
+        return
+
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Cells", result['cells'])
+    col2.metric("Parasitized", result['Parasitized'])
+    col3.metric("Healthy", result['Healthy'])
+    col4.metric("Parasitemia", f"{result['parasitemia']:.2f} %")
+    st.image(result['overlay'], channels="BGR", caption="Red: Parasitized, Green: Healthy")
+    timings = result['timings']
+    st.caption(" | ".join(f"{stage}: {seconds * 1000:.0f} ms" for stage, seconds in timings.items()))
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,120 @@
+"""Batched classification of many malaria cell crops.
+
+Uploads (individual images or ZIP archives) are decoded and resized to the
+model's 64x64 input in a thread pool -- OpenCV releases the GIL while it
+works -- and written straight into one preallocated (N, 64, 64, 3) uint8
+array per chunk.  ``model.predict`` is then called once per chunk instead of
+once per image, on the shared inference executor: the first chunk is turned
+away with ``Busy`` when the executor's queue is full, later chunks of an
+admitted job wait for a slot.
+"""
+import io
+import os
+import sys
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+# Make the shared helpers at the repository root importable
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+from common.inference_executor import get_executor
+from common.micro_batcher import get_batcher
+
+CLASS_NAMES = ['Parasitized', 'Healthy']
+INPUT_SIZE = (64, 64)
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+DEFAULT_CHUNK_SIZE = 256
+
+
+def iter_uploads(files):
+    """Yield ``(name, bytes)`` for each uploaded image, expanding ZIP archives."""
+    for f in files:
+        name = getattr(f, 'name', 'upload')
+        data = f.getvalue() if hasattr(f, 'getvalue') else f.read()
+        if name.lower().endswith('.zip'):
+            with zipfile.ZipFile(io.BytesIO(data)) as archive:
+                for member in archive.infolist():
+                    if member.is_dir() or not member.filename.lower().endswith(IMAGE_EXTENSIONS):
+                        continue
+                    if os.path.basename(member.filename).startswith('.'):
+                        continue  # macOS resource forks and other hidden files
+                    yield member.filename, archive.read(member)
+        else:
+            yield name, data
+
+
+def decode_cell(data, out):
+    """Decode encoded image bytes and resize into ``out`` (64x64x3). Returns False if undecodable."""
+    image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        return False
+    cv2.resize(image, INPUT_SIZE, dst=out)
+    return True
+
+
+def cell_batcher(model):
+    """The process-wide micro-batcher for single cells scored with ``model``."""
+    return get_batcher('malaria', model, max_batch=64)
+
+
+def predict_cell(model, image):
+    """Class scores for one 64x64x3 cell, batched with other sessions' requests."""
+    return cell_batcher(model).submit(image)
+
+
+def classify_uploads(model, files, chunk_size=DEFAULT_CHUNK_SIZE, workers=None, progress=None):
+    """Classify every image in ``files``.
+
+    Returns ``(rows, summary)`` where ``rows`` has one dict per file and
+    ``summary`` holds per-class counts, failures and throughput.  ``progress``
+    is called with ``(done, total)`` after each chunk.
+    """
+    items = list(iter_uploads(files))
+    total = len(items)
+    rows = []
+    counts = {name: 0 for name in CLASS_NAMES}
+    failed = 0
+    batch = np.empty((min(chunk_size, max(total, 1)),) + INPUT_SIZE[::-1] + (3,), dtype=np.uint8)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers or min(32, (os.cpu_count() or 1) + 4)) as pool:
+        for offset in range(0, total, chunk_size):
+            chunk = items[offset:offset + chunk_size]
+            ok = list(pool.map(lambda i: decode_cell(chunk[i][1], batch[i]), range(len(chunk))))
+            valid = np.flatnonzero(ok)
+
+            if len(valid) == len(chunk):
+                inputs = batch[:len(chunk)]  # contiguous view, no copy
+            else:
+                inputs = batch[valid]
+            if len(valid):
+                scores = get_executor().run(lambda: model.predict(inputs, verbose=0), block=offset > 0)
+            else:
+                scores = np.empty((0, len(CLASS_NAMES)))
+            predicted = scores.argmax(axis=1)
+
+            chunk_rows = [{'file': name, 'prediction': 'Unreadable image', 'confidence': None}
+                          for name, _ in chunk]
+            failed += len(chunk) - len(valid)
+            for k, j in enumerate(valid):
+                label = CLASS_NAMES[predicted[k]]
+                counts[label] += 1
+                chunk_rows[j].update(prediction=label, confidence=float(scores[k, predicted[k]]))
+            rows.extend(chunk_rows)
+            if progress is not None:
+                progress(min(offset + chunk_size, total), total)
+    elapsed = time.perf_counter() - start
+
+    summary = dict(counts)
+    summary.update({
+        'images': total,
+        'unreadable': failed,
+        'seconds': elapsed,
+        'images_per_second': (total - failed) / elapsed if elapsed > 0 else 0.0,
+    })
+    return rows, summary
@@ -0,0 +1,146 @@
+"""Slide-level parasitemia estimation from a full thin-smear micrograph.
+
+Cells are segmented with Otsu thresholding and a distance-transform watershed
+(to split touching cells), then every cell is cropped and resized to the
+model's 64x64 input with vectorized NumPy gathers into one contiguous
+(N, 64, 64, 3) array and classified with one batched ``model.predict``.
+
+As in the training images, pixels outside each cell's own mask are set to
+black, so neighbouring cells that fall inside a bounding box do not leak into
+the crop.
+"""
+import time
+
+import cv2
+import numpy as np
+
+from malaria_batch import CLASS_NAMES, INPUT_SIZE  # also puts the repository root on sys.path
+
+from common.inference_executor import get_executor
+
+PARASITIZED = CLASS_NAMES.index('Parasitized')
+BOX_COLOURS = {0: (0, 0, 255), 1: (0, 200, 0)}  # BGR: red = Parasitized, green = Healthy
+
+
+def segment_cells(image, min_area_ratio=0.25, max_area_ratio=4.0):
+    """Return ``(labels, boxes)`` for the cells in a BGR smear image.
+
+    ``labels`` is an int32 image where each kept cell has its own id and
+    ``boxes`` an (N, 5) array of ``[label, x, y, w, h]``.  Components much
+    smaller or larger than the median cell are dropped as debris or clumps.
+    """
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    gray = cv2.GaussianBlur(gray, (5, 5), 0)
+    # Cells are darker than the bright background
+    _, mask = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
+    mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel, iterations=2)
+    mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel, iterations=2)
+
+    # Watershed seeded from distance-transform peaks to split touching cells
+    dist = cv2.distanceTransform(mask, cv2.DIST_L2, 5)
+    _, sure_fg = cv2.threshold(dist, 0.4 * dist.max(), 255, cv2.THRESH_BINARY)
+    sure_fg = sure_fg.astype(np.uint8)
+    sure_bg = cv2.dilate(mask, kernel, iterations=3)
+    unknown = cv2.subtract(sure_bg, sure_fg)
+    _, markers = cv2.connectedComponents(sure_fg)
+    markers += 1
+    markers[unknown == 255] = 0
+    markers = cv2.watershed(image, markers)
+
+    # Background is 1 and ridges are -1; keep only the cell interiors
+    cells = ((markers > 1) & (mask > 0)).astype(np.uint8)
+    count, labels, stats, _ = cv2.connectedComponentsWithStats(cells, connectivity=8)
+    if count <= 1:
+        return labels, np.empty((0, 5), dtype=np.int64)
+
+    areas = stats[1:, cv2.CC_STAT_AREA]
+    median = np.median(areas)
+    keep = np.flatnonzero((areas >= min_area_ratio * median) & (areas <= max_area_ratio * median)) + 1
+    boxes = np.column_stack([keep, stats[keep, :4]]).astype(np.int64)
+    return labels, boxes
+
+
+def crop_cells(image, labels, boxes, size=INPUT_SIZE, chunk_size=256):
+    """Bilinearly resample every box to ``size`` with vectorized gathers.
+
+    Uses the same pixel-centre convention as ``cv2.resize(..., INTER_LINEAR)``.
+    Works through the boxes ``chunk_size`` at a time to bound the float
+    temporaries, writing into one contiguous (N, h, w, 3) uint8 array.
+    """
+    out_w, out_h = size
+    crops = np.empty((len(boxes), out_h, out_w, 3), dtype=np.uint8)
+    height, width = image.shape[:2]
+    grid_y = np.arange(out_h, dtype=np.float32) + 0.5
+    grid_x = np.arange(out_w, dtype=np.float32) + 0.5
+
+    for s in range(0, len(boxes), chunk_size):
+        cell_id = boxes[s:s + chunk_size, 0].astype(labels.dtype)
+        x0, y0, w, h = (boxes[s:s + chunk_size, i].astype(np.float32) for i in range(1, 5))
+
+        # Source coordinates for every output pixel of every crop: (n, out_h) and (n, out_w)
+        ys = np.clip(y0[:, None] + grid_y * (h / out_h)[:, None] - 0.5, 0, height - 1)
+        xs = np.clip(x0[:, None] + grid_x * (w / out_w)[:, None] - 0.5, 0, width - 1)
+        y_lo = np.floor(ys).astype(np.intp)
+        x_lo = np.floor(xs).astype(np.intp)
+        y_hi = np.minimum(y_lo + 1, height - 1)[:, :, None]
+        x_hi = np.minimum(x_lo + 1, width - 1)[:, None, :]
+        fy = (ys - y_lo)[:, :, None, None]
+        fx = (xs - x_lo)[:, None, :, None]
+        y_lo = y_lo[:, :, None]
+        x_lo = x_lo[:, None, :]
+
+        top = image[y_lo, x_lo] * (1 - fx) + image[y_lo, x_hi] * fx
+        bottom = image[y_hi, x_lo] * (1 - fx) + image[y_hi, x_hi] * fx
+        chunk = top * (1 - fy) + bottom * fy
+
+        # Black out everything that does not belong to this crop's own cell
+        nearest = labels[np.rint(ys).astype(np.intp)[:, :, None], np.rint(xs).astype(np.intp)[:, None, :]]
+        chunk *= (nearest == cell_id[:, None, None])[..., None]
+        np.rint(chunk, out=chunk)
+        crops[s:s + chunk_size] = chunk
+    return crops
+
+
+def draw_overlay(image, boxes, predicted):
+    overlay = image.copy()
+    for (_, x, y, w, h), cls in zip(boxes, predicted):
+        cv2.rectangle(overlay, (int(x), int(y)), (int(x + w), int(y + h)), BOX_COLOURS[int(cls)], 2)
+    return overlay
+
+
+def analyze_smear(model, image, batch_size=256):
+    """Segment, crop and classify every cell in ``image``.
+
+    Returns a dict with per-class counts, parasitemia (%), the overlay image,
+    the boxes/predictions and a timing breakdown in seconds.
+    """
+    timings = {}
+    start = time.perf_counter()
+    labels, boxes = segment_cells(image)
+    timings['segmentation'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    crops = crop_cells(image, labels, boxes)
+    timings['cropping'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    if len(crops):
+        scores = get_executor().run(lambda: model.predict(crops, batch_size=batch_size, verbose=0))
+        predicted = scores.argmax(axis=1)
+    else:
+        predicted = np.empty(0, dtype=np.int64)
+    timings['inference'] = time.perf_counter() - start
+
+    parasitized = int((predicted == PARASITIZED).sum())
+    total = len(predicted)
+    return {
+        'cells': total,
+        'Parasitized': parasitized,
+        'Healthy': total - parasitized,
+        'parasitemia': 100.0 * parasitized / total if total else 0.0,
+        'overlay': draw_overlay(image, boxes, predicted),
+        'boxes': boxes,
+        'predicted': predicted,
+        'timings': timings,
+    }
@@ -1,14 +1,38 @@
-import pandas as pd
+import logging
 import streamlit as st
-import tensorflow as tf
-import time
-from PIL import Image, ImageOps
 import numpy as np
-import webbrowser
 import os
+import sys
+
+# Make the shared helpers at the repository root importable; Streamlit re-executes
+# this script on every interaction, so only add the path once
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+from common.model_registry import registry
+from common.prediction_cache import content_key, upload_cache
+from common.tracing import Trace
+from common.static_assets import asset_bytes
+from common.inference_executor import Busy, InferenceTimeout
+from common.profiling import profile_rerun
+from common.readiness import start_warmup, status as readiness_status, wait_until_ready
+# TensorFlow is only imported by the model loader, on the warm-up thread, so the
+# informational pages do not pay for it on a cold start
+from xray_model import MODEL_PATH as model_path, get_model
+import xray_model
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
 
 st.set_page_config(layout="wide",page_icon="🧑‍⚕️", page_title="BCU Pneumonia prediction System ")
 
+# Sampled per rerun when BCU_PROFILE selects this app (see common.profiling)
+profile_rerun('pneumonia')
+
+# Load and warm the X-ray model in the background; `python -m common.serve pneumonia` starts
+# this at server start, so the first visitor finds it warm (plain `streamlit run` only when a
+# session first runs this script). The sidecar's /readyz reports when it is warm
+start_warmup(['pneumonia'])
+
 options = st.sidebar.radio('PNEUMONIA PREDICTION MENU', options=['🏠Home', '🏥About Pneumonia', '🤖Application', '⚠️Disclaimer', '🔖Resources', '👨🏻‍💻About Project'])
 
 # Get the absolute path of the current directory
@@ -22,8 +46,7 @@ def Ho():
     if not os.path.exists(home_img_path):
         st.error(f"File not found: {home_img_path}")
     else:
-        home_img = Image.open(home_img_path)
-        st.image(home_img, width=800)
+        st.image(asset_bytes(home_img_path), width=800)
 
 def Ab():
     st.header('What is Pneumonia?')
@@ -32,16 +55,23 @@ def Ab():
     st.write("Source and further reading available at https://en.wikipedia.org/wiki/Pneumonia")
 
 def Ap():
-    @st.cache_data
     def load_model():
-        model_path = os.path.join(current_dir, 'xray_model_80-20.h5')
         if not os.path.exists(model_path):
             st.error(f"Model file not found: {model_path}")
             return None
-        model = tf.keras.models.load_model(model_path)
-        return model
-
-    with st.spinner('Please wait, while the model is being loaded..'):
+        # Warmed at server start; only waits if the page is opened while that is still running
+        if wait_until_ready(['pneumonia']):
+            return get_model()
+        warmup = readiness_status()['models'].get('pneumonia')
+        if warmup is None:  # warm-up disabled with BCU_WARMUP: load it here
+            return get_model()
+        st.error(f"The model could not be loaded: {warmup['error']}")
+        return None
+
+    # Only written out if an image is actually processed below
+    trace = Trace('pneumonia', stages=['model_load', 'decode', 'preprocess', 'inference'])
+
+    with st.spinner('Please wait, while the model is being loaded..'), trace.stage('model_load'):
         model = load_model()
         if model is None:
             st.error("Failed to load the model. Please check the file path and try again.")
@@ -62,33 +92,59 @@ def Ap():
         if not os.path.exists(compared_img_path):
             st.error(f"File not found: {compared_img_path}")
         else:
-            image1 = Image.open(compared_img_path)
-            st.image(image1, use_column_width=True)
+            st.image(asset_bytes(compared_img_path), use_column_width=True)
     else:
         st.subheader("Thank you for uploading X-ray image!")
-        with st.spinner('We are processing your image.......'):
+        with st.spinner('We are processing your image.......'), trace:
             try:
-                img = Image.open(file)
-                img = ImageOps.grayscale(img)  # Convert image to grayscale
-                img = img.resize((500, 500))  # Resize image to 500x500
-                img_array = np.array(img)
-                img_array = np.expand_dims(img_array, axis=-1)  # Add the channel dimension
-                img_array = np.expand_dims(img_array, axis=0)  # Create a batch
-
-                # Debugging information
-                st.write(f"Image shape after preprocessing: {img_array.shape}")
-
-                predictions = model.predict(img_array)
-                score = tf.sigmoid(predictions)
-
-                time.sleep(2)
-                st.success('Prediction is complete!')
-                st.subheader(
-                    f"Uploaded X-ray image looks like this :point_down: and most likely belongs to {'Infected lungs' if np.max(score) > 0.5 else 'Normal lungs'}!"
-                )
-                st.image(img, width=400)
-                st.subheader("Thank you for using this application!")
+                data = file.getvalue()
+
+                def preprocess_and_predict():
+                    trace.annotate(cache='miss')
+                    decode_stats = {}
+                    with trace.stage('decode'):
+                        # Grayscale, decoded at reduced resolution when the upload is large
+                        img = xray_model.decode(data, stats=decode_stats)
+                    trace.annotate(decode_ms=decode_stats['decode_ms'], estimated_peak_bytes=decode_stats['estimated_peak_bytes'],
+                                   source_size=decode_stats['source_size'])
+                    with trace.stage('preprocess'):
+                        img_array = xray_model.to_input(img)  # 500x500 with a channel dimension
+                        img_array = np.expand_dims(img_array, axis=0)  # Create a batch
+
+                    with trace.stage('inference'):
+                        # Coalesced with concurrent sessions into one model.predict call
+                        predictions = xray_model.predict_batched(model, img_array[0])[np.newaxis]
+                        score = float(xray_model.score(predictions)[0])
+                    return img_array, score, decode_stats
+
+                # Reruns with the same upload and model reuse the cached tensor and score
+                trace.annotate(cache='hit')
+                key = content_key(data, registry.version(model_path), namespace='pneumonia')
+                img_array, score, decode_stats = upload_cache.get_or_compute(key, preprocess_and_predict)
+
+                with trace.stage('render'):
+                    # Debugging information
+                    st.write(f"Image shape after preprocessing: {img_array.shape}")
+                    width, height = decode_stats['source_size']
+                    st.caption(f"Decoded {width}x{height} {decode_stats['source_mode']} upload at "
+                               f"{decode_stats['decoded_size'][0]}x{decode_stats['decoded_size'][1]} in "
+                               f"{decode_stats['decode_ms']:.0f} ms, estimated peak pixel memory "
+                               f"{decode_stats['estimated_peak_bytes'] / 2**20:.1f} MB")
+
+                    st.success('Prediction is complete!')
+                    st.subheader(
+                        f"Uploaded X-ray image looks like this :point_down: and most likely belongs to {'Infected lungs' if score > 0.5 else 'Normal lungs'}!"
+                    )
+                    st.image(img_array[0, :, :, 0], width=400)
+                    st.subheader("Thank you for using this application!")
+            except Busy:
+                trace.annotate(error='busy')
+                st.warning("The server is busy right now; please try again in a moment.")
+            except InferenceTimeout:
+                trace.annotate(error='timeout')
+                st.warning("The prediction took too long; please try again in a moment.")
             except Exception as e:
+                trace.annotate(error=str(e))
                 st.error(f"An error occurred during prediction: {e}")
 
 def Di():
@@ -96,8 +152,7 @@ def Di():
     if not os.path.exists(disclaimer_img_path):
         st.error(f"File not found: {disclaimer_img_path}")
     else:
-        image2 = Image.open(disclaimer_img_path)
-        st.image(image2, use_column_width=True)
+        st.image(asset_bytes(disclaimer_img_path), use_column_width=True)
     st.subheader('This App does not substitute a healthcare professional!')
     st.header('')
     st.write('1. Accuracy of prediction depends on the datasets which were used for training the model within this App, and also depends on the quality of image provided.')
@@ -0,0 +1,129 @@
+"""Process-wide X-ray model and upload preprocessing.
+
+The model is loaded through the shared registry, so every session uses the
+same instance; ``common.readiness`` loads and warms it on a background thread
+when the app starts.  Single uploads are scored through a micro-batcher
+shared with the other sessions, and ``decode`` keeps large uploads cheap.
+"""
+import io
+import os
+import sys
+import time
+
+import numpy as np
+
+# Make the shared helpers at the repository root importable
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+from common.micro_batcher import get_batcher
+from common.model_registry import load_artifact
+
+MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'xray_model_80-20.h5')
+INPUT_SHAPE = (1, 500, 500, 1)
+MIN_DECODE_SIZE = (INPUT_SHAPE[2], INPUT_SHAPE[1])  # (width, height)
+
+
+def get_model():
+    return load_artifact(MODEL_PATH, loader='keras')
+
+
+def image_batcher(model):
+    """The process-wide micro-batcher for single X-rays scored with ``model``."""
+    return get_batcher('pneumonia', model, max_batch=8)
+
+
+def predict_batched(model, image):
+    """Model output for one (500, 500, 1) image, batched with other sessions' requests."""
+    return image_batcher(model).submit(image)
+
+
+# Bytes per pixel of the PIL image modes an upload can decode to
+_BYTES_PER_PIXEL = {'1': 1, 'L': 1, 'P': 1, 'I;16': 2, 'I;16L': 2, 'I;16B': 2, 'I;16N': 2}
+_WIDE_MODES = ('I;16', 'I;16L', 'I;16B', 'I;16N', 'I')
+
+
+def _pixel_bytes(img, mode=None):
+    return img.width * img.height * _BYTES_PER_PIXEL.get(mode or img.mode, 4)
+
+
+def decode(data, min_size=MIN_DECODE_SIZE, stats=None):
+    """Decode an uploaded X-ray (encoded image bytes) into a grayscale PIL image.
+
+    Large uploads are decoded at the smallest size that is still at least
+    ``min_size`` (width, height).  Only JPEGs are reduced inside the decoder:
+    libjpeg's 1/2, 1/4 and 1/8 DCT scaling, straight to grayscale.  Pillow's
+    PNG, TIFF and BMP decoders have no reduced-size mode (``draft`` is a no-op
+    and ``Image.reduce`` works on the decoded image), so those formats are
+    decoded at full size and then box-reduced by an integer factor, before any
+    mode conversion; their full-size buffer is the memory peak.
+    16-bit (and 32-bit integer) grayscale is reduced at full depth and then
+    shifted so the highest bit in use becomes the top bit of the 8-bit
+    result; ``convert('L')`` would saturate 12-bit exports to white.
+
+    If ``stats`` is a dict it receives the decode time, the source and decoded
+    sizes and ``estimated_peak_bytes``: the sum of the pixel buffers held at
+    once while decoding, computed from their sizes and modes (decoder state
+    and Python overhead are not counted).
+    """
+    from PIL import Image
+
+    start = time.perf_counter()
+    img = Image.open(io.BytesIO(data))
+    source_size, source_mode = img.size, img.mode
+    if img.format == 'JPEG':
+        img.draft('L', min_size)
+    img.load()
+    decoded_size, decoded_mode = img.size, img.mode
+    peak = _pixel_bytes(img)
+
+    factor = min(img.width // min_size[0], img.height // min_size[1])
+    if factor >= 2:
+        if img.mode in ('P', '1', 'CMYK', 'YCbCr', 'LAB', 'HSV'):
+            converted = img.convert('L')
+            peak = max(peak, _pixel_bytes(img) + _pixel_bytes(converted))
+            img = converted
+        reduced = img.resize((img.width // factor, img.height // factor), Image.BOX)
+        peak = max(peak, _pixel_bytes(img) + _pixel_bytes(reduced))
+        img = reduced
+
+    if img.mode in _WIDE_MODES:
+        # uint16 for the I;16 modes, int32 for I; shifted straight into the 8-bit result
+        pixels = np.asarray(img)
+        shift = max(max(int(pixels.max()), 0).bit_length() - 8, 0)
+        out = np.zeros(pixels.shape, dtype=np.uint8)
+        # Negative values (mode I only) stay black instead of wrapping around
+        positive = pixels > 0 if pixels.dtype.kind == 'i' else True
+        np.right_shift(pixels, shift, out=out, where=positive, casting='unsafe')
+        converted = Image.fromarray(out, 'L')
+        peak = max(peak, _pixel_bytes(img) + pixels.nbytes + 2 * out.nbytes)
+        img = converted
+    elif img.mode != 'L':
+        converted = img.convert('L')
+        peak = max(peak, _pixel_bytes(img) + _pixel_bytes(converted))
+        img = converted
+
+    if stats is not None:
+        stats.update({
+            'decode_ms': (time.perf_counter() - start) * 1000,
+            'source_size': list(source_size),
+            'source_mode': source_mode,
+            'decoded_size': list(decoded_size),
+            'decoded_mode': decoded_mode,
+            'output_size': list(img.size),
+            'estimated_peak_bytes': peak,
+            'full_decode_bytes': source_size[0] * source_size[1] * _BYTES_PER_PIXEL.get(source_mode, 4),
+        })
+    return img
+
+
+def to_input(img):
+    """Resize a grayscale image to the model's (500, 500, 1) uint8 input."""
+    # PIL sizes are (width, height)
+    return np.asarray(img.resize((INPUT_SHAPE[2], INPUT_SHAPE[1])))[..., np.newaxis]
+
+
+def score(predictions):
+    """Probability of infected lungs for each row of ``model.predict`` output."""
+    predictions = np.asarray(predictions, dtype=np.float64).reshape(len(predictions), -1)
+    return (1.0 / (1.0 + np.exp(-predictions))).max(axis=1)  # sigmoid
@@ -0,0 +1,5 @@
+"""Helpers shared by the disease prediction apps in this repository.
+
+Each app lives in its own folder and is started with ``streamlit run``, so the
+apps add the repository root to ``sys.path`` before importing from here.
+"""
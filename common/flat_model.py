@@ -0,0 +1,633 @@
+"""Flat-array model files that open with mmap and evaluate with plain NumPy.
+
+Pickled sklearn estimators are slow to deserialize, cannot be memory-mapped
+and are copied into every worker process.  ``export`` writes the fitted
+parameters of a supported estimator as raw arrays in one file; ``load`` maps
+that file read-only, so opening it takes milliseconds and every process that
+maps it shares the same pages through the OS page cache.
+
+Supported estimators (what the apps use):
+
+    LogisticRegression      binary, one-vs-rest and multinomial
+    SVC                     binary; linear / rbf / poly / sigmoid kernels,
+                            with Platt-scaled ``predict_proba`` if fitted with
+                            ``probability=True``
+    RandomForestClassifier  single-output
+    StandardScaler
+    SimpleImputer           numeric statistics, without ``add_indicator``
+
+The evaluators follow sklearn's own arithmetic (float32 tree thresholds, the
+libsvm Platt sigmoid and pairwise coupling, sequential forest averaging), so
+``predict`` matches exactly and probabilities agree to floating-point rounding.
+
+    python -m common.flat_model export heart/heart_disease_model.sav
+    python -m common.flat_model verify heart/heart_disease_model.sav heart/heart.csv
+    python -m common.flat_model verify liver/liver.sav liver/liver.csv --map Gender=Male:1,Female:0
+    python -m common.flat_model verify BreastCancer/model.pkl BreastCancer/data.csv \
+        --columns-from BreastCancer/scaler.pkl
+
+``verify`` reads the model's input columns from the CSV by header (the names
+the model was fitted with, ``--columns`` or ``--columns-from``), encodes
+categorical columns with ``--map`` and fails on any other non-numeric value.
+
+``export`` writes ``<model file>.flat`` next to the pickle and records the
+pickle's SHA-256 in the header; ``load_model_file`` uses the flat file only
+while that hash matches the pickle on disk, so a retrained (or restored)
+pickle is never shadowed by a stale export, whatever the modification times.
+
+File layout: ``BCUFLAT1``, a little-endian uint64 header length, a JSON
+header (estimator kind, scalar parameters, array dtypes / shapes / offsets),
+then the arrays, each aligned to 64 bytes.
+"""
+import json
+import logging
+import os
+import struct
+import sys
+import threading
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'BCUFLAT1'
+ALIGN = 64
+SUFFIX = '.flat'
+
+
+def _align(offset):
+    return -(-offset // ALIGN) * ALIGN
+
+
+# --- file format ----------------------------------------------------------
+
+def write_flat(path, kind, params, arrays):
+    """Write ``arrays`` (name -> ndarray) and JSON ``params`` to ``path`` atomically."""
+    arrays = {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+    layout, offset = {}, 0
+    for name, array in arrays.items():
+        if array.dtype.hasobject:
+            raise TypeError(f"array '{name}' has dtype object and cannot be stored flat")
+        offset = _align(offset)
+        layout[name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset}
+        offset += array.nbytes
+
+    header = json.dumps({'kind': kind, 'params': params, 'arrays': layout}).encode()
+    data_start = _align(len(MAGIC) + 8 + len(header))
+    tmp = f"{path}.tmp{os.getpid()}"
+    with open(tmp, 'wb') as f:
+        f.write(MAGIC + struct.pack('<Q', len(header)) + header)
+        for name, array in arrays.items():
+            f.seek(data_start + layout[name]['offset'])
+            f.write(array.tobytes())
+        f.truncate(data_start + offset)
+    os.replace(tmp, path)
+
+
+def read_header(path):
+    """The JSON header of a flat model file, without mapping its arrays."""
+    with open(path, 'rb') as f:
+        prefix = f.read(len(MAGIC) + 8)
+        if prefix[:len(MAGIC)] != MAGIC or len(prefix) != len(MAGIC) + 8:
+            raise ValueError(f"{path} is not a flat model file")
+        (length,) = struct.unpack('<Q', prefix[len(MAGIC):])
+        return json.loads(f.read(length))
+
+
+def read_flat(path):
+    """Return ``(kind, params, arrays)``; the arrays are read-only views of one mmap."""
+    mapped = np.memmap(path, dtype=np.uint8, mode='r')
+    if bytes(mapped[:len(MAGIC)]) != MAGIC:
+        raise ValueError(f"{path} is not a flat model file")
+    (length,) = struct.unpack('<Q', bytes(mapped[len(MAGIC):len(MAGIC) + 8]))
+    header = json.loads(bytes(mapped[len(MAGIC) + 8:len(MAGIC) + 8 + length]))
+    data_start = _align(len(MAGIC) + 8 + length)
+    arrays = {}
+    for name, spec in header['arrays'].items():
+        dtype = np.dtype(spec['dtype'])
+        start = data_start + spec['offset']
+        count = int(np.prod(spec['shape'], dtype=np.int64))
+        arrays[name] = mapped[start:start + count * dtype.itemsize].view(dtype).reshape(spec['shape'])
+    return header['kind'], header['params'], arrays
+
+
+# --- evaluators -----------------------------------------------------------
+
+def _as_2d(X):
+    X = np.asarray(X, dtype=np.float64)
+    return X.reshape(1, -1) if X.ndim == 1 else X
+
+
+def _expit(x):
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+def _softmax(x):
+    # Same steps as sklearn.utils.extmath.softmax
+    x = x - x.max(axis=1, keepdims=True)
+    np.exp(x, out=x)
+    x /= x.sum(axis=1, keepdims=True)
+    return x
+
+
+class FlatModel:
+    """Base class: holds the mapped arrays and the scalar parameters."""
+
+    kind = None
+
+    def __init__(self, params, arrays):
+        self.params = params
+        self.arrays = arrays
+        self.n_features_in_ = params.get('n_features_in')
+        if 'classes' in params:
+            self.classes_ = np.asarray(params['classes'])
+
+
+class FlatLogisticRegression(FlatModel):
+    kind = 'logistic_regression'
+
+    def decision_function(self, X):
+        scores = _as_2d(X) @ self.arrays['coef'].T + self.arrays['intercept']
+        return scores.ravel() if scores.shape[1] == 1 else scores
+
+    def predict(self, X):
+        scores = self.decision_function(X)
+        indices = (scores > 0).astype(int) if scores.ndim == 1 else scores.argmax(axis=1)
+        return self.classes_[indices]
+
+    def predict_proba(self, X):
+        scores = self.decision_function(X)
+        if self.params['ovr']:
+            proba = _expit(scores)
+            if proba.ndim == 1:
+                return np.vstack([1 - proba, proba]).T
+            return proba / proba.sum(axis=1, keepdims=True)
+        if scores.ndim == 1:
+            scores = np.c_[-scores, scores]
+        return _softmax(scores)
+
+
+class FlatSVC(FlatModel):
+    kind = 'svc'
+    chunk_rows = 1024
+
+    def _kernel(self, X):
+        p, sv = self.params, self.arrays['support_vectors']
+        if p['kernel'] == 'rbf':
+            d = X[:, np.newaxis, :] - sv[np.newaxis, :, :]
+            return np.exp(-p['gamma'] * np.einsum('ijk,ijk->ij', d, d))
+        dot = X @ sv.T
+        if p['kernel'] == 'poly':
+            return (p['gamma'] * dot + p['coef0']) ** p['degree']
+        if p['kernel'] == 'sigmoid':
+            return np.tanh(p['gamma'] * dot + p['coef0'])
+        raise ValueError(f"unsupported kernel {p['kernel']!r}")
+
+    def decision_function(self, X):
+        X = _as_2d(X)
+        if self.params['kernel'] == 'linear':
+            return X @ self.arrays['coef'] + self.arrays['intercept'][0]
+        out = np.empty(len(X))
+        dual_coef = self.arrays['dual_coef'][0]
+        for s in range(0, len(X), self.chunk_rows):
+            out[s:s + self.chunk_rows] = self._kernel(X[s:s + self.chunk_rows]) @ dual_coef
+        out += self.arrays['intercept'][0]
+        return out
+
+    def predict(self, X):
+        return self.classes_[(self.decision_function(X) > 0).astype(int)]
+
+    @property
+    def predict_proba(self):
+        if 'probA' not in self.arrays:
+            raise AttributeError("predict_proba is not available when the SVC was fitted with probability=False")
+        return self._predict_proba
+
+    def _predict_proba(self, X):
+        # libsvm's Platt sigmoid on its own decision value (the negated public one)
+        f_ab = -self.decision_function(X) * self.arrays['probA'][0] + self.arrays['probB'][0]
+        r = np.empty_like(f_ab)
+        positive = f_ab >= 0
+        e = np.exp(-f_ab[positive])
+        r[positive] = e / (1.0 + e)
+        r[~positive] = 1.0 / (1.0 + np.exp(f_ab[~positive]))
+        np.clip(r, 1e-7, 1 - 1e-7, out=r)
+        return _couple_binary(r)
+
+
+def _couple_binary(r):
+    """libsvm's ``multiclass_probability`` for two classes, vectorized over rows.
+
+    The libsvm bundled with sklearn runs its iterative pairwise-coupling
+    solver even for binary problems, so the result is not exactly ``(r, 1 - r)``.
+    Every row takes the same steps in the same order as the C code.
+    """
+    r01, r10 = r, 1.0 - r
+    q00, q11 = r10 * r10, r01 * r01
+    q01 = -r10 * r01
+    Q = ((q00, q01), (q01, q11))
+    p = [np.full_like(r, 0.5), np.full_like(r, 0.5)]
+    active = np.ones(len(r), dtype=bool)
+    for _ in range(100):
+        Qp = [Q[t][0] * p[0] + Q[t][1] * p[1] for t in (0, 1)]
+        pQp = p[0] * Qp[0] + p[1] * Qp[1]
+        max_error = np.maximum(np.abs(Qp[0] - pQp), np.abs(Qp[1] - pQp))
+        active &= ~(max_error < 0.005 / 2)
+        if not active.any():
+            break
+        for t in (0, 1):
+            diff = (-Qp[t] + pQp) / Q[t][t]
+            new_p = [p[0], p[1]]
+            new_p[t] = p[t] + diff
+            pQp_next = (pQp + diff * (diff * Q[t][t] + 2 * Qp[t])) / (1 + diff) / (1 + diff)
+            Qp_next = [(Qp[j] + diff * Q[t][j]) / (1 + diff) for j in (0, 1)]
+            new_p = [new_p[j] / (1 + diff) for j in (0, 1)]
+            # Rows that already converged keep their values
+            p = [np.where(active, new_p[j], p[j]) for j in (0, 1)]
+            Qp = [np.where(active, Qp_next[j], Qp[j]) for j in (0, 1)]
+            pQp = np.where(active, pQp_next, pQp)
+    return np.column_stack(p)
+
+
+class FlatRandomForest(FlatModel):
+    kind = 'random_forest'
+
+    def _leaves(self, X):
+        a = self.arrays
+        # Trees compare float32 features against float64 thresholds, as sklearn does
+        X = _as_2d(X).astype(np.float32)
+        rows = np.arange(len(X))[:, np.newaxis]
+        node = np.broadcast_to(a['roots'], (len(X), len(a['roots']))).copy()
+        for _ in range(self.params['max_depth']):
+            values = X[rows, a['feature'][node]]
+            # NaN fails every comparison; sklearn sends it to the side the split learned for it
+            go_left = (values <= a['threshold'][node]) | (np.isnan(values) & a['missing_go_to_left'][node])
+            node = np.where(go_left, a['left'][node], a['right'][node])
+        return node
+
+    def predict_proba(self, X):
+        values = self.arrays['value'][self._leaves(X)]  # (N, trees, classes)
+        proba = np.zeros((values.shape[0], values.shape[2]))
+        for t in range(values.shape[1]):
+            proba += values[:, t]
+        proba /= values.shape[1]
+        return proba
+
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+
+class FlatStandardScaler(FlatModel):
+    kind = 'standard_scaler'
+
+    def transform(self, X):
+        X = np.array(X, dtype=np.float64, ndmin=2)
+        if 'mean' in self.arrays:
+            X -= self.arrays['mean']
+        if 'scale' in self.arrays:
+            X /= self.arrays['scale']
+        return X
+
+
+class FlatSimpleImputer(FlatModel):
+    kind = 'simple_imputer'
+
+    def transform(self, X):
+        X = np.array(X, dtype=np.float64, ndmin=2)
+        missing = self.params['missing_values']
+        mask = np.isnan(X) if missing is None else (X == missing)
+        np.copyto(X, np.broadcast_to(self.arrays['statistics'], X.shape), where=mask)
+        keep = self.arrays.get('keep')
+        return X if keep is None else X[:, keep]
+
+
+KINDS = {cls.kind: cls for cls in (FlatLogisticRegression, FlatSVC, FlatRandomForest,
+                                    FlatStandardScaler, FlatSimpleImputer)}
+
+
+# --- exporters ------------------------------------------------------------
+
+def _classes(estimator):
+    return [c.item() if hasattr(c, 'item') else c for c in estimator.classes_]
+
+
+def _export_logistic_regression(m):
+    multi_class = getattr(m, 'multi_class', 'auto')
+    # Same rule as LogisticRegression.predict_proba
+    ovr = multi_class in ('ovr', 'warn') or (
+        multi_class in ('auto', 'deprecated') and (len(m.classes_) <= 2 or m.solver == 'liblinear'))
+    return 'logistic_regression', {'ovr': ovr, 'classes': _classes(m)}, {
+        'coef': np.asarray(m.coef_, dtype=np.float64),
+        'intercept': np.asarray(m.intercept_, dtype=np.float64),
+    }
+
+
+def _export_svc(m):
+    if len(m.classes_) != 2:
+        raise ValueError("only binary SVC models can be exported")
+    params = {'kernel': m.kernel, 'gamma': float(m._gamma), 'coef0': float(m.coef0),
+              'degree': int(m.degree), 'classes': _classes(m)}
+    arrays = {
+        # Public dual_coef_ / intercept_ already carry sklearn's binary sign flip
+        'dual_coef': np.asarray(m.dual_coef_, dtype=np.float64),
+        'intercept': np.asarray(m.intercept_, dtype=np.float64),
+    }
+    if m.kernel == 'linear':
+        arrays['coef'] = (arrays['dual_coef'] @ m.support_vectors_)[0]
+    elif m.kernel in ('rbf', 'poly', 'sigmoid'):
+        arrays['support_vectors'] = np.asarray(m.support_vectors_, dtype=np.float64)
+    else:
+        raise ValueError(f"SVC kernel {m.kernel!r} cannot be exported")
+    if getattr(m, 'probability', False):
+        arrays['probA'] = np.asarray(m.probA_, dtype=np.float64)
+        arrays['probB'] = np.asarray(m.probB_, dtype=np.float64)
+    return 'svc', params, arrays
+
+
+def _export_random_forest(m):
+    if getattr(m, 'n_outputs_', 1) != 1:
+        raise ValueError("only single-output forests can be exported")
+    parts = {'left': [], 'right': [], 'feature': [], 'threshold': [], 'missing_go_to_left': [], 'value': []}
+    roots, offset, max_depth = [], 0, 0
+    for estimator in m.estimators_:
+        tree = estimator.tree_
+        nodes = np.arange(tree.node_count)
+        leaf = tree.children_left == -1
+        # Leaves point at themselves so extra traversal steps are no-ops
+        parts['left'].append(np.where(leaf, nodes, tree.children_left) + offset)
+        parts['right'].append(np.where(leaf, nodes, tree.children_right) + offset)
+        parts['feature'].append(np.where(leaf, 0, tree.feature))
+        parts['threshold'].append(tree.threshold)
+        # Trees of sklearn < 1.3 have no missing-value routing: NaN goes right
+        parts['missing_go_to_left'].append(getattr(tree, 'missing_go_to_left', np.zeros(tree.node_count)))
+        value = tree.value[:, 0, :len(m.classes_)].astype(np.float64)
+        normalizer = value.sum(axis=1, keepdims=True)
+        normalizer[normalizer == 0] = 1.0
+        parts['value'].append(value / normalizer)
+        roots.append(offset)
+        offset += tree.node_count
+        max_depth = max(max_depth, tree.max_depth)
+    arrays = {name: np.concatenate(values) for name, values in parts.items()}
+    arrays['left'] = arrays['left'].astype(np.int64)
+    arrays['right'] = arrays['right'].astype(np.int64)
+    arrays['feature'] = arrays['feature'].astype(np.int64)
+    arrays['threshold'] = arrays['threshold'].astype(np.float64)
+    arrays['missing_go_to_left'] = arrays['missing_go_to_left'].astype(bool)
+    arrays['roots'] = np.asarray(roots, dtype=np.int64)
+    return 'random_forest', {'max_depth': int(max_depth), 'classes': _classes(m)}, arrays
+
+
+def _export_standard_scaler(m):
+    arrays = {}
+    if getattr(m, 'mean_', None) is not None and m.with_mean:
+        arrays['mean'] = np.asarray(m.mean_, dtype=np.float64)
+    if getattr(m, 'scale_', None) is not None and m.with_std:
+        arrays['scale'] = np.asarray(m.scale_, dtype=np.float64)
+    return 'standard_scaler', {}, arrays
+
+
+def _export_simple_imputer(m):
+    if getattr(m, 'add_indicator', False):
+        raise ValueError("SimpleImputers with add_indicator=True cannot be exported")
+    statistics = np.asarray(m.statistics_)
+    if statistics.dtype.kind not in 'biuf':
+        raise ValueError("only SimpleImputers with numeric statistics can be exported")
+    statistics = statistics.astype(np.float64)
+    if getattr(m, 'keep_empty_features', False):
+        # sklearn fills the columns that were empty during fit with 0
+        statistics[np.isnan(statistics)] = 0.0
+    missing = m.missing_values
+    missing = None if isinstance(missing, float) and np.isnan(missing) else float(missing)
+    arrays = {'statistics': statistics}
+    # sklearn drops columns whose statistic is NaN unless keep_empty_features is set
+    if np.isnan(statistics).any() and not getattr(m, 'keep_empty_features', False):
+        arrays['keep'] = np.flatnonzero(~np.isnan(statistics)).astype(np.int64)
+    return 'simple_imputer', {'missing_values': missing}, arrays
+
+
+EXPORTERS = {
+    'LogisticRegression': _export_logistic_regression,
+    'SVC': _export_svc,
+    'RandomForestClassifier': _export_random_forest,
+    'StandardScaler': _export_standard_scaler,
+    'SimpleImputer': _export_simple_imputer,
+}
+
+
+def export(estimator, path, source_path=None):
+    """Write a fitted estimator to ``path``.
+
+    ``source_path`` is the pickle the estimator was loaded from; its SHA-256
+    is recorded so ``load_model_file`` can tell whether the export is current.
+    Raises ``TypeError`` for an unsupported estimator class and ``ValueError``
+    for a supported one fitted with options the evaluators do not implement.
+    """
+    from common.model_registry import _file_sha256
+
+    name = type(estimator).__name__
+    if name not in EXPORTERS:
+        raise TypeError(f"{name} cannot be exported; supported: {', '.join(EXPORTERS)}")
+    kind, params, arrays = EXPORTERS[name](estimator)
+    params['n_features_in'] = int(getattr(estimator, 'n_features_in_', 0)) or None
+    params['source'] = name
+    params['source_sha256'] = _file_sha256(source_path) if source_path else None
+    write_flat(path, kind, params, arrays)
+
+
+def load(path):
+    """Open a flat model file (memory-mapped) and return its evaluator."""
+    kind, params, arrays = read_flat(path)
+    return KINDS[kind](params, arrays)
+
+
+def flat_path(model_path):
+    return model_path + SUFFIX
+
+
+_current = {}  # flat path -> ((flat stat, pickle stat), whether it was exported from that pickle)
+_current_lock = threading.Lock()
+
+
+def _stat_key(path):
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+def is_current(flat, path):
+    """True if ``flat`` records the SHA-256 of the pickle at ``path``.
+
+    The answer is remembered until either file's size or modification time
+    changes, so the pickle is hashed once per version rather than per call.
+    """
+    key = (_stat_key(flat), _stat_key(path))
+    cached = _current.get(flat)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    from common.model_registry import _file_sha256
+
+    with _current_lock:
+        recorded = read_header(flat)['params'].get('source_sha256')
+        current = recorded is not None and recorded == _file_sha256(path)
+        if not current:
+            logger.warning("%s was not exported from the current %s; loading the pickle (re-run "
+                           "`python -m common.flat_model export %s`)", flat, path, path)
+        _current[flat] = (key, current)
+        return current
+
+
+def load_model_file(path, loader='pickle'):
+    """Load ``path`` through the registry, preferring a ``.flat`` export of that exact pickle."""
+    from common.model_registry import load_artifact
+
+    flat = flat_path(path)
+    try:
+        if is_current(flat, path):
+            return load_artifact(flat, loader='flat')
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError) as e:
+        logger.warning("Ignoring unreadable %s: %s", flat, e)
+    return load_artifact(path, loader=loader)
+
+
+# --- command line ---------------------------------------------------------
+
+def _load_source(path):
+    from common.model_registry import LOADERS
+
+    # joblib reads plain pickles too, and some models (Alzheimer) are joblib dumps
+    try:
+        return LOADERS['joblib'](path)
+    except ImportError:
+        return LOADERS['pickle'](path)
+
+
+def _parse_categories(specs):
+    """``['Gender=Male:1,Female:0', ...]`` -> ``{'Gender': {'Male': 1.0, 'Female': 0.0}}``."""
+    categories = {}
+    for spec in specs or ():
+        column, sep, pairs = spec.partition('=')
+        try:
+            if not sep:
+                raise ValueError
+            categories[column] = {value: float(code) for value, code in
+                                  (pair.rsplit(':', 1) for pair in pairs.split(','))}
+        except ValueError:
+            raise ValueError(f"--map {spec!r}: expected COLUMN=VALUE:CODE,VALUE:CODE") from None
+    return categories
+
+
+def _read_inputs(csv_path, columns, categories):
+    """The CSV's ``columns`` (by header) as a float array; rows with an empty cell are skipped.
+
+    Returns ``(X, skipped rows)``; raises ``ValueError`` for a missing column,
+    a non-numeric value without a ``categories`` code, or no usable row.
+    """
+    import csv
+
+    with open(csv_path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.DictReader(f)
+        absent = [c for c in columns if c not in (reader.fieldnames or ())]
+        if absent:
+            raise ValueError(f"{csv_path} has no column {', '.join(map(repr, absent))}")
+        rows, skipped = [], 0
+        for line, record in enumerate(reader, start=2):
+            values = [record[c].strip() for c in columns]
+            if any(v in ('', '?') for v in values):
+                skipped += 1
+                continue
+            row = []
+            for column, value in zip(columns, values):
+                if column in categories:
+                    if value not in categories[column]:
+                        raise ValueError(f"{csv_path}:{line}: {column} value {value!r} has no code in --map")
+                    row.append(categories[column][value])
+                    continue
+                try:
+                    row.append(float(value))
+                except ValueError:
+                    raise ValueError(f"{csv_path}:{line}: {column} value {value!r} is not numeric; "
+                                     f"encode it with --map") from None
+            rows.append(row)
+    if not rows:
+        raise ValueError(f"{csv_path} has no complete row for the model's columns")
+    return np.asarray(rows), skipped
+
+
+def _verify(model_path, csv_path, flat=None, columns=None, categories=None):
+    """Compare the pickle and its flat export on the CSV's rows.
+
+    ``columns`` are the CSV headers in the model's input order (default: the
+    names the model was fitted with).
+    """
+    import time
+
+    original = _load_source(model_path)
+    start = time.perf_counter()
+    flat_model = load(flat or flat_path(model_path))
+    open_ms = (time.perf_counter() - start) * 1000
+
+    if columns is None:
+        names = getattr(original, 'feature_names_in_', None)
+        if names is None:
+            raise ValueError(f"{model_path} was fitted without column names; pass --columns or --columns-from")
+        columns = [str(name) for name in names]
+    if len(columns) != original.n_features_in_:
+        raise ValueError(f"{len(columns)} columns given, {model_path} expects {original.n_features_in_}")
+    X, skipped = _read_inputs(csv_path, columns, categories or {})
+
+    report = {'rows': len(X), 'skipped_rows': skipped, 'open_ms': open_ms}
+    for method in ('predict', 'predict_proba', 'transform'):
+        if not hasattr(original, method) or not hasattr(flat_model, method):
+            continue
+        expected, got = getattr(original, method)(X), getattr(flat_model, method)(X)
+        if method == 'predict':
+            report['predict_mismatches'] = int((np.asarray(expected) != got).sum())
+        else:
+            report[f'{method}_max_abs_diff'] = float(np.max(np.abs(np.asarray(expected) - got)))
+    return report
+
+
+def main(argv=None):
+    import argparse
+    import warnings
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+    export_cmd = commands.add_parser('export', help='write <model>.flat next to each pickled model')
+    export_cmd.add_argument('models', nargs='+')
+    verify_cmd = commands.add_parser('verify', help='compare a .flat export with its pickle on CSV rows')
+    verify_cmd.add_argument('model')
+    verify_cmd.add_argument('csv', help='CSV with a header row holding the model inputs')
+    verify_cmd.add_argument('--columns', help="comma-separated CSV columns in the model's input order "
+                                              "(default: the names the model was fitted with)")
+    verify_cmd.add_argument('--columns-from', metavar='MODEL',
+                            help='take the column names from another fitted estimator, e.g. the scaler in front')
+    verify_cmd.add_argument('--map', action='append', metavar='COLUMN=VALUE:CODE,...',
+                            help='numeric codes of a categorical column, e.g. Gender=Male:1,Female:0')
+    args = parser.parse_args(argv)
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if root not in sys.path:
+        sys.path.append(root)
+    warnings.filterwarnings('ignore', message='X does not have valid feature names')
+    if args.command == 'export':
+        for path in args.models:
+            export(_load_source(path), flat_path(path), source_path=path)
+            print(f"{path} -> {flat_path(path)} ({os.path.getsize(flat_path(path))} bytes)")
+        return 0
+
+    columns = args.columns.split(',') if args.columns else None
+    if args.columns_from:
+        columns = [str(name) for name in _load_source(args.columns_from).feature_names_in_]
+    try:
+        report = _verify(args.model, args.csv, columns=columns, categories=_parse_categories(args.map))
+    except ValueError as e:
+        parser.error(str(e))
+    print(json.dumps(report, indent=2))
+    return 1 if report.get('predict_mismatches') else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
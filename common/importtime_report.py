@@ -0,0 +1,129 @@
+"""Cold-start import-time report for the app entry points.
+
+Runs each entry script in a fresh interpreter under ``python -X importtime``
+(from the repository root, the way the apps are deployed) and aggregates the
+output per top-level package.  Streamlit runs in bare mode, so the script
+executes its default page the same way a first visitor would trigger it.
+
+    python -m common.importtime_report Pneumonia/app_v1.py heart/app.py
+    python -m common.importtime_report --all --json importtime.json
+    python -m common.importtime_report --all --baseline importtime.json
+
+With ``--baseline`` the exit status is 1 if any entry point's total import
+time grew by more than ``--threshold`` percent.
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENTRY_POINTS = [
+    'heart/app.py',
+    'diabetes/app.py',
+    'liver/app.py',
+    'parkinson/app.py',
+    'CKD12/app.py',
+    'BreastCancer/main.py',
+    'Alzheimer/streamlit_app.py',
+    'Pneumonia/app_v1.py',
+    'Malarial-Cell-Detection-main/main_app.py',
+    'host_app.py',
+]
+
+_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+
+def parse_importtime(stderr):
+    """Return ``{top_level_package: cumulative_us}`` and the overall total in microseconds."""
+    packages = {}
+    total = 0
+    for line in stderr.splitlines():
+        match = _LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        total += int(self_us)
+        # Only count top-level imports (no extra indentation) to avoid double counting
+        if len(indent) == 1:
+            top = name.split('.')[0]
+            packages[top] = packages.get(top, 0) + int(cumulative_us)
+    return packages, total
+
+
+def measure(entry, python=sys.executable):
+    script = os.path.join(ROOT, entry)
+    # Run the app as streamlit would: script directory first on sys.path, cwd at the repo root
+    code = (
+        "import runpy, sys; "
+        f"sys.path.insert(0, {os.path.dirname(script)!r}); "
+        f"runpy.run_path({script!r}, run_name='__main__')"
+    )
+    start = time.perf_counter()
+    proc = subprocess.run([python, '-X', 'importtime', '-c', code], cwd=ROOT,
+                          capture_output=True, text=True)
+    wall = time.perf_counter() - start
+    packages, total_us = parse_importtime(proc.stderr)
+    return {
+        'entry': entry,
+        'returncode': proc.returncode,
+        'wall_seconds': wall,
+        'import_seconds': total_us / 1e6,
+        'packages': {name: us / 1e6 for name, us in sorted(packages.items(), key=lambda kv: -kv[1])},
+    }
+
+
+def compare(results, baseline, threshold):
+    """Return a list of human-readable regressions against a previous report."""
+    previous = {r['entry']: r for r in baseline.get('results', [])}
+    regressions = []
+    for result in results:
+        old = previous.get(result['entry'])
+        if not old or not old['import_seconds']:
+            continue
+        change = 100.0 * (result['import_seconds'] - old['import_seconds']) / old['import_seconds']
+        if change > threshold:
+            regressions.append(f"{result['entry']}: {old['import_seconds']:.2f} s -> "
+                               f"{result['import_seconds']:.2f} s (+{change:.0f}%)")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('entries', nargs='*', help='entry scripts relative to the repository root')
+    parser.add_argument('--all', action='store_true', help='measure every app entry point')
+    parser.add_argument('--top', type=int, default=10, help='packages to list per entry point')
+    parser.add_argument('--json', help='write the report to this file')
+    parser.add_argument('--baseline', help='previous --json report to compare against')
+    parser.add_argument('--threshold', type=float, default=20.0, help='allowed growth in percent')
+    args = parser.parse_args(argv)
+
+    entries = ENTRY_POINTS if args.all or not args.entries else args.entries
+    results = []
+    for entry in entries:
+        result = measure(entry)
+        results.append(result)
+        status = '' if result['returncode'] == 0 else f" (exit {result['returncode']})"
+        print(f"{entry}: imports {result['import_seconds']:.2f} s, wall {result['wall_seconds']:.2f} s{status}")
+        for name, seconds in list(result['packages'].items())[:args.top]:
+            print(f"    {name:<30} {seconds * 1000:8.1f} ms")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'python': sys.version, 'results': results}, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
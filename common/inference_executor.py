@@ -0,0 +1,214 @@
+"""Shared, bounded executor for CNN ``model.predict`` calls.
+
+Every session used to call ``model.predict`` on its own thread, so a burst
+of uploads had all of them competing for the cores at once.  Model calls now
+go through one process-wide ``BoundedExecutor``:
+
+* at most ``max_concurrency`` calls run at the same time,
+* at most ``max_queue`` more wait for a slot; beyond that ``submit`` raises
+  ``Busy`` straight away, so the caller can answer "busy, retry" instead of
+  piling up work (internal callers that must not be rejected pass
+  ``block=True`` and wait for queue space),
+* ``run`` waits at most ``timeout`` seconds for the result and raises
+  ``InferenceTimeout`` otherwise,
+* ``stats()`` reports queue wait and run time percentiles and the counts of
+  rejected, timed-out and failed calls; ``longest_running()`` how long the
+  oldest running call has taken so far (a watchdog for stuck calls).
+
+    BCU_INFERENCE_CONCURRENCY   concurrent model calls (default 2)
+    BCU_INFERENCE_QUEUE         calls allowed to wait (default 32)
+    BCU_INFERENCE_TIMEOUT       seconds ``run`` waits for a result (default 60)
+
+A call that timed out is not interrupted (Python cannot stop a running
+``predict``); it still holds its slot until it finishes.
+"""
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from common import metrics
+
+logger = logging.getLogger(__name__)
+
+_DEFAULT = object()
+
+
+class Busy(RuntimeError):
+    """The executor's queue is full; the request should be retried later."""
+
+    def __init__(self, name, retry_after=1.0):
+        super().__init__(f"'{name}' inference is at capacity; retry in about {retry_after:.0f} s")
+        self.retry_after = retry_after
+
+
+class InferenceTimeout(TimeoutError):
+    pass
+
+
+def _env_number(name, default, cast):
+    value = os.environ.get(name)
+    return cast(value) if value else default
+
+
+def _summary(values):
+    recent = sorted(values)
+    if not recent:
+        return {'mean': None, 'p50': None, 'p95': None, 'p99': None, 'max': None}
+
+    def percentile(q):
+        return recent[min(len(recent) - 1, int(q / 100.0 * len(recent)))] * 1000
+
+    return {
+        'mean': sum(recent) / len(recent) * 1000,
+        'p50': percentile(50),
+        'p95': percentile(95),
+        'p99': percentile(99),
+        'max': recent[-1] * 1000,
+    }
+
+
+class BoundedExecutor:
+    """Thread pool with a concurrency limit, a queue-depth cap and per-call timeouts."""
+
+    def __init__(self, name='inference', max_concurrency=2, max_queue=32, timeout=60.0):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix=f'inference-{name}')
+        self._cond = threading.Condition()
+        self._pending = 0  # queued + running
+        self._running = 0
+        self._started = {}  # running call -> perf_counter() when it started
+        self._counts = {'submitted': 0, 'completed': 0, 'failed': 0, 'rejected': 0, 'timeouts': 0}
+        self._waits = deque(maxlen=2048)  # recent queue waits in seconds
+        self._runs = deque(maxlen=2048)  # recent run times in seconds
+
+    def submit(self, fn, *args, block=False):
+        """Queue ``fn(*args)``; returns a Future.  Raises ``Busy`` if the queue is full
+        (or waits for space with ``block=True``)."""
+        with self._cond:
+            while self._pending >= self.max_concurrency + self.max_queue:
+                if not block:
+                    self._counts['rejected'] += 1
+                    raise Busy(self.name)
+                self._cond.wait()
+            self._pending += 1
+            self._counts['submitted'] += 1
+        enqueued = time.perf_counter()
+
+        def task():
+            started = time.perf_counter()
+            token = object()
+            with self._cond:
+                self._running += 1
+                self._started[token] = started
+                self._waits.append(started - enqueued)
+            metrics.observe('bcu_executor_queue_wait_seconds', started - enqueued, executor=self.name)
+            ok = False
+            try:
+                result = fn(*args)
+                ok = True
+                return result
+            finally:
+                elapsed = time.perf_counter() - started
+                with self._cond:
+                    self._running -= 1
+                    del self._started[token]
+                    self._runs.append(elapsed)
+                    self._counts['completed' if ok else 'failed'] += 1
+                metrics.observe('bcu_executor_run_seconds', elapsed, executor=self.name)
+
+        future = self._pool.submit(task)
+        # Also runs for calls cancelled before they started
+        future.add_done_callback(self._release)
+        return future
+
+    def _release(self, future):
+        with self._cond:
+            self._pending -= 1
+            self._cond.notify()
+
+    def run(self, fn, *args, timeout=_DEFAULT, block=False):
+        """Run ``fn(*args)`` on the pool and return its result.
+
+        Raises ``Busy`` when the queue is full and ``InferenceTimeout`` if no
+        result arrived within ``timeout`` seconds (default: the executor's).
+        """
+        timeout = self.timeout if timeout is _DEFAULT else timeout
+        future = self.submit(fn, *args, block=block)
+        try:
+            return future.result(timeout)
+        except FutureTimeout:
+            future.cancel()  # only succeeds if it has not started yet
+            with self._cond:
+                self._counts['timeouts'] += 1
+            raise InferenceTimeout(f"'{self.name}' inference did not finish within {timeout:g} s") from None
+
+    def longest_running(self):
+        """Seconds the oldest call still running has taken so far (0.0 if none is running)."""
+        with self._cond:
+            oldest = min(self._started.values(), default=None)
+        return 0.0 if oldest is None else time.perf_counter() - oldest
+
+    def stats(self):
+        with self._cond:
+            stats = {
+                'name': self.name,
+                'max_concurrency': self.max_concurrency,
+                'max_queue': self.max_queue,
+                'timeout_seconds': self.timeout,
+                'running': self._running,
+                'queued': self._pending - self._running,
+                'queue_wait_ms': _summary(self._waits),
+                'run_ms': _summary(self._runs),
+            }
+            stats.update(self._counts)
+            return stats
+
+
+_executors = {}
+_executors_lock = threading.Lock()
+
+
+def _reset_after_fork():
+    # Pool threads do not survive fork(); a forked child starts its own executors
+    global _executors_lock
+    _executors.clear()
+    _executors_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def get_executor(name='cnn'):
+    """Process-wide executor ``name``, configured from the environment on first use."""
+    with _executors_lock:
+        executor = _executors.get(name)
+        if executor is None:
+            executor = _executors[name] = BoundedExecutor(
+                name,
+                max_concurrency=_env_number('BCU_INFERENCE_CONCURRENCY', 2, int),
+                max_queue=_env_number('BCU_INFERENCE_QUEUE', 32, int),
+                timeout=_env_number('BCU_INFERENCE_TIMEOUT', 60.0, float),
+            )
+            logger.info("Inference executor %s: %d concurrent, queue %d, timeout %.0f s",
+                        name, executor.max_concurrency, executor.max_queue, executor.timeout)
+        return executor
+
+
+def longest_running():
+    """``longest_running()`` over every executor of this process."""
+    with _executors_lock:
+        executors = list(_executors.values())
+    return max((executor.longest_running() for executor in executors), default=0.0)
+
+
+def executor_stats():
+    with _executors_lock:
+        executors = list(_executors.values())
+    return {executor.name: executor.stats() for executor in executors}
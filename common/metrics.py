@@ -0,0 +1,297 @@
+"""Process-wide Prometheus metrics for the apps and the inference service.
+
+Recording is meant for the hot path: ``inc`` and ``observe`` only touch a
+per-thread shard (plain dicts, no lock), and the shards are merged when the
+metrics are scraped.  Shards of threads that have ended (Streamlit runs each
+script execution on a fresh thread) are folded into the process totals at
+the next scrape or when a new thread records its first sample.
+
+    metrics.inc('bcu_predictions_total', model='heart', outcome='ok')
+    metrics.observe('bcu_stage_duration_seconds', 0.012, model='heart', stage='inference')
+
+Every ``Trace`` records its outcome and stage timings here, so the apps need
+no calls of their own.  At scrape time the model registry, the prediction
+caches, the micro-batchers, the inference executors and the warm-up status
+are read as well, for the modules the process has imported.
+
+    GET /metrics   Prometheus text format, served by the sidecar next to
+                   Streamlit and by the inference service
+
+``BCU_METRICS=off`` turns recording into a no-op (``/metrics`` still reports
+the collected gauges).  With ``service.prefork`` each worker reports its own
+numbers; the CNN models' inference-stage timings stay in the CNN process,
+which has no HTTP port of its own, so only their request counts and
+latencies appear there.
+"""
+import bisect
+import os
+import sys
+import threading
+
+from common import sidecar
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Latency buckets in seconds, from sub-millisecond tabular predictions to slow CNN loads
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+DESCRIPTIONS = {
+    'bcu_predictions_total': ('counter', 'Predictions by model and outcome (ok, error, busy, timeout, invalid)'),
+    'bcu_request_duration_seconds': ('histogram', 'End-to-end time of one prediction request'),
+    'bcu_stage_duration_seconds': ('histogram', 'Time spent in one stage (decode, preprocess, inference, ...)'),
+    'bcu_model_load_duration_seconds': ('histogram', 'Time to load a model artifact from disk'),
+    'bcu_executor_queue_wait_seconds': ('histogram', 'Time a model call waited for an inference executor slot'),
+    'bcu_executor_run_seconds': ('histogram', 'Time a model call ran on the inference executor'),
+}
+
+
+def enabled():
+    return os.environ.get('BCU_METRICS', '').strip().lower() not in ('off', 'false', 'no', '0')
+
+
+class _Shard:
+    """One thread's unmerged samples; only that thread writes to it."""
+
+    def __init__(self, thread):
+        self.thread = thread
+        self.counters = {}
+        self.histograms = {}
+
+
+_lock = threading.Lock()
+_local = threading.local()
+_shards = []
+_counters = {}  # merged samples of finished threads: (name, labels) -> value
+_histograms = {}  # (name, labels) -> [count per bucket..., sum, count]
+_collectors = []
+_state = {'enabled': enabled()}
+
+
+def _fold_finished():
+    # Caller holds _lock.  A finished thread can no longer write to its shard.
+    live = []
+    for shard in _shards:
+        if shard.thread.is_alive():
+            live.append(shard)
+        else:
+            _merge(shard.counters, shard.histograms, _counters, _histograms)
+    _shards[:] = live
+
+
+def _shard():
+    shard = getattr(_local, 'shard', None)
+    if shard is None:
+        shard = _local.shard = _Shard(threading.current_thread())
+        with _lock:
+            _fold_finished()
+            _shards.append(shard)
+    return shard
+
+
+def _merge(counters, histograms, into_counters, into_histograms):
+    for key, value in list(counters.items()):
+        into_counters[key] = into_counters.get(key, 0) + value
+    for key, values in list(histograms.items()):
+        values = list(values)  # the owning thread may still be adding to it
+        total = into_histograms.get(key)
+        if total is None:
+            into_histograms[key] = values
+        else:
+            for i, value in enumerate(values):
+                total[i] += value
+
+
+def inc(name, value=1, **labels):
+    """Add ``value`` to the counter ``name`` with the given labels."""
+    if not _state['enabled']:
+        return
+    counters = _shard().counters
+    key = (name, tuple(sorted(labels.items())))
+    counters[key] = counters.get(key, 0) + value
+
+
+def observe(name, seconds, **labels):
+    """Record one duration (or other value) in the histogram ``name``."""
+    if not _state['enabled']:
+        return
+    histograms = _shard().histograms
+    key = (name, tuple(sorted(labels.items())))
+    values = histograms.get(key)
+    if values is None:
+        values = histograms[key] = [0] * (len(DEFAULT_BUCKETS) + 3)
+    values[bisect.bisect_left(DEFAULT_BUCKETS, seconds)] += 1
+    values[-2] += seconds
+    values[-1] += 1
+
+
+def register_collector(collect):
+    """Call ``collect()`` on every scrape; it yields ``(name, type, help, [(labels, value), ...])``."""
+    with _lock:
+        _collectors.append(collect)
+
+
+def snapshot():
+    """Merged counters and histograms of every thread (keyed by ``(name, labels)``) and the collectors."""
+    with _lock:
+        _fold_finished()
+        counters, histograms = {}, {}
+        _merge(_counters, _histograms, counters, histograms)
+        for shard in _shards:
+            _merge(shard.counters, shard.histograms, counters, histograms)
+        collectors = list(_collectors)
+    return counters, histograms, collectors
+
+
+# --- exposition -----------------------------------------------------------
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _labels(pairs):
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in pairs) + '}'
+
+
+def _number(value):
+    if value is None:
+        return 'NaN'
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _header(lines, name, kind, help_text):
+    lines.append(f'# HELP {name} {help_text}')
+    lines.append(f'# TYPE {name} {kind}')
+
+
+def render():
+    """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+    counters, histograms, collectors = snapshot()
+    lines = []
+
+    by_name = {}
+    for (name, labels), value in counters.items():
+        by_name.setdefault(name, []).append((labels, value))
+    for name in sorted(by_name):
+        _header(lines, name, 'counter', DESCRIPTIONS.get(name, ('', name))[1])
+        for labels, value in sorted(by_name[name]):
+            lines.append(f'{name}{_labels(labels)} {_number(value)}')
+
+    by_name = {}
+    for (name, labels), values in histograms.items():
+        by_name.setdefault(name, []).append((labels, values))
+    for name in sorted(by_name):
+        _header(lines, name, 'histogram', DESCRIPTIONS.get(name, ('', name))[1])
+        for labels, values in sorted(by_name[name]):
+            cumulative = 0
+            for bound, count in zip(DEFAULT_BUCKETS + ('+Inf',), values):
+                cumulative += count
+                lines.append(f'{name}_bucket{_labels(labels + (("le", bound),))} {cumulative}')
+            lines.append(f'{name}_sum{_labels(labels)} {_number(float(values[-2]))}')
+            lines.append(f'{name}_count{_labels(labels)} {values[-1]}')
+
+    for collect in collectors:
+        for name, kind, help_text, samples in collect():
+            _header(lines, name, kind, help_text)
+            for labels, value in samples:
+                lines.append(f'{name}{_labels(tuple(sorted(labels.items())))} {_number(value)}')
+    return '\n'.join(lines) + '\n'
+
+
+# --- gauges read at scrape time ---------------------------------------------
+
+def _process():
+    from common.model_registry import _current_rss
+
+    rss = _current_rss()
+    if rss is not None:
+        yield 'process_resident_memory_bytes', 'gauge', 'Resident set size of this process', [({}, rss)]
+    yield 'bcu_threads', 'gauge', 'Live threads in this process', [({}, threading.active_count())]
+
+
+def _registry():
+    module = sys.modules.get('common.model_registry')
+    if module is None:
+        return
+    stats = module.model_stats()
+    labels = [{'path': os.path.relpath(s['path'], ROOT), 'loader': s['loader']} for s in stats]
+    yield 'bcu_model_load_seconds', 'gauge', 'Duration of the last load of each model artifact', \
+        [(l, s['load_seconds']) for l, s in zip(labels, stats)]
+    yield 'bcu_model_loads_total', 'counter', 'Times each model artifact was (re)loaded', \
+        [(l, s['loads']) for l, s in zip(labels, stats)]
+    yield 'bcu_model_size_bytes', 'gauge', 'Size of each loaded model artifact on disk', \
+        [(l, s['size_bytes']) for l, s in zip(labels, stats)]
+
+
+def _caches():
+    module = sys.modules.get('common.prediction_cache')
+    if module is None:
+        return
+    stats = {'upload': module.upload_cache.stats(), 'tabular': module.tabular_cache.stats()}
+    for field, kind, help_text in (('hits', 'counter', 'Prediction cache hits'),
+                                   ('misses', 'counter', 'Prediction cache misses'),
+                                   ('evictions', 'counter', 'Entries evicted to stay under the size limit'),
+                                   ('entries', 'gauge', 'Entries currently cached'),
+                                   ('hit_ratio', 'gauge', 'Hits / lookups since start')):
+        name = f'bcu_cache_{field}' + ('_total' if kind == 'counter' else '')
+        yield name, kind, help_text, [({'cache': cache}, s[field]) for cache, s in stats.items()]
+
+
+def _batchers():
+    module = sys.modules.get('common.micro_batcher')
+    if module is None:
+        return
+    stats = module.batcher_stats()
+    for field, name, kind, help_text in (
+            ('requests', 'bcu_batcher_requests_total', 'counter', 'Inputs scored through the micro-batcher'),
+            ('batches', 'bcu_batcher_batches_total', 'counter', 'Batched model calls'),
+            ('failed_batches', 'bcu_batcher_failed_batches_total', 'counter', 'Batched model calls that raised'),
+            ('rejected', 'bcu_batcher_rejected_total', 'counter', 'Inputs turned away with a full queue'),
+            ('timeouts', 'bcu_batcher_timeouts_total', 'counter', 'Inputs whose caller stopped waiting'),
+            ('mean_batch_size', 'bcu_batcher_mean_batch_size', 'gauge', 'Mean inputs per batched call'),
+            ('queued', 'bcu_batcher_queued', 'gauge', 'Inputs waiting to be batched')):
+        yield name, kind, help_text, [({'model': model}, s[field]) for model, s in stats.items()]
+
+
+def _executors():
+    module = sys.modules.get('common.inference_executor')
+    if module is None:
+        return
+    stats = module.executor_stats()
+    for field, kind, help_text in (('submitted', 'counter', 'Model calls accepted by the executor'),
+                                   ('completed', 'counter', 'Model calls that returned'),
+                                   ('failed', 'counter', 'Model calls that raised'),
+                                   ('rejected', 'counter', 'Model calls turned away as busy'),
+                                   ('timeouts', 'counter', 'Model calls whose caller stopped waiting'),
+                                   ('running', 'gauge', 'Model calls running now'),
+                                   ('queued', 'gauge', 'Model calls waiting for a slot')):
+        name = f'bcu_executor_{field}' + ('_total' if kind == 'counter' else '')
+        yield name, kind, help_text, [({'executor': executor}, s[field]) for executor, s in stats.items()]
+
+
+def _readiness():
+    module = sys.modules.get('common.readiness')
+    if module is None:
+        return
+    models = module.status()['models']
+    yield 'bcu_model_ready', 'gauge', '1 once the model is loaded and warmed, else 0', \
+        [({'model': model}, fields['status'] == 'ready') for model, fields in models.items()]
+    yield 'bcu_model_warm_latency_seconds', 'gauge', 'Inference latency measured during warm-up', \
+        [({'model': model}, fields['warm_latency_ms'] / 1000) for model, fields in models.items()
+         if fields.get('warm_latency_ms') is not None]
+
+
+for _collect in (_process, _registry, _caches, _batchers, _executors, _readiness):
+    register_collector(_collect)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _serve_metrics(request, path):
+    return 200, {'Content-Type': CONTENT_TYPE, 'Cache-Control': 'no-store'}, render().encode()
+
+
+sidecar.register('/metrics', _serve_metrics)
@@ -0,0 +1,223 @@
+"""Cross-session micro-batching for the CNN models.
+
+Each Streamlit session used to call ``model.predict`` on a batch of one.  A
+``MicroBatcher`` queues single inputs from every thread in the process and a
+worker thread coalesces them: it waits at most ``max_wait`` seconds after the
+first queued input (or until ``max_batch`` inputs are queued), runs one
+``predict`` on the stacked batch and hands each caller its own row.
+
+    batcher = get_batcher('pneumonia', model)
+    scores = batcher.submit(image)     # blocks until the batch containing it ran
+    scores = await batcher.asubmit(image)   # the same from asyncio code
+
+``BCU_BATCH_MAX_WAIT_MS`` (default 10) and ``BCU_BATCH_MAX_SIZE`` (default
+per model) override the settings.  ``batcher_stats()`` reports the batch
+size distribution and queueing delay per model.
+
+The batched ``predict`` calls run on the shared ``inference_executor``, so
+they count against the process-wide CNN concurrency limit.  At most
+``BCU_BATCH_MAX_QUEUE`` inputs (default 4 batches) may wait in a batcher;
+``submit`` raises ``Busy`` beyond that and ``InferenceTimeout`` when no
+result arrived within the executor's timeout.
+"""
+import asyncio
+import logging
+import os
+import queue
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+import numpy as np
+
+from common.inference_executor import Busy, InferenceTimeout, get_executor
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+def _env_number(name, default, cast):
+    value = os.environ.get(name)
+    return cast(value) if value else default
+
+
+class MicroBatcher:
+    """Coalesces single-input ``submit`` calls into batched ``predict_batch`` calls."""
+
+    def __init__(self, predict_batch, name='model', max_batch=32, max_wait=0.010, max_queue=None):
+        self.predict_batch = predict_batch
+        self.name = name
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.max_queue = 4 * max_batch if max_queue is None else max_queue
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._batch_sizes = Counter()
+        self._delays = deque(maxlen=2048)  # recent queueing delays in seconds
+        self._delay_total = 0.0
+        self._delay_max = 0.0
+        self._requests = 0
+        self._failures = 0
+        self._rejected = 0
+        self._timeouts = 0
+        self._thread = threading.Thread(target=self._run, name=f'batcher-{name}', daemon=True)
+        self._thread.start()
+
+    def submit(self, x, timeout=None):
+        """Queue one input (without a batch axis) and return its row of the model output.
+
+        Raises ``Busy`` when the queue is full and ``InferenceTimeout`` after
+        ``timeout`` seconds (default: the inference executor's timeout).
+        """
+        future = self.submit_async(x)
+        timeout = get_executor().timeout if timeout is None else timeout
+        try:
+            return future.result(timeout)
+        except FutureTimeout:
+            with self._lock:
+                self._timeouts += 1
+            raise InferenceTimeout(f"'{self.name}' prediction did not finish within {timeout:g} s") from None
+
+    async def asubmit(self, x, timeout=None):
+        """``submit`` for coroutines: awaits the result instead of blocking the thread."""
+        future = asyncio.wrap_future(self.submit_async(x))
+        timeout = get_executor().timeout if timeout is None else timeout
+        try:
+            # shield: a cancelled wait must not cancel the future the worker will resolve
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self._timeouts += 1
+            raise InferenceTimeout(f"'{self.name}' prediction did not finish within {timeout:g} s") from None
+
+    def submit_async(self, x):
+        if self._queue.qsize() >= self.max_queue:
+            with self._lock:
+                self._rejected += 1
+            raise Busy(self.name)
+        future = Future()
+        self._queue.put((np.asarray(x), time.perf_counter(), future))
+        return future
+
+    def _collect(self):
+        first = self._queue.get()
+        if first is _STOP:
+            return None
+        items = [first]
+        deadline = first[1] + self.max_wait
+        while len(items) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                self._queue.put(_STOP)
+                break
+            items.append(item)
+        return items
+
+    def _run(self):
+        while True:
+            items = self._collect()
+            if items is None:
+                return
+            started = time.perf_counter()
+            self._record(len(items), [started - enqueued for _, enqueued, _ in items])
+            try:
+                outputs = self.predict_batch(np.stack([x for x, _, _ in items]))
+            except BaseException as e:
+                with self._lock:
+                    self._failures += 1
+                for _, _, future in items:
+                    future.set_exception(e)
+                continue
+            for i, (_, _, future) in enumerate(items):
+                future.set_result(outputs[i])
+
+    def _record(self, size, delays):
+        with self._lock:
+            self._batch_sizes[size] += 1
+            self._requests += size
+            self._delays.extend(delays)
+            self._delay_total += sum(delays)
+            self._delay_max = max(self._delay_max, max(delays))
+
+    def stats(self):
+        with self._lock:
+            recent = sorted(self._delays)
+            batches = sum(self._batch_sizes.values())
+
+            def percentile(q):
+                return recent[min(len(recent) - 1, int(q / 100.0 * len(recent)))] * 1000 if recent else None
+
+            return {
+                'model': self.name,
+                'max_batch': self.max_batch,
+                'max_wait_ms': self.max_wait * 1000,
+                'requests': self._requests,
+                'batches': batches,
+                'failed_batches': self._failures,
+                'rejected': self._rejected,
+                'timeouts': self._timeouts,
+                'mean_batch_size': self._requests / batches if batches else 0.0,
+                'batch_sizes': dict(sorted(self._batch_sizes.items())),
+                'queue_delay_ms': {
+                    'mean': self._delay_total / self._requests * 1000 if self._requests else None,
+                    'p50': percentile(50),
+                    'p95': percentile(95),
+                    'p99': percentile(99),
+                    'max': self._delay_max * 1000,
+                },
+                'queued': self._queue.qsize(),
+                'max_queue': self.max_queue,
+            }
+
+    def close(self):
+        """Stop the worker after the inputs already queued have been served."""
+        self._queue.put(_STOP)
+
+
+_batchers = {}
+_batchers_lock = threading.Lock()
+
+
+def _reset_after_fork():
+    # Worker threads do not survive fork(); a forked child starts its own batchers
+    global _batchers_lock
+    _batchers.clear()
+    _batchers_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def get_batcher(name, model, max_batch=32, max_wait=0.010):
+    """Process-wide batcher for ``model``; a reloaded model gets a fresh batcher."""
+    with _batchers_lock:
+        entry = _batchers.get(name)
+        if entry is None or entry[0] is not model:
+            if entry is not None:
+                entry[1].close()
+            max_batch = _env_number('BCU_BATCH_MAX_SIZE', max_batch, int)
+            batcher = MicroBatcher(
+                # Wait for a slot rather than fail a whole batch of admitted requests
+                lambda batch: get_executor().run(lambda: model.predict(batch, verbose=0), timeout=None, block=True),
+                name=name,
+                max_batch=max_batch,
+                max_wait=_env_number('BCU_BATCH_MAX_WAIT_MS', max_wait * 1000, float) / 1000,
+                max_queue=_env_number('BCU_BATCH_MAX_QUEUE', 4 * max_batch, int),
+            )
+            entry = _batchers[name] = (model, batcher)
+            logger.info("Micro-batcher for %s: max batch %d, max wait %.1f ms",
+                        name, batcher.max_batch, batcher.max_wait * 1000)
+        return entry[1]
+
+
+def batcher_stats():
+    with _batchers_lock:
+        batchers = [batcher for _, batcher in _batchers.values()]
+    return {batcher.name: batcher.stats() for batcher in batchers}
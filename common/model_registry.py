@@ -0,0 +1,179 @@
+"""Process-wide registry of loaded model artifacts.
+
+Streamlit re-executes an app script on every widget interaction, but imported
+modules stay in ``sys.modules`` for the life of the server process.  Keeping the
+loaded models here means every session shares one instance of each artifact and
+the pickle / joblib / Keras file is only read again when it changes on disk.
+"""
+import hashlib
+import logging
+import os
+import pickle
+import threading
+import time
+
+from common import metrics
+
+logger = logging.getLogger(__name__)
+
+
+# Functions that turn a file path into a live object
+def _load_pickle(path):
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+def _load_joblib(path):
+    import joblib
+    return joblib.load(path)
+
+
+def _load_keras(path):
+    import tensorflow as tf
+    return tf.keras.models.load_model(path)
+
+
+def _load_flat(path):
+    from common.flat_model import load
+    return load(path)
+
+
+LOADERS = {
+    'pickle': _load_pickle,
+    'joblib': _load_joblib,
+    'keras': _load_keras,
+    'flat': _load_flat,
+}
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _current_rss():
+    # Resident set size in bytes, or None where /proc is not available
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class _Entry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.obj = None
+        self.loader = None
+        self.mtime = None
+        self.size = None
+        self.sha256 = None
+        self.load_seconds = None
+        self.rss_delta = None
+        self.loads = 0
+
+
+class ModelRegistry:
+    """Loads each artifact once and hands the same object to every caller.
+
+    A cheap ``os.stat`` runs on every lookup.  If the modification time or size
+    changed, the file is hashed and only reloaded when the SHA-256 differs, so
+    touching a file without changing it does not throw away a warm model.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def _entry(self, path):
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None:
+                entry = self._entries[path] = _Entry()
+            return entry
+
+    def get(self, path, loader='pickle'):
+        path = os.path.abspath(path)
+        if loader not in LOADERS:
+            raise ValueError(f"Unknown loader '{loader}', expected one of {sorted(LOADERS)}")
+
+        entry = self._entry(path)
+        st = os.stat(path)
+        if entry.obj is not None and entry.loader == loader \
+                and (st.st_mtime_ns, st.st_size) == (entry.mtime, entry.size):
+            return entry.obj
+
+        with entry.lock:
+            # Another session may have finished the load while we waited
+            st = os.stat(path)
+            if entry.obj is not None and entry.loader == loader \
+                    and (st.st_mtime_ns, st.st_size) == (entry.mtime, entry.size):
+                return entry.obj
+
+            sha256 = _file_sha256(path)
+            if entry.obj is not None and entry.loader == loader and sha256 == entry.sha256:
+                entry.mtime, entry.size = st.st_mtime_ns, st.st_size
+                return entry.obj
+
+            rss_before = _current_rss()
+            start = time.perf_counter()
+            obj = LOADERS[loader](path)
+            elapsed = time.perf_counter() - start
+            rss_after = _current_rss()
+
+            entry.obj = obj
+            entry.loader = loader
+            entry.mtime, entry.size = st.st_mtime_ns, st.st_size
+            entry.sha256 = sha256
+            entry.load_seconds = elapsed
+            entry.rss_delta = None if rss_before is None else rss_after - rss_before
+            entry.loads += 1
+            metrics.observe('bcu_model_load_duration_seconds', elapsed, loader=loader)
+            logger.info("Loaded %s with %s in %.3f s (RSS %+d bytes)",
+                        path, loader, elapsed, entry.rss_delta or 0)
+            return obj
+
+    def is_loaded(self, path):
+        entry = self._entries.get(os.path.abspath(path))
+        return entry is not None and entry.obj is not None
+
+    def version(self, path):
+        """SHA-256 of the artifact currently loaded from ``path`` (None if not loaded)."""
+        entry = self._entries.get(os.path.abspath(path))
+        return entry.sha256 if entry is not None else None
+
+    def stats(self):
+        """Return one dict per loaded artifact with its load time and memory cost."""
+        with self._lock:
+            items = list(self._entries.items())
+        return [
+            {
+                'path': path,
+                'loader': entry.loader,
+                'sha256': entry.sha256,
+                'size_bytes': entry.size,
+                'load_seconds': entry.load_seconds,
+                'rss_delta_bytes': entry.rss_delta,
+                'loads': entry.loads,
+            }
+            for path, entry in items if entry.obj is not None
+        ]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+registry = ModelRegistry()
+
+
+def load_artifact(path, loader='pickle'):
+    """Return the shared, already-loaded object stored at ``path``."""
+    return registry.get(path, loader)
+
+
+def model_stats():
+    return registry.stats()
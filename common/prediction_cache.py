@@ -0,0 +1,129 @@
+"""Bounded LRU caches for predictions.
+
+``st.file_uploader`` keeps the uploaded file across reruns, so every widget
+interaction used to decode, resize and run the CNN on the same bytes again.
+Upload entries are keyed on the SHA-256 of the uploaded bytes plus the model
+version (the SHA-256 of the model file), so a new model never serves stale
+scores.
+
+The tabular apps ran ``model.predict`` on every button press, including
+repeated clicks and the forms' default values.  ``cached_predict`` memoizes
+single-row predictions on (model version, canonical feature vector) with a
+TTL, so identical inputs never reach the model twice.
+"""
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from common.model_registry import registry
+
+
+class LRUCache:
+    """Thread-safe LRU cache with hit / miss / eviction counters.
+
+    With ``ttl`` (seconds) entries also expire; expired entries count as
+    misses and as ``expirations``, not evictions.
+    """
+
+    def __init__(self, max_entries=64, ttl=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (value, expiry time or None)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value, expires = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            if expires is not None and time.monotonic() >= expires:
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        expires = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, key, compute):
+        """Return the cached value for ``key``, calling ``compute()`` on a miss."""
+        sentinel = object()
+        value = self.get(key, sentinel)
+        if value is sentinel:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def __len__(self):
+        return len(self._data)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._data),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+            }
+
+
+def content_key(data, model_version, namespace=''):
+    """Cache key for ``data`` (bytes) scored by the model identified by ``model_version``."""
+    return (namespace, hashlib.sha256(data).hexdigest(), model_version)
+
+
+def _canonical(value):
+    # 63, 63.0, "63" and numpy scalars all give the same key; -0.0 becomes 0.0
+    if isinstance(value, str):
+        try:
+            value = float(value)
+        except ValueError:
+            return value
+    value = float(value)
+    if math.isnan(value):
+        return 'nan'
+    return value + 0.0
+
+
+def feature_key(features, model_version, namespace=''):
+    """Cache key for one feature vector scored by the model identified by ``model_version``."""
+    return (namespace, model_version, tuple(_canonical(v) for v in features))
+
+
+def cached_predict(model, model_path, features, namespace=''):
+    """``model.predict([features])[0]``, memoized in ``tabular_cache``."""
+    key = feature_key(features, registry.version(model_path), namespace)
+    return tabular_cache.get_or_compute(key, lambda: model.predict([list(features)])[0])
+
+
+# Shared by every app in the process that scores uploaded images
+upload_cache = LRUCache(max_entries=64)
+
+# Single-row predictions of the tabular models; a row is tiny, so keep many
+tabular_cache = LRUCache(max_entries=4096, ttl=3600)
@@ -0,0 +1,239 @@
+"""Opt-in profiling of Streamlit script reruns.
+
+Each app calls ``profile_rerun('<app>')`` at the top of its script.  With
+profiling off (the default) that is a single check and returns.  With
+``BCU_PROFILE`` set, a sampler thread records the calling thread's stack
+every few milliseconds (wall clock, so time spent waiting on a model call
+shows up too) from the script's own frame down, until that frame is gone,
+i.e. the rerun finished or was interrupted by the next one.  ``tracemalloc``
+snapshots taken at the start and end of the rerun give the source lines that
+allocated the most memory in between (the start snapshot is taken on the
+script's thread before sampling begins, so it is not part of the profile).
+
+Per rerun, two files are written:
+
+    <stem>.collapsed   collapsed stacks ("frame;frame;frame count"), ready for
+                       flamegraph.pl, speedscope or inferno
+    <stem>.alloc.txt   wall time, sample count and the top allocating lines
+
+    BCU_PROFILE           off (default), all, or a comma-separated list of apps
+    BCU_PROFILE_DIR       output directory (default: profiles/ at the repository root)
+    BCU_PROFILE_KEEP      reruns kept in the directory, oldest removed first (default 200)
+    BCU_PROFILE_INTERVAL  sampling interval in milliseconds (default 5)
+    BCU_PROFILE_MEMORY    set to off to skip tracemalloc, which slows allocation-heavy code
+
+tracemalloc counts allocations of every thread, so with concurrent sessions
+a rerun's allocation report includes the other sessions' work.
+
+``python -m common.profiling [--app NAME]`` merges the collected profiles
+and prints the functions with the largest share of samples.
+"""
+import argparse
+import itertools
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_PROFILE_DIR = os.path.join(ROOT, 'profiles')
+TOP_ALLOCATORS = 25
+
+
+def _configured():
+    value = os.environ.get('BCU_PROFILE', '').strip().lower()
+    if value in ('', 'off', 'false', 'no', '0'):
+        return None
+    if value in ('all', 'on', 'true', 'yes', '1'):
+        return 'all'
+    return {name.strip() for name in value.split(',')}
+
+
+def _env_number(name, default, cast):
+    value = os.environ.get(name)
+    return cast(value) if value else default
+
+
+def profile_dir():
+    return os.environ.get('BCU_PROFILE_DIR') or DEFAULT_PROFILE_DIR
+
+
+# Read once: with profiling off, profile_rerun must cost nothing
+_apps = _configured()
+_sequence = itertools.count(1)
+_active = set()  # threads with a rerun being profiled (idents are reused, Thread objects are not)
+_lock = threading.Lock()
+
+
+def profile_rerun(app):
+    """Profile the rest of the calling script's execution, if ``app`` is selected by ``BCU_PROFILE``."""
+    if _apps is None or (_apps != 'all' and app not in _apps):
+        return
+    thread = threading.current_thread()
+    with _lock:
+        # Already profiled, e.g. a page of host_app.py that another page embeds
+        if thread in _active:
+            return
+        _active.add(thread)
+    profile = _RerunProfile(app, thread, sys._getframe(1))
+    threading.Thread(target=profile.run, name=f'profile-{app}', daemon=True).start()
+
+
+def _frame_name(code):
+    path = code.co_filename
+    if path.startswith(ROOT + os.sep):
+        path = os.path.relpath(path, ROOT)
+    else:
+        # Library frames: keep the package-relative part of site-packages paths
+        head, sep, tail = path.rpartition('site-packages' + os.sep)
+        path = tail if sep else os.path.basename(path)
+    return f"{code.co_name} ({path})".replace(';', ':')
+
+
+class _RerunProfile:
+    def __init__(self, app, thread, root):
+        self.app = app
+        self.thread = thread
+        self.root = root
+        self.interval = _env_number('BCU_PROFILE_INTERVAL', 5.0, float) / 1000
+        self.before = None
+        if os.environ.get('BCU_PROFILE_MEMORY', '').strip().lower() not in ('off', 'false', 'no', '0'):
+            import tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            self.before = tracemalloc.take_snapshot()
+        self.stem = '{}-{:03d}-{}-{}-{}'.format(time.strftime('%Y%m%d-%H%M%S'), int(time.time() * 1000) % 1000,
+                                               app, os.getpid(), next(_sequence))
+
+    def _stack(self):
+        """Code objects from the script frame down to the running one, or None once the script frame is gone."""
+        frame = sys._current_frames().get(self.thread.ident)
+        stack = []
+        while frame is not None:
+            stack.append(frame.f_code)
+            if frame is self.root:
+                stack.reverse()
+                return tuple(stack)
+            frame = frame.f_back
+        return None
+
+    def run(self):
+        try:
+            samples = Counter()
+            start = time.perf_counter()
+            while True:
+                stack = self._stack()
+                if stack is None:
+                    break
+                samples[stack] += 1
+                time.sleep(self.interval)
+            wall = time.perf_counter() - start
+            self.root = None  # do not keep the finished script's globals alive
+
+            allocations = None
+            if self.before is not None:
+                allocations = _top_allocations(self.before)
+                self.before = None
+            self._write(samples, wall, allocations)
+        except Exception:
+            logger.exception("Profiling a %s rerun failed", self.app)
+        finally:
+            with _lock:
+                _active.discard(self.thread)
+
+    def _write(self, samples, wall, allocations):
+        directory = profile_dir()
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, self.stem)
+
+        lines = {}
+        for stack, count in samples.items():
+            line = ';'.join(_frame_name(code) for code in stack)
+            lines[line] = lines.get(line, 0) + count
+        with open(path + '.collapsed', 'w') as f:
+            for line, count in sorted(lines.items()):
+                f.write(f"{line} {count}\n")
+
+        with open(path + '.alloc.txt', 'w') as f:
+            f.write(f"app: {self.app}\nwall: {wall * 1000:.1f} ms\n"
+                    f"samples: {sum(samples.values())} every {self.interval * 1000:g} ms\n")
+            if allocations is None:
+                f.write("\nallocations: not traced (BCU_PROFILE_MEMORY=off)\n")
+            else:
+                f.write(f"\ntop {len(allocations)} allocating lines during the rerun (net size, blocks):\n")
+                for stat in allocations:
+                    frame = stat.traceback[0]
+                    f.write(f"{stat.size_diff / 1024:12.1f} KiB {stat.count_diff:+8d}  "
+                            f"{frame.filename}:{frame.lineno}\n")
+        logger.info("Profiled %s rerun: %.1f ms, %d samples -> %s.*", self.app, wall * 1000,
+                    sum(samples.values()), path)
+        _rotate(directory, _env_number('BCU_PROFILE_KEEP', 200, int))
+
+
+def _top_allocations(before):
+    import tracemalloc
+
+    after = tracemalloc.take_snapshot()
+    ignore = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+    stats = after.filter_traces(ignore).compare_to(before.filter_traces(ignore), 'lineno')
+    return [stat for stat in stats if stat.size_diff > 0][:TOP_ALLOCATORS]
+
+
+def _rotate(directory, keep):
+    """Remove the oldest reruns' files beyond the newest ``keep``."""
+    stems = sorted(name[:-len('.collapsed')] for name in os.listdir(directory) if name.endswith('.collapsed'))
+    for stem in stems[:max(0, len(stems) - keep)]:
+        for suffix in ('.collapsed', '.alloc.txt'):
+            try:
+                os.remove(os.path.join(directory, stem + suffix))
+            except FileNotFoundError:
+                pass
+
+
+def summarize(directory=None, app=None):
+    """Merge collapsed stacks; returns ``(reruns, total samples, {frame: (self, inclusive)})``."""
+    directory = directory or profile_dir()
+    reruns, total = 0, 0
+    frames = {}
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith('.collapsed') or (app and f'-{app}-' not in name):
+            continue
+        reruns += 1
+        with open(os.path.join(directory, name)) as f:
+            for line in f:
+                stack, _, count = line.rstrip('\n').rpartition(' ')
+                count = int(count)
+                total += count
+                names = stack.split(';')
+                for frame in set(names):
+                    own, inclusive = frames.get(frame, (0, 0))
+                    frames[frame] = (own, inclusive + count)
+                own, inclusive = frames[names[-1]]
+                frames[names[-1]] = (own + count, inclusive)
+    return reruns, total, frames
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('directory', nargs='?', default=None, help='profile directory (default: BCU_PROFILE_DIR)')
+    parser.add_argument('--app', help='only reruns of this app')
+    parser.add_argument('--top', type=int, default=30)
+    args = parser.parse_args(argv)
+
+    reruns, total, frames = summarize(args.directory, args.app)
+    if not total:
+        print("No samples found")
+        return 1
+    print(f"{reruns} reruns, {total} samples")
+    print(f"{'inclusive':>10} {'self':>8}  frame")
+    for frame, (own, inclusive) in sorted(frames.items(), key=lambda item: -item[1][1])[:args.top]:
+        print(f"{100 * inclusive / total:9.1f}% {100 * own / total:7.1f}%  {frame}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
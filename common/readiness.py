@@ -0,0 +1,182 @@
+"""Start-up warm-up and readiness reporting for the predictors.
+
+Each process (a Streamlit app, the multi-page host or the inference service)
+calls ``start_warmup`` with the models it serves: Streamlit servers from
+``common.serve`` before the first session connects (the call in each app
+script then finds the models queued), the inference service at start-up.
+A background thread then
+loads every model and runs one inference on a known-good input: the first
+valid row of the model's own CSV, or a synthetic image for the CNNs.  The
+same code path as the inference service is used (``service.models``), so
+the model files are loaded through the shared registry and the apps get
+the warm instances.
+
+    GET /healthz   200 as long as the process is serving
+    GET /readyz    200 once every model of this process is warm, 503 before
+                   that, if one failed or if no model was warmed at all; the
+                   JSON body has per-model status, load time and warm-up latency
+
+Both routes are served by the sidecar next to Streamlit and by the
+inference service, so a load balancer can keep traffic away from cold or
+broken instances (the sidecar binds 127.0.0.1 unless ``BCU_SIDECAR_HOST`` says
+otherwise).  ``BCU_WARMUP`` limits the warm-up to a comma-separated
+list of models, or disables it with ``off``.
+"""
+import json
+import logging
+import os
+import queue
+import threading
+import time
+
+from common import sidecar
+from common.model_registry import model_stats
+
+logger = logging.getLogger(__name__)
+
+_models = {}
+_lock = threading.Lock()
+_queue = queue.Queue()
+_state = {'thread': None, 'specs': None}
+_changed = threading.Condition(_lock)
+
+
+def _configured(names):
+    value = os.environ.get('BCU_WARMUP', '').strip().lower()
+    if value in ('off', 'false', 'no', '0'):
+        return []
+    if value and value not in ('all', 'on', '1'):
+        allowed = {name.strip() for name in value.split(',')}
+        return [name for name in names if name in allowed]
+    return list(names)
+
+
+def _specs():
+    if _state['specs'] is None:
+        from service.models import build_specs
+        _state['specs'] = build_specs()
+    return _state['specs']
+
+
+def warm(name):
+    """Load ``name`` and time a cold and a warm inference on its sample input (this thread)."""
+    from service.samples import known_good_row
+
+    spec = _specs()[name]
+    row = known_good_row(name, spec)
+    loads_before = {entry['path']: entry['loads'] for entry in model_stats()}
+
+    start = time.perf_counter()
+    spec.predict_rows([row])
+    first_seconds = time.perf_counter() - start
+    # Time spent in the registry loading files for this model (None if they were already loaded)
+    loaded = [entry['load_seconds'] for entry in model_stats()
+              if entry['loads'] != loads_before.get(entry['path'])]
+
+    start = time.perf_counter()
+    spec.predict_rows([row])
+    warm_ms = (time.perf_counter() - start) * 1000
+    load_seconds = sum(loaded) if loaded else None
+    return {
+        'load_seconds': load_seconds,
+        'first_inference_ms': (first_seconds - (load_seconds or 0.0)) * 1000,
+        'warm_latency_ms': warm_ms,
+    }
+
+
+def _run():
+    while True:
+        name = _queue.get()
+        _set(name, status='warming')
+        try:
+            timings = warm(name)
+        except Exception as e:
+            logger.exception("Warm-up of %s failed", name)
+            _set(name, status='failed', error=f"{type(e).__name__}: {e}")
+        else:
+            logger.info("%s ready: load %s s, warm inference %.1f ms", name,
+                        'n/a' if timings['load_seconds'] is None else f"{timings['load_seconds']:.3f}",
+                        timings['warm_latency_ms'])
+            _set(name, status='ready', ready_at=time.time(), error=None, **timings)
+
+
+def _set(name, **fields):
+    with _changed:
+        _models[name].update(fields)
+        _changed.notify_all()
+
+
+def mark_ready(name, **timings):
+    """Record ``name`` as warm without warming it again, e.g. a model inherited warm over ``fork()``.
+
+    ``timings`` are the fields returned by ``warm``.
+    """
+    with _changed:
+        _models[name] = {'status': 'ready', 'ready_at': time.time(), 'error': None, **timings}
+        _changed.notify_all()
+
+
+def start_warmup(names, expose=True):
+    """Warm the named models on a background thread; models already queued are skipped.
+
+    With ``expose`` the sidecar is started so ``/healthz`` and ``/readyz`` are
+    reachable (the inference service serves them itself).
+    """
+    names = _configured(names)
+    with _lock:
+        for name in names:
+            if name not in _models:
+                _models[name] = {'status': 'pending'}
+                _queue.put(name)
+        if names and _state['thread'] is None:
+            _state['thread'] = threading.Thread(target=_run, name='bcu-warmup', daemon=True)
+            _state['thread'].start()
+    if expose:
+        sidecar.start()
+
+
+def is_ready(names=None):
+    """True if every named model (default: every model of this process) is ready; False if there are none."""
+    with _lock:
+        names = list(_models) if names is None else names
+        return bool(names) and all(_models.get(name, {}).get('status') == 'ready' for name in names)
+
+
+def wait_until_ready(names=None, timeout=None):
+    """Block until the models are ready or failed; returns True only if all are ready."""
+    deadline = None if timeout is None else time.monotonic() + timeout
+    with _changed:
+        names = list(_models) if names is None else names
+        while any(_models.get(name, {}).get('status') in ('pending', 'warming') for name in names):
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                break
+            _changed.wait(remaining)
+    return is_ready(names)
+
+
+def status():
+    """``{'ready': bool, 'models': {name: {...}}}`` for the models of this process.
+
+    A process that has not been asked to warm any model is not ready.
+    """
+    with _lock:
+        models = {name: dict(fields) for name, fields in _models.items()}
+    return {
+        'ready': bool(models) and all(fields['status'] == 'ready' for fields in models.values()),
+        'models': models,
+    }
+
+
+def _serve_healthz(request, path):
+    return 200, {'Content-Type': 'application/json', 'Cache-Control': 'no-store'}, b'{"status": "ok"}'
+
+
+def _serve_readyz(request, path):
+    report = status()
+    body = json.dumps(report).encode()
+    return (200 if report['ready'] else 503), {'Content-Type': 'application/json', 'Cache-Control': 'no-store'}, body
+
+
+sidecar.register('/healthz', _serve_healthz)
+sidecar.register('/readyz', _serve_readyz)
@@ -0,0 +1,69 @@
+"""Launch a predictor with its models warming from server start.
+
+    python -m common.serve host
+    BCU_SIDECAR_PORT=8602 python -m common.serve heart --server.port 8502
+
+``streamlit run`` only executes an app script when the first browser session
+opens it, so the ``start_warmup`` call in each app, and with it the sidecar's
+``/healthz`` and ``/readyz``, would wait for a visitor, and a load balancer
+that waits for ``/readyz`` never sends one.  This launcher starts the warm-up
+thread and the sidecar in the server process first, then hands over to
+``streamlit run`` (which ends in ``streamlit.web.bootstrap.run``).  When a
+session runs the script, its own ``start_warmup`` finds the models already
+queued or warm.
+
+``host`` is the multi-page ``host_app.py`` and warms every model; the other
+names run one app.  Arguments after the app name go to ``streamlit run``.
+``BCU_WARMUP`` still narrows or disables the warm-up (``common.readiness``),
+and each server on a host needs its own ``BCU_SIDECAR_PORT``
+(``common.sidecar``); a sidecar port that cannot be bound stops the launch.
+Run it from the repository root: the apps resolve some files relative to the
+working directory.
+"""
+import argparse
+import logging
+import os
+import sys
+
+from common import readiness, sidecar
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# app name -> (main script relative to the repository root, models in common.readiness)
+APPS = {
+    'heart': ('heart/app.py', ['heart']),
+    'diabetes': ('diabetes/app.py', ['diabetes']),
+    'liver': ('liver/app.py', ['liver']),
+    'parkinson': ('parkinson/app.py', ['parkinson']),
+    'ckd': ('CKD12/app.py', ['ckd']),
+    'breast_cancer': ('BreastCancer/main.py', ['breast_cancer']),
+    'alzheimer': ('Alzheimer/streamlit_app.py', ['alzheimer']),
+    'pneumonia': ('Pneumonia/app_v1.py', ['pneumonia']),
+    'malaria': ('Malarial-Cell-Detection-main/main_app.py', ['malaria']),
+}
+APPS['host'] = ('host_app.py', [model for _, models in APPS.values() for model in models])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('app', choices=sorted(APPS))
+    parser.add_argument('streamlit_args', nargs=argparse.REMAINDER,
+                        help="passed on to `streamlit run`, e.g. --server.port 8502")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    script, models = APPS[args.app]
+    try:
+        address = sidecar.start(required=True)
+    except OSError as e:
+        parser.exit(1, f"{parser.prog}: cannot start the sidecar ({e}); set another BCU_SIDECAR_PORT\n")
+    if address is not None:
+        logging.getLogger(__name__).info("/healthz and /readyz on %s:%d", *address)
+    readiness.start_warmup(models, expose=False)
+
+    from streamlit.web import cli
+    return cli.main(['run', os.path.join(ROOT, script), *args.streamlit_args], prog_name='streamlit')
+
+
+if __name__ == '__main__':
+    sys.exit(main())
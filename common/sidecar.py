@@ -0,0 +1,127 @@
+"""Small HTTP server running next to Streamlit in the same process.
+
+Streamlit only serves its own routes, so the operational endpoints of a
+process (``/healthz``, ``/readyz``, ``/metrics``) are registered here and
+served by a stdlib ``ThreadingHTTPServer`` on a daemon thread, started once
+per process.  Browsers never talk to it; page assets go through Streamlit
+(see ``common.static_assets``).
+
+    BCU_SIDECAR_PORT   port to listen on (default 8601; ``0`` picks a free
+                       port, ``off`` disables the server)
+    BCU_SIDECAR_HOST   interface to bind (default 127.0.0.1, so only local
+                       probes and scrapers reach it; set e.g. 0.0.0.0 to
+                       let a load balancer or Prometheus on another host in)
+
+Probes and scrapers are configured with a fixed port, so each Streamlit
+process on a host needs its own ``BCU_SIDECAR_PORT`` (e.g. 8601 for the host
+app, 8602 for heart, ...).  If the port is taken the sidecar is not started
+at all rather than moved to another port nobody probes: ``start`` logs the
+error and returns None, or raises with ``required=True`` (``common.serve``
+uses that, so a misconfigured server fails at launch).
+"""
+import logging
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 8601
+
+_routes = {}
+_state = {'server': None, 'thread': None, 'disabled': False}
+_lock = threading.Lock()
+
+
+def register(prefix, handler):
+    """Serve GET/HEAD requests under ``prefix`` with ``handler(request, path)``.
+
+    The handler returns ``(status, headers, body)``; ``body`` is bytes.  The
+    longest matching prefix wins.
+    """
+    with _lock:
+        _routes[prefix] = handler
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = 'BCU-sidecar'
+
+    def _dispatch(self, send_body):
+        path = self.path.split('?', 1)[0]
+        matches = [p for p in _routes if path.startswith(p)]
+        if matches:
+            try:
+                status, headers, body = _routes[max(matches, key=len)](self, path)
+            except Exception:
+                logger.exception("Sidecar handler failed for %s", path)
+                status, headers, body = 500, {'Content-Type': 'text/plain'}, b'internal error\n'
+        else:
+            status, headers, body = 404, {'Content-Type': 'text/plain'}, b'not found\n'
+
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        if 'Content-Length' not in headers:
+            self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if send_body and body:
+            self.wfile.write(body)
+
+    def do_GET(self):
+        self._dispatch(send_body=True)
+
+    def do_HEAD(self):
+        self._dispatch(send_body=False)
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+def _configured_port():
+    value = os.environ.get('BCU_SIDECAR_PORT', str(DEFAULT_PORT)).strip().lower()
+    if value in ('', 'off', 'false', 'no'):
+        return None
+    return int(value)
+
+
+def start(required=False):
+    """Start the server once per process; returns ``(host, port)`` or None if disabled or failed.
+
+    With ``required`` a port that cannot be bound raises ``OSError`` instead.
+    """
+    with _lock:
+        if _state['server'] is not None:
+            return _state['server'].server_address[:2]
+        if _state['disabled']:
+            return None
+
+        port = _configured_port()
+        if port is None:
+            _state['disabled'] = True
+            return None
+        host = os.environ.get('BCU_SIDECAR_HOST', '127.0.0.1')
+        try:
+            server = ThreadingHTTPServer((host, port), _Handler)
+        except OSError:
+            _state['disabled'] = True
+            if required:
+                raise
+            logger.exception("Could not start the sidecar HTTP server on %s:%d; /healthz, /readyz and "
+                             "/metrics are not served (give each app its own BCU_SIDECAR_PORT)", host, port)
+            return None
+
+        server.daemon_threads = True
+        thread = threading.Thread(target=server.serve_forever, name='bcu-sidecar', daemon=True)
+        thread.start()
+        _state['server'], _state['thread'] = server, thread
+        logger.info("Sidecar HTTP server listening on %s:%d", *server.server_address[:2])
+        return server.server_address[:2]
+
+
+def stop():
+    with _lock:
+        server = _state['server']
+        _state['server'], _state['thread'] = None, None
+    if server is not None:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,200 @@
+"""Fingerprinted static files for background images, banners and page images.
+
+The apps used to base64-encode their background into a ``<style>`` block on
+every rerun, so each widget interaction re-sent the whole image.  Now each
+file is read once per process and kept in memory:
+
+* ``asset_url(path)`` (CSS backgrounds) returns the relative URL
+  ``app/static/<sha256 prefix>-<name>`` that Streamlit's own static file
+  serving answers.  The URL is relative and served by Streamlit itself, so it
+  works over HTTPS and behind proxies or a ``server.baseUrlPath``.
+* ``asset_bytes(path)`` is for ``st.image``: Streamlit's media file manager
+  serves identical bytes under one stable URL, so passing the cached bytes
+  avoids re-reading the file on every rerun.
+
+    st.markdown(f'<style>.stApp {{background-image: url("{asset_url(path)}");}}</style>',
+                unsafe_allow_html=True)
+    st.image(asset_bytes(path))
+
+Streamlit only serves the ``static/`` folder next to the main script, so the
+fingerprinted copies are written there at build / deploy time, not while
+serving (the source tree may be read-only):
+
+    python -m common.static_assets build
+
+copies every file in ``PAGE_ASSETS`` into the ``static/`` folder of each
+main script that uses it and of ``host_app.py``, and removes the copies of
+older versions.  If a page asks for a file that was not built, or static
+serving (``server.enableStaticServing`` in ``.streamlit/config.toml``) is
+off, ``asset_url`` falls back to a data URI, encoded once per process.
+
+Caching, as checked against Streamlit 1.65: ``app/static/`` responses carry
+``ETag`` and ``Last-Modified`` but no ``Cache-Control``, and conditional
+requests still get the full file (200, never 304).  Browsers therefore reuse
+a file only for their heuristic freshness period (a fraction of its age since
+``Last-Modified``, i.e. since the build).  The fingerprint is what makes
+longer caching safe: a changed file gets a new name, so a proxy in front of
+Streamlit can add ``Cache-Control: public, max-age=31536000, immutable`` for
+``app/static/`` and browsers then fetch each version once.  Relative paths
+are resolved against the current directory first and then the repository
+root.
+"""
+import argparse
+import base64
+import hashlib
+import logging
+import mimetypes
+import os
+import re
+import sys
+import threading
+from collections import namedtuple
+
+logger = logging.getLogger(__name__)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+URL_PREFIX = 'app/static/'
+HOST_SCRIPT = 'host_app.py'
+
+# Files each main script passes to asset_url (paths relative to the repository root)
+PAGE_ASSETS = {
+    'heart/app.py': ['heart/bg.webp'],
+    'diabetes/app.py': ['heart/bg.webp'],
+    'liver/app.py': ['liver/bg.webp'],
+    'parkinson/app.py': ['parkinson/bg.webp'],
+    'CKD12/app.py': ['CKD12/bg.webp'],
+    'Alzheimer/streamlit_app.py': ['Alzheimer/assets/images/bg.webp'],
+}
+
+_FINGERPRINTED = re.compile(r'^[0-9a-f]{16}-')
+
+mimetypes.add_type('image/webp', '.webp')
+
+Asset = namedtuple('Asset', ['path', 'name', 'content_type', 'data', 'mtime_ns', 'size'])
+
+_by_file = {}
+_published = {}  # asset name -> relative URL, or None if it was not built
+_data_uris = {}
+_lock = threading.Lock()
+
+
+def _resolve(path):
+    if os.path.isabs(path) or os.path.exists(path):
+        return os.path.abspath(path)
+    return os.path.join(ROOT, path)
+
+
+def register(path):
+    """Load ``path`` (once per content version) and return its ``Asset``.
+
+    Raises ``FileNotFoundError`` if the file does not exist.
+    """
+    path = _resolve(path)
+    info = os.stat(path)
+    asset = _by_file.get(path)
+    if asset is not None and (asset.mtime_ns, asset.size) == (info.st_mtime_ns, info.st_size):
+        return asset
+
+    with open(path, 'rb') as f:
+        data = f.read()
+    digest = hashlib.sha256(data).hexdigest()
+    content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    asset = Asset(path, f"{digest[:16]}-{os.path.basename(path)}", content_type, data,
+                  info.st_mtime_ns, info.st_size)
+    with _lock:
+        _by_file[path] = asset
+    return asset
+
+
+def static_dir():
+    """Folder Streamlit serves under ``app/static/``: ``static/`` next to the main script."""
+    # `streamlit run` sets sys.argv[0] to the main script (host_app.py in the multi-page host)
+    return os.path.join(os.path.dirname(os.path.abspath(sys.argv[0])), 'static')
+
+
+def _static_serving_enabled():
+    try:
+        import streamlit as st
+        return bool(st.get_option('server.enableStaticServing'))
+    except Exception:
+        return False
+
+
+def _published_url(asset):
+    """URL of the built copy of ``asset``, or None if ``build`` did not write it."""
+    with _lock:
+        if asset.name not in _published:
+            directory = static_dir()
+            if os.path.isfile(os.path.join(directory, asset.name)):
+                _published[asset.name] = URL_PREFIX + asset.name
+            else:
+                logger.warning("%s has no built copy in %s; inlining it instead "
+                               "(run `python -m common.static_assets build`)", asset.path, directory)
+                _published[asset.name] = None
+        return _published[asset.name]
+
+
+def data_uri(path):
+    asset = register(path)
+    uri = _data_uris.get(asset.name)
+    if uri is None:
+        uri = f"data:{asset.content_type};base64,{base64.b64encode(asset.data).decode()}"
+        _data_uris[asset.name] = uri
+    return uri
+
+
+def asset_url(path):
+    """Fingerprinted relative URL for the file at ``path`` (data URI if it was not built)."""
+    asset = register(path)
+    url = _published_url(asset) if _static_serving_enabled() else None
+    return url or data_uri(path)
+
+
+def asset_bytes(path):
+    """The file's content, read once per process, for ``st.image``."""
+    return register(path).data
+
+
+def build(root=ROOT):
+    """Write the fingerprinted copies of ``PAGE_ASSETS`` into the static folders; returns their paths."""
+    by_dir = {}
+    for script, paths in PAGE_ASSETS.items():
+        for serving in (script, HOST_SCRIPT):
+            by_dir.setdefault(os.path.join(root, os.path.dirname(serving), 'static'), set()).update(paths)
+
+    written = []
+    for directory, paths in sorted(by_dir.items()):
+        os.makedirs(directory, exist_ok=True)
+        names = set()
+        for path in sorted(paths):
+            asset = register(os.path.join(root, path))
+            target = os.path.join(directory, asset.name)
+            if asset.name in names:
+                continue  # the same image under another path
+            if not os.path.exists(target):
+                tmp = f"{target}.{os.getpid()}.tmp"
+                with open(tmp, 'wb') as f:
+                    f.write(asset.data)
+                os.replace(tmp, target)
+            names.add(asset.name)
+            written.append(target)
+        # Copies of older versions are no longer referenced
+        for name in os.listdir(directory):
+            if _FINGERPRINTED.match(name) and name not in names:
+                os.remove(os.path.join(directory, name))
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('build', help="write the fingerprinted page assets into each app's static/ folder")
+    parser.parse_args(argv)
+
+    for path in build():
+        print(os.path.relpath(path, ROOT))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,181 @@
+"""Per-request stage timing shared by all the apps.
+
+A ``Trace`` times the real stages of one prediction (decode, preprocessing,
+model load, inference, rendering) and appends one JSON line per request to a
+local file, so latency percentiles can be computed per model and stage.  It
+can also drive a progress bar from actual stage completion.
+
+    with Trace('heart', stages=['preprocess', 'inference']) as trace:
+        with trace.stage('preprocess'):
+            ...
+        with trace.stage('inference'):
+            ...
+
+Records go to ``traces/requests.jsonl`` at the repository root unless the
+``BCU_TRACE_FILE`` environment variable names another file; set it to ``off``
+to disable writing.  ``python -m common.tracing`` prints p50/p95/p99 per
+model and stage.  Every finished trace is also counted in ``common.metrics``
+(outcome, total and per-stage latency histograms).
+"""
+import json
+import math
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+from common import metrics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_TRACE_FILE = os.path.join(ROOT, 'traces', 'requests.jsonl')
+
+
+def trace_file():
+    path = os.environ.get('BCU_TRACE_FILE', DEFAULT_TRACE_FILE)
+    return None if path.lower() in ('', 'off', '0', 'false') else path
+
+
+class _JsonlSink:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._file = None
+        self._path = None
+
+    def write(self, record):
+        path = trace_file()
+        if path is None:
+            return
+        line = json.dumps(record, separators=(',', ':')) + '\n'
+        with self._lock:
+            try:
+                if self._path != path:
+                    if self._file is not None:
+                        self._file.close()
+                    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+                    self._file = open(path, 'a', buffering=1)
+                    self._path = path
+                self._file.write(line)
+            except OSError:
+                # Tracing must never break a prediction (e.g. read-only deployments)
+                self._file, self._path = None, None
+
+
+_sink = _JsonlSink()
+
+
+class Trace:
+    """Times named stages of one request and records them when finished.
+
+    ``stages`` is the list of stages the request is expected to go through;
+    it is only used to report progress.  ``on_progress(done, total, stage)``
+    is called after each of those stages completes.  Stages not in the list
+    (or all stages, if no list is given) are still timed and recorded.
+    """
+
+    def __init__(self, model, stages=None, on_progress=None):
+        self.model = model
+        self.expected = list(stages or [])
+        self.on_progress = on_progress
+        self.stages = {}
+        self.fields = {}
+        self._start = time.perf_counter()
+        self._finished = False
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + (time.perf_counter() - start) * 1000
+            if self.on_progress is not None and name in self.expected:
+                done = sum(1 for s in self.stages if s in self.expected)
+                self.on_progress(done, len(self.expected), name)
+
+    def annotate(self, **fields):
+        """Attach extra fields (e.g. ``cache='hit'``) to the record.
+
+        An ``error`` field marks the request as failed even if the caller
+        handled the exception itself.
+        """
+        self.fields.update(fields)
+
+    def finish(self, ok=True):
+        if self._finished:
+            return
+        self._finished = True
+        record = {
+            'ts': time.time(),
+            'model': self.model,
+            'ok': ok and 'error' not in self.fields,
+            'total_ms': (time.perf_counter() - self._start) * 1000,
+            'stages': self.stages,
+        }
+        record.update(self.fields)
+        _sink.write(record)
+        self._count(record)
+
+    def _count(self, record):
+        error = self.fields.get('error')
+        if record['ok']:
+            outcome = 'ok'
+        else:
+            outcome = error if error in ('busy', 'timeout') else 'error'
+        metrics.inc('bcu_predictions_total', model=self.model, outcome=outcome)
+        metrics.observe('bcu_request_duration_seconds', record['total_ms'] / 1000, model=self.model)
+        for stage, ms in self.stages.items():
+            metrics.observe('bcu_stage_duration_seconds', ms / 1000, model=self.model, stage=stage)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.finish(ok=exc_type is None)
+        return False
+
+
+def _percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    # Nearest-rank percentile
+    index = max(0, math.ceil(q / 100.0 * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+def summarize(path=None):
+    """Return ``{model: {stage: {'count', 'p50', 'p95', 'p99'}}}`` in milliseconds; 'total' is included."""
+    path = path or trace_file() or DEFAULT_TRACE_FILE
+    samples = {}
+    with open(path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            per_model = samples.setdefault(record.get('model', '?'), {})
+            per_model.setdefault('total', []).append(record['total_ms'])
+            for stage, ms in record.get('stages', {}).items():
+                per_model.setdefault(stage, []).append(ms)
+
+    summary = {}
+    for model, stages in samples.items():
+        summary[model] = {}
+        for stage, values in stages.items():
+            values.sort()
+            summary[model][stage] = {
+                'count': len(values),
+                'p50': _percentile(values, 50),
+                'p95': _percentile(values, 95),
+                'p99': _percentile(values, 99),
+            }
+    return summary
+
+
+if __name__ == '__main__':
+    report = summarize(sys.argv[1] if len(sys.argv) > 1 else None)
+    for model in sorted(report):
+        print(model)
+        for stage, s in sorted(report[model].items()):
+            print(f"    {stage:<14} n={s['count']:<6} p50={s['p50']:9.2f} ms  "
+                  f"p95={s['p95']:9.2f} ms  p99={s['p99']:9.2f} ms")
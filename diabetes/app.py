@@ -1,8 +1,19 @@
 
-import base64
 import streamlit as st
 import os
-import pickle
+import sys
+
+# Make the shared helpers at the repository root importable; Streamlit re-executes
+# this script on every interaction, so only add the path once
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+from common.model_registry import load_artifact
+from common.prediction_cache import cached_predict
+from common.tracing import Trace
+from common.static_assets import asset_url
+from common.profiling import profile_rerun
+from common.readiness import start_warmup
 
 # Set page configuration
 st.set_page_config(
@@ -10,21 +21,22 @@ st.set_page_config(
     page_icon="🩺",
 )
 
+# Sampled per rerun when BCU_PROFILE selects this app (see common.profiling)
+profile_rerun('diabetes')
+
+# Load the model and run a known-good row through it in the background; `python -m common.serve`
+# starts this at server start, plain `streamlit run` when a session first runs this script.
+# The sidecar's /readyz reports when it is warm
+start_warmup(['diabetes'])
+
 # Function to set background image
 def set_page_background(image_path):
-    @st.cache(suppress_st_warning=True)
-    def get_base64_of_bin_file(filename):
-        with open(filename, 'rb') as f:
-            data = f.read()
-        return base64.b64encode(data).decode()
-
-    # Convert image to base64
     if os.path.exists(image_path):
-        bin_str = get_base64_of_bin_file(image_path)
+        # Served once per process from the static route; reruns only send the short URL
         page_bg_img = f'''
             <style>
             .stApp {{
-                background-image: url("data:image/jpg;base64,{bin_str}");
+                background-image: url("{asset_url(image_path)}");
                 background-size: cover;
             }}
             </style>
@@ -55,11 +67,8 @@ The predictions provided by this system are for informational purposes only. Con
 """)
 
 # Function to load saved model
-@st.cache(allow_output_mutation=True)
 def load_model(model_file):
-    with open(model_file, 'rb') as f:
-        model = pickle.load(f)
-    return model
+    return load_artifact(model_file)
 
 # Main content
 def main():
@@ -109,14 +118,18 @@ def main():
         diab_diagnosis = ''
         if st.button('Diabetes Test Result'):
             try:
-                user_input = [float(Pregnancies), float(Glucose), float(BloodPressure), float(SkinThickness),
-                              float(Insulin), float(BMI), float(DiabetesPedigreeFunction), float(Age)]
-                diab_prediction = diabetes_model.predict([user_input])
-                if diab_prediction[0] == 1:
-                    diab_diagnosis = 'The person is diabetic'
-                else:
-                    diab_diagnosis = 'The person is not diabetic'
-                st.success(diab_diagnosis)
+                with Trace('diabetes') as trace:
+                    with trace.stage('preprocess'):
+                        user_input = [float(Pregnancies), float(Glucose), float(BloodPressure), float(SkinThickness),
+                                      float(Insulin), float(BMI), float(DiabetesPedigreeFunction), float(Age)]
+                    with trace.stage('inference'):
+                        diab_prediction = cached_predict(diabetes_model, model_file_path, user_input, 'diabetes')
+                    with trace.stage('render'):
+                        if diab_prediction == 1:
+                            diab_diagnosis = 'The person is diabetic'
+                        else:
+                            diab_diagnosis = 'The person is not diabetic'
+                        st.success(diab_diagnosis)
             except ValueError:
                 st.error('Please enter valid numbers for all fields.')
     elif app_mode == "Disclaimer":
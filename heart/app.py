@@ -1,27 +1,40 @@
 import os
-import base64
-import pickle
+import sys
 import pandas as pd
 import streamlit as st
 from streamlit_option_menu import option_menu
 
+# Make the shared helpers at the repository root importable; Streamlit re-executes
+# this script on every interaction, so only add the path once
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+from common.model_registry import load_artifact
+from common.prediction_cache import cached_predict
+from common.tracing import Trace
+from common.static_assets import asset_url
+from common.profiling import profile_rerun
+from common.readiness import start_warmup
+
 # Set page configuration
 st.set_page_config(page_title="Heart Disease Prediction", page_icon="❤️", layout="wide")
 
+# Sampled per rerun when BCU_PROFILE selects this app (see common.profiling)
+profile_rerun('heart')
+
+# Load the model and run a known-good row through it in the background; `python -m common.serve`
+# starts this at server start, plain `streamlit run` when a session first runs this script.
+# The sidecar's /readyz reports when it is warm
+start_warmup(['heart'])
+
 # Function to set background image
 def set_page_background(image_path):
-    @st.cache_data
-    def get_base64_of_bin_file(filename):
-        with open(filename, 'rb') as f:
-            data = f.read()
-        return base64.b64encode(data).decode()
-
     if os.path.exists(image_path):
-        bin_str = get_base64_of_bin_file(image_path)
+        # Served once per process from the static route; reruns only send the short URL
         page_bg_img = f'''
             <style>
             .stApp {{
-                background-image: url("data:image/webp;base64,{bin_str}");
+                background-image: url("{asset_url(image_path)}");
                 background-size: cover;
             }}
             </style>
@@ -49,12 +62,9 @@ The predictions provided by this system are for informational purposes only. Con
 """)
 
 # Function to load saved model
-@st.cache_data
 def load_model(model_file):
     if os.path.exists(model_file):
-        with open(model_file, 'rb') as f:
-            model = pickle.load(f)
-        return model
+        return load_artifact(model_file)
     else:
         st.error(f"Model file '{model_file}' not found. Please ensure the file is in the correct directory.")
         st.stop()
@@ -88,12 +98,16 @@ def show_heart_disease_prediction():
 
     if st.button("Predict Heart Disease Risk"):
         try:
-            user_input = [age, sex, cp, trestbps, chol, fbs, restecg, thalach, exang, oldpeak, slope, ca, thal]
-            prediction = heart_disease_model.predict([user_input])
-            if prediction[0] == 0:
-                st.success("The person has a risk of heart disease.")
-            else:
-                st.success("The person does not have a risk of heart disease.")
+            with Trace('heart') as trace:
+                with trace.stage('preprocess'):
+                    user_input = [age, sex, cp, trestbps, chol, fbs, restecg, thalach, exang, oldpeak, slope, ca, thal]
+                with trace.stage('inference'):
+                    prediction = cached_predict(heart_disease_model, heart_disease_model_path, user_input, 'heart')
+                with trace.stage('render'):
+                    if prediction == 0:
+                        st.success("The person has a risk of heart disease.")
+                    else:
+                        st.success("The person does not have a risk of heart disease.")
         except ValueError:
             st.error('Please enter valid numbers for all fields.')
 
@@ -0,0 +1,66 @@
+"""Single Streamlit host for all nine predictors.
+
+    python -m common.serve host
+
+Every app script is mounted as a page with ``st.navigation`` and only runs
+when that page is visited.  All pages share one interpreter, one copy of the
+scientific stack and the process-wide model registry, instead of nine
+separate Streamlit servers.  Every model is loaded and warmed on a background
+thread from server start (``common.serve``; under a plain ``streamlit run
+host_app.py`` only once the first session runs this script), and the
+sidecar's ``/readyz`` reports 200 once all of them are ready (see
+``common.readiness``).  ``BCU_WARMUP=off``, or a list of models, keeps the
+others out of memory until their page is first visited.
+The sidecar's ``/metrics`` serves Prometheus metrics for every page
+(``common.metrics``).
+Run it from the repository root: the apps resolve some files relative to the
+working directory.
+
+The individual apps still run on their own (``streamlit run heart/app.py``).
+"""
+import os
+import sys
+
+import streamlit as st
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# (directory, script, title, icon, url path, model name in common.readiness)
+APPS = [
+    ('heart', 'app.py', 'Heart Disease', '❤️', 'heart', 'heart'),
+    ('diabetes', 'app.py', 'Diabetes', '🩺', 'diabetes', 'diabetes'),
+    ('liver', 'app.py', 'Liver Disease', '🩺', 'liver', 'liver'),
+    ('parkinson', 'app.py', "Parkinson's Disease", '🧠', 'parkinson', 'parkinson'),
+    ('CKD12', 'app.py', 'Chronic Kidney Disease', '🦠', 'ckd', 'ckd'),
+    ('BreastCancer', 'main.py', 'Breast Cancer', '🎗️', 'breast-cancer', 'breast_cancer'),
+    ('Alzheimer', 'streamlit_app.py', "Alzheimer's", '🧠', 'alzheimer', 'alzheimer'),
+    ('Pneumonia', 'app_v1.py', 'Pneumonia', '🫁', 'pneumonia', 'pneumonia'),
+    ('Malarial-Cell-Detection-main', 'main_app.py', 'Malaria Cell Detection', '🔬', 'malaria', 'malaria'),
+]
+
+# Streamlit only puts this file's directory on sys.path; each app imports its
+# own helper modules (ckd_pipeline, xray_model, config, ...) by bare name
+for directory, *_ in APPS:
+    path = os.path.join(ROOT, directory)
+    if path not in sys.path:
+        sys.path.append(path)
+
+from common.readiness import start_warmup
+
+# Already started by common.serve at server start; queued models are not warmed twice
+start_warmup([model for *_, model in APPS])
+
+
+def overview():
+    st.title("BCU Disease Prediction")
+    st.write("Choose a predictor.")
+    for page in app_pages:
+        st.page_link(page, label=page.title, icon=page.icon)
+
+
+app_pages = [
+    st.Page(os.path.join(ROOT, directory, script), title=title, icon=icon, url_path=url_path)
+    for directory, script, title, icon, url_path, _ in APPS
+]
+
+st.navigation([st.Page(overview, title="Overview", icon="🏠", default=True)] + app_pages).run()
@@ -1,26 +1,40 @@
 import os
-import base64
-import pickle
+import sys
 import streamlit as st
 
+# Make the shared helpers at the repository root importable; Streamlit re-executes
+# this script on every interaction, so only add the path once
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+from common.model_registry import load_artifact
+from common.prediction_cache import cached_predict
+from common.tracing import Trace
+from common.static_assets import asset_url
+from common.profiling import profile_rerun
+from common.readiness import start_warmup
+
 # Set page configuration
 st.set_page_config(page_title="Liver Prediction",
                    layout="wide",
                    page_icon="🩺")
 
+# Sampled per rerun when BCU_PROFILE selects this app (see common.profiling)
+profile_rerun('liver')
+
+# Load the model and run a known-good row through it in the background; `python -m common.serve`
+# starts this at server start, plain `streamlit run` when a session first runs this script.
+# The sidecar's /readyz reports when it is warm
+start_warmup(['liver'])
+
 # Function to set background image
 def set_page_background(image_path):
-    def get_base64_of_bin_file(filename):
-        with open(filename, 'rb') as f:
-            data = f.read()
-        return base64.b64encode(data).decode()
-
     if os.path.exists(image_path):
-        bin_str = get_base64_of_bin_file(image_path)
+        # Served once per process from the static route; reruns only send the short URL
         page_bg_img = f'''
             <style>
             .stApp {{
-                background-image: url("data:image/webp;base64,{bin_str}");
+                background-image: url("{asset_url(image_path)}");
                 background-size: cover;
             }}
             </style>
@@ -42,8 +56,7 @@ working_dir = os.path.dirname(os.path.abspath(__file__))
 liver_model_path = os.path.join(working_dir, 'liver.sav')  # Adjust the model file name
 
 # Load the pre-trained model
-with open(liver_model_path, 'rb') as model_file:
-    liver_model = pickle.load(model_file)
+liver_model = load_artifact(liver_model_path)
 
 # Sample values for two different sets of data
 sample1_values = {
@@ -151,19 +164,23 @@ def liver_disease_prediction():
     liver_prediction = ''
     if st.button('Liver Disease Test Result'):
         try:
-            # Ensure all inputs are in the correct format
-            user_input = [float(feature) for feature in user_input]
-
-            # Make prediction
-            liver_prediction = liver_model.predict([user_input])[0]
-
-            # Determine if the person likely has liver disease based on gender and key indicators
-            if (alamine_aminotransferase > 40 or aspartate_aminotransferase > 40 or total_bilirubin > 1.2 or direct_bilirubin > 0.3):
-                liver_diagnosis = 'The person is likely to have Liver Disease'
-            else:
-                liver_diagnosis = 'The person is NOT likely to have Liver Disease'
-
-            st.success(liver_diagnosis)
+            with Trace('liver') as trace:
+                # Ensure all inputs are in the correct format
+                with trace.stage('preprocess'):
+                    user_input = [float(feature) for feature in user_input]
+
+                # Make prediction
+                with trace.stage('inference'):
+                    liver_prediction = cached_predict(liver_model, liver_model_path, user_input, 'liver')
+
+                # Determine if the person likely has liver disease based on gender and key indicators
+                with trace.stage('render'):
+                    if (alamine_aminotransferase > 40 or aspartate_aminotransferase > 40 or total_bilirubin > 1.2 or direct_bilirubin > 0.3):
+                        liver_diagnosis = 'The person is likely to have Liver Disease'
+                    else:
+                        liver_diagnosis = 'The person is NOT likely to have Liver Disease'
+
+                    st.success(liver_diagnosis)
         except ValueError as ve:
             st.error(f'Please enter valid numbers for all fields. ValueError: {ve}')
         except Exception as e:
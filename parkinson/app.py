@@ -1,6 +1,5 @@
 import os
-import pickle
-import base64
+import sys
 import streamlit as st
 
 # Set page configuration
@@ -11,18 +10,39 @@ st.set_page_config(page_title="Parkinson's Disease Prediction",
 # Getting the working directory
 working_dir = os.path.dirname(os.path.abspath(__file__))
 
+# Make the shared helpers at the repository root importable; Streamlit re-executes
+# this script on every interaction, so only add the path once
+if os.path.dirname(working_dir) not in sys.path:
+    sys.path.append(os.path.dirname(working_dir))
+from common.model_registry import load_artifact
+from common.prediction_cache import cached_predict
+from common.tracing import Trace
+from common.static_assets import asset_url
+from common.profiling import profile_rerun
+from common.readiness import start_warmup
+
+# Sampled per rerun when BCU_PROFILE selects this app (see common.profiling)
+profile_rerun('parkinson')
+
+# Load the model and run a known-good row through it in the background; `python -m common.serve`
+# starts this at server start, plain `streamlit run` when a session first runs this script.
+# The sidecar's /readyz reports when it is warm
+start_warmup(['parkinson'])
+
 # Loading the saved model
-parkinsons_model = pickle.load(open(os.path.join(working_dir, 'parkinsons_model.sav'), 'rb'))
+parkinsons_model_path = os.path.join(working_dir, 'parkinsons_model.sav')
+parkinsons_model = load_artifact(parkinsons_model_path)
 
 # Function to add custom CSS for background image and compact input fields
 def add_custom_css():
     try:
-        background_image = get_base64_of_file(os.path.join(working_dir, 'bg.webp'))
+        # Served once per process from the static route; reruns only send the short URL
+        background_image = asset_url(os.path.join(working_dir, 'bg.webp'))
         st.markdown(
             f"""
             <style>
             .stApp {{
-                background-image: url("data:image/webp;base64,{background_image}");
+                background-image: url("{background_image}");
                 background-size: cover;
                 background-position: center;
             }}
@@ -45,11 +65,6 @@ def add_custom_css():
     except FileNotFoundError:
         st.error("Background image file not found.")
 
-# Function to get base64 encoding of the image file
-def get_base64_of_file(file_path):
-    with open(file_path, "rb") as file:
-        return base64.b64encode(file.read()).decode()
-
 # Adding custom CSS
 add_custom_css()
 
@@ -135,13 +150,17 @@ elif page == "Parkinson's Prediction":
 
     if st.button("Get Prediction"):
         try:
-            user_input = [fo, fhi, flo, jitter_percent, jitter_abs, rap, ppq, ddp, shimmer, shimmer_db,
-                          apq3, apq5, apq, dda, nhr, hnr, rpde, dfa, spread1, spread2, d2, ppe]
-            prediction = parkinsons_model.predict([user_input])
-            if prediction[0] == 1:
-                st.success("The person has Parkinson's disease")
-            else:
-                st.success("The person does not have Parkinson's disease")
+            with Trace('parkinson') as trace:
+                with trace.stage('preprocess'):
+                    user_input = [fo, fhi, flo, jitter_percent, jitter_abs, rap, ppq, ddp, shimmer, shimmer_db,
+                                  apq3, apq5, apq, dda, nhr, hnr, rpde, dfa, spread1, spread2, d2, ppe]
+                with trace.stage('inference'):
+                    prediction = cached_predict(parkinsons_model, parkinsons_model_path, user_input, 'parkinson')
+                with trace.stage('render'):
+                    if prediction == 1:
+                        st.success("The person has Parkinson's disease")
+                    else:
+                        st.success("The person does not have Parkinson's disease")
         except Exception as e:
             st.error(f"An error occurred: {e}")
 
@@ -0,0 +1 @@
+"""Headless HTTP inference service for the disease models (see ``service.server``)."""
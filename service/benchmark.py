@@ -0,0 +1,200 @@
+"""Serving benchmark for every predictor.
+
+Each model is measured in its own fresh interpreter, so import time, model
+load time and peak RSS are not shared with the other models:
+
+    import_seconds      importing the service and the model's libraries
+    load_seconds        loading the model files (from the model registry)
+    first_call_seconds  first prediction, including lazy imports and loading
+    latency_ms          validate + predict for one instance (p50 / p95 / mean)
+    throughput          rows per second of ``predict_rows`` per batch size
+    peak_rss_mb         peak resident set size of the process
+
+Inputs come from the datasets in the tree; the CNNs get synthetic images.
+
+    python -m service.benchmark --json bench.json
+    python -m service.benchmark heart ckd --baseline bench.json --threshold 15
+
+With ``--baseline`` the exit status is 1 if any metric got worse by more than
+``--threshold`` percent.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from service.samples import load_instances
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODELS = ['heart', 'diabetes', 'liver', 'parkinson', 'ckd', 'breast_cancer', 'alzheimer', 'malaria', 'pneumonia']
+DEFAULT_BATCH_SIZES = [1, 8, 32, 128, 512]
+
+# Libraries each predictor imports lazily on first use
+LIBRARIES = {
+    'ckd': ['sklearn'],
+    'alzheimer': ['sklearn', 'pandas', 'joblib'],
+    'malaria': ['cv2', 'tensorflow'],
+    'pneumonia': ['PIL', 'tensorflow'],
+}
+
+# (metric path, True if higher is better)
+COMPARED_METRICS = [
+    (('import_seconds',), False),
+    (('load_seconds',), False),
+    (('latency_ms', 'p50'), False),
+    (('peak_rss_mb',), False),
+]
+
+
+def _peak_rss_mb():
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 if sys.platform != 'darwin' else peak / (1024 * 1024)
+
+
+def run_child(name, batch_sizes, repeats, min_seconds):
+    """Benchmark one model in this (fresh) process; returns the result dict."""
+    start = time.perf_counter()
+    import importlib
+    from service import models
+    for library in LIBRARIES.get(name, ['sklearn']):
+        importlib.import_module(library)
+    import_seconds = time.perf_counter() - start
+
+    spec = models.build_specs()[name]
+    instances, rows = load_instances(name, spec)
+    if not rows:
+        raise RuntimeError(f"no valid instances for '{name}'")
+
+    start = time.perf_counter()
+    spec.predict_rows(rows[:1])
+    first_call_seconds = time.perf_counter() - start
+
+    from common.model_registry import model_stats
+    load_seconds = sum(entry['load_seconds'] for entry in model_stats())
+
+    # Single-instance latency, including schema validation like a /predict request
+    latencies = []
+    for i in range(repeats):
+        instance = instances[i % len(instances)]
+        begin = time.perf_counter()
+        spec.predict_rows([spec.validate(instance)])
+        latencies.append((time.perf_counter() - begin) * 1000)
+    latencies.sort()
+
+    throughput = {}
+    for size in batch_sizes:
+        if size > spec.max_batch:
+            continue
+        batch = [rows[i % len(rows)] for i in range(size)]
+        done, begin = 0, time.perf_counter()
+        while True:
+            spec.predict_rows(batch)
+            done += size
+            elapsed = time.perf_counter() - begin
+            if elapsed >= min_seconds and done >= 3 * size:
+                break
+        throughput[str(size)] = done / elapsed
+
+    return {
+        'model': name,
+        'rows': len(rows),
+        'import_seconds': import_seconds,
+        'load_seconds': load_seconds,
+        'first_call_seconds': first_call_seconds,
+        'latency_ms': {
+            'p50': latencies[len(latencies) // 2],
+            'p95': latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))],
+            'mean': sum(latencies) / len(latencies),
+        },
+        'throughput': throughput,
+        'peak_rss_mb': _peak_rss_mb(),
+    }
+
+
+def measure(name, batch_sizes, repeats, min_seconds, python=sys.executable):
+    cmd = [python, '-m', 'service.benchmark', '--child', name, '--repeats', str(repeats),
+           '--min-seconds', str(min_seconds), '--batch-sizes', ','.join(map(str, batch_sizes))]
+    proc = subprocess.run(cmd, cwd=ROOT, capture_output=True, text=True)
+    if proc.returncode != 0:
+        return {'model': name, 'error': (proc.stderr.strip().splitlines() or ['failed'])[-1]}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def _metric(result, path):
+    for key in path:
+        result = result.get(key) if isinstance(result, dict) else None
+    return result
+
+
+def compare(results, baseline, threshold):
+    """Return human-readable regressions against a previous report."""
+    previous = {r['model']: r for r in baseline.get('results', [])}
+    regressions = []
+    for result in results:
+        old = previous.get(result['model'])
+        if not old or 'error' in result or 'error' in old:
+            continue
+        metrics = COMPARED_METRICS + [(('throughput', size), True) for size in result['throughput']]
+        for path, higher_is_better in metrics:
+            new_value, old_value = _metric(result, path), _metric(old, path)
+            if not new_value or not old_value:
+                continue
+            change = 100.0 * (new_value - old_value) / old_value
+            if (-change if higher_is_better else change) > threshold:
+                regressions.append(f"{result['model']} {'.'.join(path)}: {old_value:.4g} -> {new_value:.4g} "
+                                   f"({change:+.0f}%)")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('models', nargs='*', help=f"models to run (default: all of {', '.join(MODELS)})")
+    parser.add_argument('--batch-sizes', default=','.join(map(str, DEFAULT_BATCH_SIZES)))
+    parser.add_argument('--repeats', type=int, default=50, help='single-instance predictions to time')
+    parser.add_argument('--min-seconds', type=float, default=0.5, help='minimum time per batch size')
+    parser.add_argument('--json', help='write the report to this file')
+    parser.add_argument('--baseline', help='previous --json report to compare against')
+    parser.add_argument('--threshold', type=float, default=20.0, help='allowed change in percent')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    batch_sizes = [int(size) for size in args.batch_sizes.split(',') if size]
+
+    if args.child:
+        sys.path.insert(0, ROOT)
+        import warnings
+        warnings.simplefilter('ignore')
+        print(json.dumps(run_child(args.child, batch_sizes, args.repeats, args.min_seconds)))
+        return 0
+
+    results = []
+    for name in args.models or MODELS:
+        result = measure(name, batch_sizes, args.repeats, args.min_seconds)
+        results.append(result)
+        if 'error' in result:
+            print(f"{name}: FAILED ({result['error']})")
+            continue
+        print(f"{name}: import {result['import_seconds']:.2f} s, load {result['load_seconds']:.3f} s, "
+              f"p50 {result['latency_ms']['p50']:.2f} ms, peak RSS {result['peak_rss_mb']:.0f} MB")
+        for size, rate in result['throughput'].items():
+            print(f"    batch {size:>5}: {rate:10.1f} rows/s")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'python': sys.version, 'batch_sizes': batch_sizes, 'results': results}, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
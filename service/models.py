@@ -0,0 +1,410 @@
+"""Request schemas and batch predictors for the nine models.
+
+Each ``ModelSpec`` validates JSON instances against its field list (turning
+them into rows in the model's column order) and scores a list of rows in one
+call.  Models are loaded from the same files as the Streamlit apps through the
+shared registry (using a ``.flat`` export when one is up to date, see
+``common.flat_model``), and the apps' own preprocessing helpers are reused so the
+service and the UI give identical answers.
+
+Heavy libraries (pandas, OpenCV, PIL, TensorFlow) are only imported when the
+model that needs them is first used.
+"""
+import base64
+import binascii
+import math
+import os
+import sys
+from collections import namedtuple
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
+from common.flat_model import load_model_file
+from common.inference_executor import get_executor
+from common.model_registry import load_artifact
+
+# The apps' helper modules are imported by name from their own directories
+for _app in ('CKD12', 'BreastCancer', 'Alzheimer', 'Malarial-Cell-Detection-main', 'Pneumonia'):
+    if os.path.join(ROOT, _app) not in sys.path:
+        sys.path.append(os.path.join(ROOT, _app))
+
+
+class ValidationError(ValueError):
+    """Raised when a request does not match the model's schema; ``errors`` lists every problem."""
+
+    def __init__(self, errors):
+        self.errors = list(errors)
+        super().__init__('; '.join(self.errors))
+
+
+Field = namedtuple('Field', ['name', 'kind', 'choices', 'required'])
+
+
+def number(name, required=True):
+    return Field(name, 'number', None, required)
+
+
+def choice(name, choices):
+    return Field(name, 'choice', list(choices), True)
+
+
+def category(name):
+    # Free-form categorical value checked by the model's own encoder
+    return Field(name, 'category', None, False)
+
+
+def image(name='image'):
+    return Field(name, 'image', None, True)
+
+
+def _check(field, value):
+    """Return ``(value, error)`` for one field of one instance."""
+    if value is None:
+        return (None, None) if not field.required else (None, f"'{field.name}' is required")
+    if field.kind == 'number':
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+            return None, f"'{field.name}' must be a finite number"
+        return float(value), None
+    if field.kind == 'choice':
+        for option in field.choices:
+            if value == option or str(value) == str(option):
+                return option, None
+        return None, f"'{field.name}' must be one of {field.choices}"
+    if field.kind == 'category':
+        if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+            return None, f"'{field.name}' must be a string or number"
+        return value, None
+    if field.kind == 'image':
+        if not isinstance(value, str):
+            return None, f"'{field.name}' must be a base64-encoded image"
+        try:
+            return base64.b64decode(value, validate=True), None
+        except (binascii.Error, ValueError):
+            return None, f"'{field.name}' is not valid base64"
+    raise AssertionError(field.kind)
+
+
+class ModelSpec:
+    """A model exposed by the service: its input schema and a batch predictor.
+
+    ``predict_rows(rows)`` receives validated rows (lists in field order) and
+    returns one JSON-serializable dict per row.
+
+    Models scored through a micro-batcher also give ``batch_row(row)``, which
+    decodes one row and returns ``(batcher, input)``, and ``batch_result(output)``,
+    which turns that input's model output into the result dict.  The service
+    then awaits single-instance predictions on its event loop instead of
+    holding a pool thread while the batch fills.
+    """
+
+    def __init__(self, name, fields, predict_rows, description='', max_batch=256,
+                 batch_row=None, batch_result=None):
+        self.name = name
+        self.fields = list(fields)
+        self.predict_rows = predict_rows
+        self.batch_row = batch_row
+        self.batch_result = batch_result
+        self.description = description
+        self.max_batch = max_batch
+        self._names = {f.name for f in self.fields}
+
+    def schema(self):
+        return {
+            'model': self.name,
+            'description': self.description,
+            'max_batch': self.max_batch,
+            'fields': [
+                {'name': f.name, 'type': f.kind, 'required': f.required,
+                 **({'choices': f.choices} if f.choices is not None else {})}
+                for f in self.fields
+            ],
+        }
+
+    def validate(self, instance, prefix=''):
+        """Return the row for one instance or raise ``ValidationError``."""
+        if not isinstance(instance, dict):
+            raise ValidationError([f"{prefix}instance must be a JSON object"])
+        errors = [f"{prefix}unknown field '{name}'" for name in instance if name not in self._names]
+        row = []
+        for field in self.fields:
+            value, error = _check(field, instance.get(field.name))
+            if error:
+                errors.append(prefix + error)
+            row.append(value)
+        if errors:
+            raise ValidationError(errors)
+        return row
+
+    def validate_batch(self, instances):
+        if not isinstance(instances, list) or not instances:
+            raise ValidationError(["'instances' must be a non-empty list"])
+        if len(instances) > self.max_batch:
+            raise ValidationError([f"at most {self.max_batch} instances per request"])
+        rows, errors = [], []
+        for i, instance in enumerate(instances):
+            try:
+                rows.append(self.validate(instance, prefix=f"instances[{i}]: "))
+            except ValidationError as e:
+                errors.extend(e.errors)
+        if errors:
+            raise ValidationError(errors)
+        return rows
+
+
+def _path(*parts):
+    return os.path.join(ROOT, *parts)
+
+
+def _python(value):
+    # NumPy scalars -> plain Python for json.dumps
+    return value.item() if hasattr(value, 'item') else value
+
+
+def _classify(model, X, labels=None):
+    """``predict`` (plus ``predict_proba`` where the estimator supports it) on an (N, F) batch."""
+    predictions = model.predict(X)
+    proba = model.predict_proba(X) if hasattr(model, 'predict_proba') else None
+    results = []
+    for i, prediction in enumerate(predictions):
+        prediction = _python(prediction)
+        result = {'prediction': prediction}
+        if labels is not None:
+            result['label'] = labels.get(prediction, str(prediction))
+        if proba is not None:
+            result['probabilities'] = {str(_python(c)): float(p) for c, p in zip(model.classes_, proba[i])}
+        results.append(result)
+    return results
+
+
+# --- tabular models -------------------------------------------------------
+
+HEART_FIELDS = [
+    number('age'), choice('sex', [0, 1]), choice('cp', [0, 1, 2, 3]), number('trestbps'), number('chol'),
+    choice('fbs', [0, 1]), choice('restecg', [0, 1, 2]), number('thalach'), choice('exang', [0, 1]),
+    number('oldpeak'), choice('slope', [0, 1, 2]), choice('ca', [0, 1, 2, 3]), choice('thal', [1, 2, 3]),
+]
+# Same reading of the classes as the heart app
+HEART_LABELS = {0: 'risk of heart disease', 1: 'no risk of heart disease'}
+
+
+def predict_heart(rows):
+    model = load_model_file(_path('heart', 'heart_disease_model.sav'))
+    return _classify(model, np.asarray(rows, dtype=np.float64), HEART_LABELS)
+
+
+DIABETES_FIELDS = [number(name) for name in (
+    'Pregnancies', 'Glucose', 'BloodPressure', 'SkinThickness', 'Insulin', 'BMI',
+    'DiabetesPedigreeFunction', 'Age')]
+DIABETES_LABELS = {0: 'not diabetic', 1: 'diabetic'}
+
+
+def predict_diabetes(rows):
+    model = load_model_file(_path('diabetes', 'diabetes_model.sav'))
+    return _classify(model, np.asarray(rows, dtype=np.float64), DIABETES_LABELS)
+
+
+LIVER_FIELDS = [
+    number('Age'), choice('Gender', ['Male', 'Female']), number('Total_Bilirubin'), number('Direct_Bilirubin'),
+    number('Alkaline_Phosphotase'), number('Alamine_Aminotransferase'), number('Aspartate_Aminotransferase'),
+    number('Total_Proteins'), number('Albumin'), number('Albumin_and_Globulin_Ratio'),
+]
+
+
+def predict_liver(rows):
+    model = load_model_file(_path('liver', 'liver.sav'))
+    X = np.asarray([[row[0], 1.0 if row[1] == 'Male' else 0.0] + row[2:] for row in rows], dtype=np.float64)
+    results = _classify(model, X)
+    for result, row in zip(results, rows):
+        # The liver page reports this enzyme / bilirubin rule next to the model output
+        likely = row[5] > 40 or row[6] > 40 or row[2] > 1.2 or row[3] > 0.3
+        result['diagnosis'] = 'likely liver disease' if likely else 'not likely liver disease'
+    return results
+
+
+PARKINSON_FIELDS = [number(name) for name in (
+    'fo', 'fhi', 'flo', 'jitter_percent', 'jitter_abs', 'rap', 'ppq', 'ddp', 'shimmer', 'shimmer_db',
+    'apq3', 'apq5', 'apq', 'dda', 'nhr', 'hnr', 'rpde', 'dfa', 'spread1', 'spread2', 'd2', 'ppe')]
+PARKINSON_LABELS = {0: "no Parkinson's disease", 1: "Parkinson's disease"}
+
+
+def predict_parkinson(rows):
+    model = load_model_file(_path('parkinson', 'parkinsons_model.sav'))
+    return _classify(model, np.asarray(rows, dtype=np.float64), PARKINSON_LABELS)
+
+
+def _ckd_fields():
+    import json
+
+    with open(_path('CKD12', 'assets', 'column_info.json')) as f:
+        column_info = json.load(f)
+    encoded = set(column_info['encoder'])
+    # Every CKD input may be left out; the pipeline imputes it like the app does
+    return [category(name) if name in encoded else number(name, required=False) for name in column_info['abbrev']]
+
+
+CKD_LABELS = {0: 'no chronic kidney disease', 1: 'chronic kidney disease'}
+
+
+def predict_ckd(rows):
+    from ckd_pipeline import get_pipeline
+
+    pipeline = get_pipeline()
+    try:
+        X = pipeline.encode_rows(rows)
+    except ValueError as e:
+        raise ValidationError([str(e)]) from None
+    return _classify(pipeline.model, pipeline.preprocess(X), CKD_LABELS)
+
+
+def _cancer_fields():
+    from cancer_inference import FEATURES
+
+    return [number(name) for name in FEATURES]
+
+
+def predict_breast_cancer(rows):
+    from cancer_inference import LABELS, MODEL_PATH, SCALER_PATH, predict_cancer
+
+    classes, proba = predict_cancer(np.asarray(rows, dtype=np.float64),
+                                    model=load_model_file(MODEL_PATH), scaler=load_model_file(SCALER_PATH))
+    return [
+        {'prediction': int(c), 'label': LABELS[int(c)],
+         'probabilities': {LABELS[k]: float(p[k]) for k in LABELS}}
+        for c, p in zip(classes, proba)
+    ]
+
+
+def _alzheimer_fields():
+    from alzheimer_features import CHOICES
+
+    return [
+        number('age'), choice('gender', CHOICES['gender']), number('education'),
+        choice('ethnicity', CHOICES['ethnicity']), choice('race_cat', CHOICES['race_cat']),
+        choice('apoe_allele_type', CHOICES['apoe_allele_type']),
+        choice('apoe_genotype', CHOICES['apoe_genotype']),
+        choice('imputed_genotype', CHOICES['imputed_genotype']), number('mmse'),
+    ]
+
+
+def predict_alzheimer(rows):
+    import pandas as pd
+    from alzheimer_features import encode_patient
+    from config import ABBREVIATION, MODEL_PATH
+
+    model = load_model_file(MODEL_PATH, loader='joblib')
+    data = pd.DataFrame([encode_patient(*row) for row in rows])
+    return [{'prediction': _python(p), 'label': ABBREVIATION.get(p, 'Unknown').strip()}
+            for p in model.predict(data)]
+
+
+# --- image models ---------------------------------------------------------
+
+MALARIA_MODEL_PATH = _path('Malarial-Cell-Detection-main', 'malaria_cell_detection.h5')
+
+
+def _decode_malaria(rows):
+    from malaria_batch import INPUT_SIZE, decode_cell
+
+    batch = np.empty((len(rows), INPUT_SIZE[1], INPUT_SIZE[0], 3), dtype=np.uint8)
+    bad = [f"instances[{i}]: 'image' could not be decoded" for i, (data,) in enumerate(rows)
+           if not decode_cell(data, batch[i])]
+    if bad:
+        raise ValidationError(bad)
+    return batch
+
+
+def _malaria_result(scores):
+    from malaria_batch import CLASS_NAMES
+
+    return {'label': CLASS_NAMES[int(np.argmax(scores))],
+            'probabilities': {name: float(p) for name, p in zip(CLASS_NAMES, scores)}}
+
+
+def predict_malaria(rows):
+    from malaria_batch import predict_cell
+
+    batch = _decode_malaria(rows)
+    model = load_artifact(MALARIA_MODEL_PATH, loader='keras')
+    # Single-image requests are coalesced with the other sessions' ones
+    if len(rows) == 1:
+        scores = [predict_cell(model, batch[0])]
+    else:
+        scores = get_executor().run(lambda: model.predict(batch, verbose=0))
+    return [_malaria_result(s) for s in scores]
+
+
+def batch_malaria(row):
+    from malaria_batch import cell_batcher
+
+    batch = _decode_malaria([row])
+    return cell_batcher(load_artifact(MALARIA_MODEL_PATH, loader='keras')), batch[0]
+
+
+def _decode_pneumonia(rows):
+    import xray_model
+
+    batch = np.empty((len(rows),) + xray_model.INPUT_SHAPE[1:], dtype=np.uint8)
+    bad = []
+    for i, (data,) in enumerate(rows):
+        try:
+            batch[i] = xray_model.to_input(xray_model.decode(data))
+        except OSError:
+            bad.append(f"instances[{i}]: 'image' could not be decoded")
+    if bad:
+        raise ValidationError(bad)
+    return batch
+
+
+def _pneumonia_results(outputs):
+    import xray_model
+
+    return [{'score': float(s), 'label': 'Infected lungs' if s > 0.5 else 'Normal lungs'}
+            for s in xray_model.score(outputs)]
+
+
+def _pneumonia_result(output):
+    return _pneumonia_results(output[np.newaxis])[0]
+
+
+def predict_pneumonia(rows):
+    import xray_model
+
+    batch = _decode_pneumonia(rows)
+    model = xray_model.get_model()
+    if len(rows) == 1:
+        outputs = xray_model.predict_batched(model, batch[0])[np.newaxis]
+    else:
+        outputs = get_executor().run(lambda: model.predict(batch, verbose=0))
+    return _pneumonia_results(outputs)
+
+
+def batch_pneumonia(row):
+    import xray_model
+
+    batch = _decode_pneumonia([row])
+    return xray_model.image_batcher(xray_model.get_model()), batch[0]
+
+
+def build_specs():
+    """Return ``{name: ModelSpec}`` for every model the service exposes."""
+    specs = [
+        ModelSpec('heart', HEART_FIELDS, predict_heart, 'Heart disease risk (Cleveland data)', max_batch=4096),
+        ModelSpec('diabetes', DIABETES_FIELDS, predict_diabetes, 'Diabetes (Pima Indians data)', max_batch=4096),
+        ModelSpec('liver', LIVER_FIELDS, predict_liver, 'Liver disease', max_batch=4096),
+        ModelSpec('parkinson', PARKINSON_FIELDS, predict_parkinson, "Parkinson's disease from voice measures",
+                  max_batch=4096),
+        ModelSpec('ckd', _ckd_fields(), predict_ckd, 'Chronic kidney disease; omitted inputs are imputed',
+                  max_batch=4096),
+        ModelSpec('breast_cancer', _cancer_fields(), predict_breast_cancer, 'Breast cell cluster: benign / malicious',
+                  max_batch=4096),
+        ModelSpec('alzheimer', _alzheimer_fields(), predict_alzheimer, 'Clinical condition: AD / LMCI / CN',
+                  max_batch=4096),
+        ModelSpec('malaria', [image()], predict_malaria, 'Single cell crop: Parasitized / Healthy', max_batch=256,
+                  batch_row=batch_malaria, batch_result=_malaria_result),
+        ModelSpec('pneumonia', [image()], predict_pneumonia, 'Chest X-ray: infected / normal lungs', max_batch=16,
+                  batch_row=batch_pneumonia, batch_result=_pneumonia_result),
+    ]
+    return {spec.name: spec for spec in specs}
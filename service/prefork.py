@@ -0,0 +1,407 @@
+"""Prefork mode for the inference service: N worker processes on one socket.
+
+    python -m service.prefork --port 8700 --processes 8
+
+The parent process loads and warms the tabular models (the sklearn pickles
+and their memory-mapped ``.flat`` exports, see ``common.flat_model``), then
+forks ``--processes`` workers.  Each worker serves the normal
+``service.server`` routes on the listening socket it inherited, so the
+kernel's accept queue spreads connections across the workers, and the
+tabular models loaded before the fork are shared copy-on-write (the flat
+files through the page cache) instead of being loaded again per process.
+``gc.freeze()`` before forking keeps the garbage collector from touching, and
+so copying, the pages of the preloaded objects.
+
+The X-ray and malaria CNNs are never touched in the parent: TensorFlow starts
+its thread pools when it first runs, and threads do not survive ``fork()``,
+so a child could deadlock on a lock held by one of them.  Their weights
+cannot be shared copy-on-write either (Keras copies them into its own
+variables), so one extra forked process, the CNN process, loads and warms
+them and serves them on a Unix socket with ``--cnn-threads`` inference
+threads; the workers forward malaria and pneumonia requests to it.  There
+is one copy of the CNN weights and one set of TensorFlow thread pools
+whatever ``--processes`` is, and single images from every worker are
+coalesced by the same micro-batchers.  A worker's ``/readyz`` includes the
+CNN process's models, and a forwarded request that gets no answer within
+``--stall-timeout`` gets a 504 (503 while the CNN process is down).
+
+The parent then only supervises:
+
+* every worker and the CNN process stamp a shared heartbeat slot from their
+  event loop, but only while no inference call has been running for longer
+  than ``--stall-timeout``; a process whose heartbeat is older than
+  ``--heartbeat-timeout`` (a blocked event loop or a stuck ``predict``) is
+  killed,
+* processes that exit or are killed are respawned, with a growing delay when
+  they keep crashing right after start; the CNN socket is bound by the parent,
+  so workers' requests queue on it while the CNN process restarts,
+* SIGTERM / SIGINT stop them gracefully (SIGKILL after ``--graceful-timeout``).
+
+POSIX only (uses fork).
+"""
+import argparse
+import asyncio
+import gc
+import json
+import logging
+import os
+import shutil
+import signal
+import socket
+import sys
+import tempfile
+import time
+from http import HTTPStatus
+from multiprocessing import RawArray
+
+from common import readiness
+from service.models import build_specs
+from service.server import DEFAULT_PORT, InferenceService
+
+logger = logging.getLogger(__name__)
+
+# TensorFlow models: served by the CNN process, never loaded by the parent or the workers
+CNN_MODELS = ('malaria', 'pneumonia')
+
+
+def preload(names):
+    """Load and warm the named models in this process; returns ``{name: warm-up timings}``.
+
+    Failures are logged, not fatal: the workers warm those models themselves.
+    """
+    preloaded = {}
+    for name in names:
+        start = time.perf_counter()
+        try:
+            preloaded[name] = readiness.warm(name)
+        except Exception:
+            logger.exception("Preloading %s failed; workers will load it on first use", name)
+            continue
+        logger.info("Preloaded %s in %.2f s", name, time.perf_counter() - start)
+    if 'tensorflow' in sys.modules:
+        logger.warning("TensorFlow was imported before forking; the workers may hang on its locks")
+    return preloaded
+
+
+# --- worker and CNN process ----------------------------------------------
+
+async def _ask(path, method, target, body=b''):
+    """``(status, payload)`` of one HTTP request to the service listening on the Unix socket ``path``."""
+    reader, writer = await asyncio.open_unix_connection(path)
+    try:
+        writer.write(f"{method} {target} HTTP/1.1\r\nHost: cnn\r\nContent-Length: {len(body)}\r\n"
+                     f"Connection: close\r\n\r\n".encode('latin-1') + body)
+        await writer.drain()
+        status = HTTPStatus(int((await reader.readline()).split()[1]))
+        length = 0
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            if name.strip().lower() == 'content-length':
+                length = int(value)
+        return status, json.loads(await reader.readexactly(length))
+    finally:
+        writer.close()
+
+
+class ForwardingService(InferenceService):
+    """Worker service that hands the CNN models' predictions to the CNN process."""
+
+    def __init__(self, cnn_path, cnn_timeout, **kwargs):
+        super().__init__(**kwargs)
+        self.cnn_path = cnn_path
+        self.cnn_timeout = cnn_timeout
+
+    async def _ask_cnn(self, method, target, body=b''):
+        try:
+            return await asyncio.wait_for(_ask(self.cnn_path, method, target, body), self.cnn_timeout)
+        except asyncio.TimeoutError:
+            logger.warning("No answer from the CNN process for %s within %.0f s", target, self.cnn_timeout)
+            return HTTPStatus.GATEWAY_TIMEOUT, {'error': 'inference timed out'}
+        except (OSError, ValueError, IndexError, asyncio.IncompleteReadError) as e:
+            logger.error("CNN process unavailable for %s: %s", target, e)
+            return HTTPStatus.SERVICE_UNAVAILABLE, {'error': 'CNN process unavailable'}
+
+    async def predict(self, spec, action, body):
+        if spec.name not in CNN_MODELS:
+            return await super().predict(spec, action, body)
+        # Validated, decoded and scored by the CNN process; its 400 / 503 / 504 are passed on
+        return await self._ask_cnn('POST', f"/{spec.name}/{action}", body)
+
+    async def dispatch(self, method, path, body):
+        status, payload = await super().dispatch(method, path, body)
+        if method == 'GET' and [p for p in path.split('/') if p] == ['readyz']:
+            cnn_status, cnn = await self._ask_cnn('GET', '/readyz')
+            models = cnn.get('models') or {name: {'status': 'unavailable', 'error': cnn.get('error')}
+                                           for name in CNN_MODELS}
+            payload['models'].update(models)
+            payload['ready'] = payload['ready'] and cnn_status == HTTPStatus.OK
+            status = HTTPStatus.OK if payload['ready'] else HTTPStatus.SERVICE_UNAVAILABLE
+        return status, payload
+
+
+async def _serve(service, server, heartbeats, slot, heartbeat_interval, stall_timeout):
+    """Serve until SIGTERM / SIGINT, stamping ``heartbeats[slot]`` while inference makes progress."""
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signum, stopping.set)
+
+    async def beat():
+        stalled = False
+        while True:
+            # A predict that never returns leaves the loop running; stop vouching for the process then
+            running = service.longest_running()
+            if running <= stall_timeout:
+                heartbeats[slot] = time.monotonic()
+            elif not stalled:
+                logger.error("An inference call has been running for %.0f s; withholding the heartbeat", running)
+            stalled = running > stall_timeout
+            await asyncio.sleep(heartbeat_interval)
+
+    beating = asyncio.ensure_future(beat())
+    try:
+        await stopping.wait()
+    finally:
+        beating.cancel()
+        server.close()
+        await server.wait_closed()
+        service.close()
+
+
+async def _worker_main(sock, cnn_path, heartbeats, slot, preloaded, args):
+    service = ForwardingService(cnn_path, args.stall_timeout, workers=args.threads, max_pending=args.max_pending)
+    # The preloaded models are already warm in this copy of the parent's memory
+    for name, timings in preloaded.items():
+        readiness.mark_ready(name, **timings)
+    readiness.start_warmup([name for name in service.specs if name not in preloaded and name not in CNN_MODELS],
+                           expose=False)
+    server = await asyncio.start_server(service.handle_connection, sock=sock)
+    await _serve(service, server, heartbeats, slot, args.heartbeat_interval, args.stall_timeout)
+
+
+async def _cnn_main(cnn_sock, heartbeats, slot, args):
+    specs = {name: spec for name, spec in build_specs().items() if name in CNN_MODELS}
+    service = InferenceService(specs=specs, workers=args.cnn_threads, max_pending=args.cnn_max_pending)
+    readiness.start_warmup(list(specs), expose=False)
+    server = await asyncio.start_unix_server(service.handle_connection, sock=cnn_sock)
+    await _serve(service, server, heartbeats, slot, args.heartbeat_interval, args.stall_timeout)
+
+
+def _run_child(main, heartbeats, slot):
+    """Body of a forked worker or CNN process running the coroutine ``main``; never returns."""
+    status = 0
+    try:
+        for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGCHLD):
+            signal.signal(signum, signal.SIG_DFL)
+        heartbeats[slot] = time.monotonic()
+        asyncio.run(main)
+    except BaseException:
+        logger.exception("Process %d crashed", os.getpid())
+        status = 1
+    finally:
+        logging.shutdown()
+        # Skip the parent's atexit handlers and buffered state
+        os._exit(status)
+
+
+# --- supervisor -----------------------------------------------------------
+
+class Supervisor:
+    """Forks the workers and the CNN process, watches their heartbeats and respawns the ones that die.
+
+    Slots ``0 .. processes - 1`` are workers, the last slot is the CNN process.
+    """
+
+    def __init__(self, sock, cnn_sock, args, preloaded):
+        self.sock = sock
+        self.cnn_sock = cnn_sock
+        self.cnn_path = cnn_sock.getsockname()
+        self.args = args
+        self.preloaded = preloaded
+        self.cnn_slot = args.processes
+        slots = args.processes + 1
+        self.heartbeats = RawArray('d', slots)
+        self.pids = [None] * slots
+        self.started = [0.0] * slots
+        self.crashes = [0] * slots
+        self.next_spawn = [0.0] * slots
+        self.stopping = False
+
+    def spawn(self, slot):
+        self.heartbeats[slot] = time.monotonic()
+        pid = os.fork()
+        if pid == 0:
+            if slot == self.cnn_slot:
+                self.sock.close()
+                main = _cnn_main(self.cnn_sock, self.heartbeats, slot, self.args)
+            else:
+                self.cnn_sock.close()
+                main = _worker_main(self.sock, self.cnn_path, self.heartbeats, slot, self.preloaded, self.args)
+            _run_child(main, self.heartbeats, slot)
+        self.pids[slot] = pid
+        self.started[slot] = time.monotonic()
+        logger.info("%s %d started in slot %d", 'CNN process' if slot == self.cnn_slot else 'Worker', pid, slot)
+
+    def _slot_of(self, pid):
+        return self.pids.index(pid) if pid in self.pids else None
+
+    def reap(self):
+        """Collect exited workers and schedule their respawn."""
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            slot = self._slot_of(pid)
+            if slot is None:
+                continue
+            self.pids[slot] = None
+            if self.stopping:
+                continue
+            lifetime = time.monotonic() - self.started[slot]
+            # Back off while a process keeps dying right after start (e.g. a broken model file)
+            self.crashes[slot] = self.crashes[slot] + 1 if lifetime < 10 else 0
+            delay = min(30.0, 0.5 * 2 ** self.crashes[slot]) if self.crashes[slot] else 0.0
+            self.next_spawn[slot] = time.monotonic() + delay
+            logger.warning("Process %d exited (%s) after %.1f s; respawning in %.1f s",
+                           pid, _describe_status(status), lifetime, delay)
+
+    def check_heartbeats(self):
+        now = time.monotonic()
+        for slot, pid in enumerate(self.pids):
+            if pid is None:
+                continue
+            silence = now - self.heartbeats[slot]
+            if silence > self.args.heartbeat_timeout:
+                logger.error("Process %d missed its heartbeat for %.1f s; killing it", pid, silence)
+                self._kill(pid, signal.SIGKILL)
+                self.heartbeats[slot] = now  # do not kill it again before it is reaped
+
+    def run(self):
+        for slot in range(len(self.pids)):
+            self.spawn(slot)
+        while not self.stopping:
+            time.sleep(0.2)
+            self.reap()
+            if self.stopping:
+                break
+            self.check_heartbeats()
+            now = time.monotonic()
+            for slot, pid in enumerate(self.pids):
+                if pid is None and now >= self.next_spawn[slot]:
+                    self.spawn(slot)
+        self.shutdown()
+
+    def stop(self, signum=None, frame=None):
+        self.stopping = True
+
+    def shutdown(self):
+        live = [pid for pid in self.pids if pid is not None]
+        logger.info("Stopping %d processes", len(live))
+        for pid in live:
+            self._kill(pid, signal.SIGTERM)
+        deadline = time.monotonic() + self.args.graceful_timeout
+        while any(pid is not None for pid in self.pids) and time.monotonic() < deadline:
+            self.reap()
+            time.sleep(0.1)
+        for pid in self.pids:
+            if pid is not None:
+                logger.warning("Process %d did not stop in time; killing it", pid)
+                self._kill(pid, signal.SIGKILL)
+        self.reap()
+
+    @staticmethod
+    def _kill(pid, signum):
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            pass
+
+
+def _describe_status(status):
+    if os.WIFSIGNALED(status):
+        return f"signal {signal.Signals(os.WTERMSIG(status)).name}"
+    return f"status {os.WEXITSTATUS(status)}"
+
+
+def listen(host, port, backlog=1024):
+    sock = socket.socket(socket.AF_INET6 if ':' in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.setblocking(False)
+    return sock
+
+
+def listen_unix(path, backlog=1024):
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.bind(path)
+    sock.listen(backlog)
+    sock.setblocking(False)
+    return sock
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default=os.environ.get('BCU_SERVICE_HOST', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=int(os.environ.get('BCU_SERVICE_PORT', DEFAULT_PORT)))
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 1, help='worker processes (default: CPUs)')
+    parser.add_argument('--threads', type=int, default=1, help='inference threads per worker')
+    parser.add_argument('--max-pending', type=int, default=None,
+                        help='requests handed to a worker pool at once (default: 2 x threads)')
+    parser.add_argument('--cnn-threads', type=int, default=None,
+                        help='inference threads of the CNN process (default: min(4, CPUs))')
+    parser.add_argument('--cnn-max-pending', type=int, default=None,
+                        help='requests handed to the CNN pool at once (default: 2 x CNN threads)')
+    parser.add_argument('--preload', default='all',
+                        help="models to load before forking: 'all' (the default: every model except "
+                             f"{', '.join(CNN_MODELS)}), a comma-separated list, or '' for none")
+    parser.add_argument('--heartbeat-interval', type=float, default=1.0)
+    parser.add_argument('--heartbeat-timeout', type=float, default=30.0,
+                        help='kill a worker whose event loop has not run for this many seconds')
+    parser.add_argument('--stall-timeout', type=float, default=120.0,
+                        help='stop the heartbeat of a worker whose inference call has run for this many seconds')
+    parser.add_argument('--graceful-timeout', type=float, default=10.0)
+    args = parser.parse_args(argv)
+
+    if not hasattr(os, 'fork'):
+        parser.error('prefork mode needs fork(); use python -m service.server on this platform')
+    import service.models  # noqa: F401  (puts the app directories on sys.path)
+
+    choices = [name for name in service.models.build_specs() if name not in CNN_MODELS]
+    names = choices if args.preload == 'all' else [name for name in args.preload.split(',') if name]
+    unknown = sorted(set(names) - set(choices))
+    if unknown:
+        parser.error(f"cannot preload {', '.join(unknown)}; choose from {', '.join(choices)} "
+                     f"({', '.join(CNN_MODELS)} are loaded by the CNN process)")
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(process)d %(name)s %(levelname)s %(message)s")
+    sock = listen(args.host, args.port)
+    cnn_dir = tempfile.mkdtemp(prefix='bcu-cnn-')
+    cnn_sock = listen_unix(os.path.join(cnn_dir, 'cnn.sock'))
+    preloaded = preload(names)
+    # Move everything allocated so far out of the collector's reach before forking
+    gc.collect()
+    gc.freeze()
+
+    supervisor = Supervisor(sock, cnn_sock, args, preloaded)
+    signal.signal(signal.SIGTERM, supervisor.stop)
+    signal.signal(signal.SIGINT, supervisor.stop)
+    logger.info("Prefork service on %s:%d with %d workers x %d threads and a CNN process",
+                args.host, args.port, args.processes, args.threads)
+    try:
+        supervisor.run()
+    finally:
+        sock.close()
+        cnn_sock.close()
+        shutil.rmtree(cnn_dir, ignore_errors=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
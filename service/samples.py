@@ -0,0 +1,110 @@
+"""Realistic inputs for every model, taken from the datasets in the tree.
+
+The tabular models get the rows of their own CSV (only those that pass the
+model's request schema); the CNNs get synthetic images encoded the way a
+client would upload them.  Used by the benchmark and by the start-up warm-up
+in ``common.readiness``.
+"""
+import csv
+import os
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _read_csv(*parts):
+    with open(os.path.join(ROOT, *parts), newline='', encoding='utf-8-sig') as f:
+        return list(csv.DictReader(f))
+
+
+def _numbers(record, names, rename=None):
+    rename = rename or {}
+    try:
+        return {name: float(record[rename.get(name, name)]) for name in names}
+    except (KeyError, ValueError):
+        return None
+
+
+def _synthetic_images(shape, count, ext, seed=0):
+    """Random images of ``shape`` encoded as base64 ``ext`` files, as a client would send them."""
+    import base64
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    images = []
+    for _ in range(count):
+        pixels = rng.integers(0, 256, size=shape, dtype=np.uint8)
+        try:
+            import cv2
+            data = cv2.imencode(ext, pixels)[1].tobytes()
+        except ImportError:
+            import io
+            from PIL import Image
+            buffer = io.BytesIO()
+            Image.fromarray(pixels).save(buffer, format='PNG' if ext == '.png' else 'JPEG')
+            data = buffer.getvalue()
+        images.append(base64.b64encode(data).decode())
+    return images
+
+
+def load_instances(name, spec, limit=None):
+    """Return ``(instances, rows)``: JSON instances built from the model's dataset (or
+    synthetic images) that pass validation, and the validated rows; at most ``limit``."""
+    fields = [f.name for f in spec.fields]
+    if name in ('heart', 'diabetes', 'breast_cancer'):
+        path = {'heart': ('heart', 'heart.csv'), 'diabetes': ('diabetes', 'diabetes.csv'),
+                'breast_cancer': ('BreastCancer', 'data.csv')}[name]
+        instances = [_numbers(r, fields) for r in _read_csv(*path)]
+    elif name == 'liver':
+        instances = []
+        for r in _read_csv('liver', 'liver.csv'):
+            instance = _numbers(r, [f for f in fields if f != 'Gender'], {'Total_Proteins': 'Total_Protiens'})
+            if instance is not None:
+                instance['Gender'] = r['Gender']
+            instances.append(instance)
+    elif name == 'parkinson':
+        records = _read_csv('parkinson', 'parkinsons.csv')
+        columns = [c for c in records[0] if c not in ('name', 'status')]
+        instances = [_numbers(r, fields, dict(zip(fields, columns))) for r in records]
+    elif name == 'ckd':
+        from ckd_pipeline import load_reference_rows
+
+        rows = load_reference_rows(os.path.join(ROOT, 'CKD12', 'datasets', 'kidney_disease.csv'), fields)
+        instances = [{k: (None if v != v else v) for k, v in zip(fields, row)} for row in rows]  # NaN -> None
+    elif name == 'alzheimer':
+        instances = []
+        for r in _read_csv('Alzheimer', 'data', 'ADNI_Training_Q3_APOE_CollectionADNI1Complete 1Yr 1.5T_July22.2014.csv'):
+            instance = _numbers(r, ['age', 'education', 'mmse'], {'age': 'AGE', 'education': 'PTEDUCAT', 'mmse': 'MMSE'})
+            if instance is not None:
+                instance.update(gender=r['PTGENDER'], ethnicity=r['PTETHCAT'], race_cat=r['PTRACCAT'],
+                                apoe_allele_type=f"APOE4_{r['APOE4']}", apoe_genotype=r['APOE Genotype'],
+                                imputed_genotype=r['imputed_genotype'].capitalize())
+            instances.append(instance)
+    elif name == 'malaria':
+        instances = [{'image': data} for data in _synthetic_images((130, 130, 3), limit or 64, '.png')]
+    elif name == 'pneumonia':
+        instances = [{'image': data} for data in _synthetic_images((1024, 1024), limit or 16, '.jpg')]
+    else:
+        raise ValueError(f"unknown model '{name}'")
+
+    from service.models import ValidationError
+
+    valid, rows = [], []
+    for instance in instances:
+        if instance is None:
+            continue
+        try:
+            rows.append(spec.validate(instance))
+        except ValidationError:
+            continue  # e.g. categories the app does not offer
+        valid.append(instance)
+        if limit is not None and len(rows) >= limit:
+            break
+    return valid, rows
+
+
+def known_good_row(name, spec):
+    """First validated row of ``load_instances``, for warm-up inferences."""
+    _, rows = load_instances(name, spec, limit=1)
+    if not rows:
+        raise RuntimeError(f"no valid sample input for '{name}'")
+    return rows[0]
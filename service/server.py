@@ -0,0 +1,266 @@
+"""Headless JSON inference service for all nine models.
+
+    python -m service.server --port 8700 --workers 4
+
+Routes (JSON in, JSON out):
+
+    GET  /healthz                   liveness: 200 while the process serves requests
+    GET  /readyz                    200 once every model is loaded and warmed, else 503
+                                    (per-model status and timings, see common.readiness)
+    GET  /metrics                   Prometheus text format (see common.metrics)
+    GET  /models                    names and request schemas of every model
+    GET  /<model>/schema            one model's schema
+    POST /<model>/predict           one instance, e.g. {"age": 63, "sex": 1, ...}
+                                    or {"image": "<base64>"} for malaria / pneumonia
+    POST /<model>/predict_batch     {"instances": [{...}, {...}]}
+
+Invalid requests get a 400 with an ``errors`` list naming every bad field.
+When the shared CNN executor (``common.inference_executor``) is at capacity
+an image request gets a 503 with a ``Retry-After`` header instead of
+waiting, and one that exceeds its inference timeout gets a 504.
+The HTTP layer is a small asyncio server (stdlib only); validation runs on
+the event loop and inference on a bounded thread pool, so a burst of requests
+queues on the loop instead of piling up threads.  Batches are scored with one
+vectorized call per request; single malaria / pneumonia images are decoded on
+the pool and then awaited on the loop while the micro-batcher coalesces them.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+from common import metrics, readiness
+from common import inference_executor
+from common.inference_executor import Busy, InferenceTimeout
+from service.models import ValidationError, build_specs
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 8700
+MAX_BODY_BYTES = 32 * 1024 * 1024
+
+
+class InferenceService:
+    """Routes requests to the model specs and runs inference on a bounded pool."""
+
+    def __init__(self, specs=None, workers=None, max_pending=None):
+        self.specs = specs if specs is not None else build_specs()
+        self.workers = workers or min(4, os.cpu_count() or 1)
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='inference')
+        # Requests beyond this wait on the event loop rather than in the executor's unbounded queue
+        self._slots = asyncio.Semaphore(max_pending or 2 * self.workers)
+        self._started = {}  # call running on the pool -> monotonic() when it started
+        self._started_lock = threading.Lock()
+
+    def _tracked(self, fn, arg):
+        # Runs on the pool; lets longest_running() see calls that never return
+        token = object()
+        with self._started_lock:
+            self._started[token] = time.monotonic()
+        try:
+            return fn(arg)
+        finally:
+            with self._started_lock:
+                del self._started[token]
+
+    def longest_running(self):
+        """Seconds the oldest inference call still running in this process has taken so far."""
+        with self._started_lock:
+            oldest = min(self._started.values(), default=None)
+        own = 0.0 if oldest is None else time.monotonic() - oldest
+        return max(own, inference_executor.longest_running())
+
+    async def run_inference(self, spec, rows):
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        try:
+            if len(rows) == 1 and spec.batch_row is not None:
+                # Decode on the pool, then wait for the micro-batch on the loop: a pool thread
+                # blocked in the batcher could not decode the requests that would fill the batch
+                async with self._slots:
+                    batcher, x = await loop.run_in_executor(self.executor, self._tracked, spec.batch_row, rows[0])
+                return [spec.batch_result(await batcher.asubmit(x))]
+            async with self._slots:
+                return await loop.run_in_executor(self.executor, self._tracked, spec.predict_rows, rows)
+        finally:
+            metrics.observe('bcu_stage_duration_seconds', time.perf_counter() - start,
+                            model=spec.name, stage='inference')
+
+    async def dispatch(self, method, path, body):
+        """Return ``(status, payload)`` for one request."""
+        parts = [p for p in path.split('/') if p]
+        if parts in (['healthz'], ['readyz']):
+            if method != 'GET':
+                return HTTPStatus.METHOD_NOT_ALLOWED, {'error': 'use GET'}
+            if parts == ['healthz']:
+                return HTTPStatus.OK, {'status': 'ok'}
+            report = readiness.status()
+            return (HTTPStatus.OK if report['ready'] else HTTPStatus.SERVICE_UNAVAILABLE), report
+        if parts == ['metrics']:
+            if method != 'GET':
+                return HTTPStatus.METHOD_NOT_ALLOWED, {'error': 'use GET'}
+            return HTTPStatus.OK, metrics.render()
+        if parts == ['models']:
+            if method != 'GET':
+                return HTTPStatus.METHOD_NOT_ALLOWED, {'error': 'use GET'}
+            return HTTPStatus.OK, {'models': [spec.schema() for spec in self.specs.values()]}
+
+        if len(parts) != 2 or parts[0] not in self.specs:
+            return HTTPStatus.NOT_FOUND, {'error': f"unknown route '{path}'", 'models': sorted(self.specs)}
+        spec, action = self.specs[parts[0]], parts[1]
+
+        if action == 'schema':
+            if method != 'GET':
+                return HTTPStatus.METHOD_NOT_ALLOWED, {'error': 'use GET'}
+            return HTTPStatus.OK, spec.schema()
+        if action not in ('predict', 'predict_batch'):
+            return HTTPStatus.NOT_FOUND, {'error': f"unknown route '{path}'"}
+        if method != 'POST':
+            return HTTPStatus.METHOD_NOT_ALLOWED, {'error': 'use POST'}
+
+        start = time.perf_counter()
+        status, response = await self.predict(spec, action, body)
+        metrics.inc('bcu_predictions_total', model=spec.name, outcome=_outcome(status, response))
+        metrics.observe('bcu_request_duration_seconds', time.perf_counter() - start, model=spec.name)
+        return status, response
+
+    async def predict(self, spec, action, body):
+        try:
+            payload = json.loads(body or b'null')
+        except ValueError as e:
+            return HTTPStatus.BAD_REQUEST, {'error': 'invalid JSON', 'errors': [str(e)]}
+
+        try:
+            if action == 'predict':
+                results = await self.run_inference(spec, [spec.validate(payload)])
+                return HTTPStatus.OK, {'model': spec.name, 'result': results[0]}
+            instances = payload.get('instances') if isinstance(payload, dict) else None
+            results = await self.run_inference(spec, spec.validate_batch(instances))
+            return HTTPStatus.OK, {'model': spec.name, 'results': results}
+        except ValidationError as e:
+            return HTTPStatus.BAD_REQUEST, {'error': 'invalid request', 'errors': e.errors}
+        except Busy as e:
+            return HTTPStatus.SERVICE_UNAVAILABLE, {'error': 'busy, retry later', 'retry_after': e.retry_after}
+        except InferenceTimeout as e:
+            logger.warning("%s", e)
+            return HTTPStatus.GATEWAY_TIMEOUT, {'error': 'inference timed out'}
+        except FileNotFoundError as e:
+            logger.error("Model file missing for %s: %s", spec.name, e)
+            return HTTPStatus.SERVICE_UNAVAILABLE, {'error': f"model '{spec.name}' is not available"}
+        except Exception:
+            logger.exception("Inference failed for %s", spec.name)
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {'error': 'inference failed'}
+
+    async def handle_connection(self, reader, writer):
+        """Serve HTTP/1.1 requests on one connection (keep-alive, Content-Length bodies)."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    await self._respond(writer, HTTPStatus.BAD_REQUEST, {'error': 'malformed request line'}, False)
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+                if 'transfer-encoding' in headers:
+                    await self._respond(writer, HTTPStatus.LENGTH_REQUIRED, {'error': 'send a Content-Length body'}, False)
+                    break
+                length = int(headers.get('content-length') or 0)
+                if length > MAX_BODY_BYTES:
+                    await self._respond(writer, HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                                        {'error': f'body larger than {MAX_BODY_BYTES} bytes'}, False)
+                    break
+                body = await reader.readexactly(length) if length else b''
+
+                status, payload = await self.dispatch(method.upper(), target.split('?', 1)[0], body)
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _respond(writer, status, payload, keep_alive):
+        if isinstance(payload, str):
+            # /metrics is plain text
+            body, content_type, retry = payload.encode(), metrics.CONTENT_TYPE, ''
+        else:
+            body, content_type = json.dumps(payload).encode(), 'application/json'
+            retry = f"Retry-After: {math.ceil(payload['retry_after'])}\r\n" if 'retry_after' in payload else ''
+        head = (f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"{retry}"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode('latin-1') + body)
+        await writer.drain()
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+
+
+def _outcome(status, response):
+    if status == HTTPStatus.OK:
+        return 'ok'
+    if status == HTTPStatus.BAD_REQUEST:
+        return 'invalid'
+    if status == HTTPStatus.GATEWAY_TIMEOUT:
+        return 'timeout'
+    if 'retry_after' in response:
+        return 'busy'
+    return 'error'
+
+
+async def serve(host='0.0.0.0', port=DEFAULT_PORT, workers=None, max_pending=None):
+    service = InferenceService(workers=workers, max_pending=max_pending)
+    # /readyz turns 200 once every model has been loaded and run on a sample row
+    readiness.start_warmup(list(service.specs), expose=False)
+    server = await asyncio.start_server(service.handle_connection, host, port)
+    logger.info("Inference service on %s:%d with %d workers (models: %s)",
+                host, port, service.workers, ', '.join(service.specs))
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default=os.environ.get('BCU_SERVICE_HOST', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=int(os.environ.get('BCU_SERVICE_PORT', DEFAULT_PORT)))
+    parser.add_argument('--workers', type=int, default=None, help='inference threads (default: min(4, CPUs))')
+    parser.add_argument('--max-pending', type=int, default=None,
+                        help='requests handed to the pool at once (default: 2 x workers)')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers, args.max_pending))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,74 @@
+import threading
+import time
+
+import pytest
+
+from common.inference_executor import BoundedExecutor, Busy, InferenceTimeout
+
+
+@pytest.fixture
+def gate():
+    event = threading.Event()
+    yield event
+    event.set()  # let blocked calls finish so the pool threads exit
+
+
+def test_run_returns_the_result():
+    executor = BoundedExecutor('test', max_concurrency=1, max_queue=0)
+    assert executor.run(lambda a, b: a + b, 2, 3) == 5
+    stats = executor.stats()
+    assert (stats['submitted'], stats['completed'], stats['running'], stats['queued']) == (1, 1, 0, 0)
+
+
+def test_full_queue_raises_busy(gate):
+    executor = BoundedExecutor('test', max_concurrency=1, max_queue=1)
+    running = executor.submit(gate.wait)
+    queued = executor.submit(gate.wait)
+
+    with pytest.raises(Busy) as raised:
+        executor.submit(gate.wait)
+    assert raised.value.retry_after > 0
+    assert executor.stats()['rejected'] == 1
+
+    gate.set()
+    running.result(5)
+    queued.result(5)
+    # The slots are free again
+    assert executor.run(lambda: 'ok') == 'ok'
+
+
+def test_block_waits_for_queue_space(gate):
+    executor = BoundedExecutor('test', max_concurrency=1, max_queue=0)
+    executor.submit(gate.wait)
+    threading.Timer(0.05, gate.set).start()
+
+    assert executor.run(lambda: 'ok', block=True) == 'ok'
+    assert executor.stats()['rejected'] == 0
+
+
+def test_slow_call_raises_inference_timeout(gate):
+    executor = BoundedExecutor('test', max_concurrency=1, max_queue=1, timeout=0.05)
+    start = time.perf_counter()
+    with pytest.raises(InferenceTimeout):
+        executor.run(gate.wait)
+    assert time.perf_counter() - start < 1
+    assert executor.stats()['timeouts'] == 1
+
+
+def test_timed_out_call_that_never_started_is_cancelled(gate):
+    executor = BoundedExecutor('test', max_concurrency=1, max_queue=1)
+    executor.submit(gate.wait)
+
+    with pytest.raises(InferenceTimeout):
+        executor.run(lambda: 'never', timeout=0.05)
+    # The cancelled call gave its queue slot back
+    assert executor.stats()['queued'] == 0
+    executor.submit(gate.wait)
+
+
+def test_failed_calls_are_counted():
+    executor = BoundedExecutor('test', max_concurrency=1, max_queue=0)
+    with pytest.raises(ZeroDivisionError):
+        executor.run(lambda: 1 / 0)
+    stats = executor.stats()
+    assert (stats['failed'], stats['completed']) == (1, 0)
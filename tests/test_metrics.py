@@ -0,0 +1,70 @@
+import threading
+
+import pytest
+
+from common import metrics
+
+
+@pytest.fixture(autouse=True)
+def recording(monkeypatch):
+    # Independent of BCU_METRICS in the environment running the tests
+    monkeypatch.setitem(metrics._state, 'enabled', True)
+
+
+def _lines(name):
+    return [line for line in metrics.render().splitlines() if line.startswith(name)]
+
+
+def test_histogram_buckets_are_cumulative():
+    name = 'test_bucket_seconds'
+    metrics.observe(name, 0.0003, model='heart')  # first bucket
+    metrics.observe(name, 0.001, model='heart')  # exactly on a bound: counted in that bucket
+    metrics.observe(name, 0.2, model='heart')
+    metrics.observe(name, 60.0, model='heart')  # above every bound
+
+    buckets = {}
+    for line in _lines(name + '_bucket'):
+        labels, value = line.split(' ')
+        buckets[labels.split('le="')[1].rstrip('"}')] = int(value)
+    assert list(buckets) == [str(b) for b in metrics.DEFAULT_BUCKETS] + ['+Inf']
+    assert buckets['0.0005'] == 1
+    assert buckets['0.001'] == 2
+    assert buckets['0.1'] == 2
+    assert buckets['0.25'] == 3
+    assert buckets['30.0'] == 3
+    assert buckets['+Inf'] == 4
+
+    assert _lines(name + '_count') == [f'{name}_count{{model="heart"}} 4']
+    (sum_line,) = _lines(name + '_sum')
+    assert abs(float(sum_line.split(' ')[1]) - 60.2013) < 1e-9
+
+
+def test_render_has_help_type_and_sorted_labels():
+    metrics.inc('test_requests_total', model='liver', outcome='ok')
+    metrics.inc('test_requests_total', 2, outcome='ok', model='liver')
+
+    text = metrics.render()
+    assert '# TYPE test_requests_total counter' in text
+    assert 'test_requests_total{model="liver",outcome="ok"} 3' in text
+    assert text.endswith('\n')
+
+
+def test_samples_of_finished_threads_are_kept():
+    name = 'test_thread_seconds'
+
+    def record():
+        metrics.observe(name, 0.01, model='ckd')
+
+    threads = [threading.Thread(target=record) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    metrics.observe(name, 0.01, model='ckd')
+
+    assert _lines(name + '_count') == [f'{name}_count{{model="ckd"}} 5']
+
+
+def test_label_values_are_escaped():
+    metrics.inc('test_escaped_total', path='a"b\\c\nd')
+    assert _lines('test_escaped_total') == ['test_escaped_total{path="a\\"b\\\\c\\nd"} 1']
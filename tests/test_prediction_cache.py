@@ -0,0 +1,80 @@
+from common import prediction_cache
+from common.prediction_cache import LRUCache, feature_key
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = LRUCache(max_entries=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1  # 'b' is now the least recently used
+    cache.put('c', 3)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    stats = cache.stats()
+    assert (stats['entries'], stats['evictions'], stats['hits'], stats['misses']) == (2, 1, 3, 1)
+
+
+def test_put_refreshes_an_existing_key_without_evicting():
+    cache = LRUCache(max_entries=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    cache.put('a', 10)
+    cache.put('c', 3)
+
+    assert cache.get('a') == 10
+    assert cache.get('b') is None
+    assert cache.stats()['evictions'] == 1
+
+
+def test_expired_entries_are_misses_not_evictions(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(prediction_cache.time, 'monotonic', clock)
+    cache = LRUCache(max_entries=4, ttl=10)
+    cache.put('a', 1)
+
+    clock.now += 9.9
+    assert cache.get('a') == 1
+    clock.now += 0.1
+    assert cache.get('a', 'missing') == 'missing'
+
+    stats = cache.stats()
+    assert (stats['entries'], stats['hits'], stats['misses']) == (0, 1, 1)
+    assert (stats['expirations'], stats['evictions']) == (1, 0)
+
+
+def test_get_or_compute_calls_compute_once_per_live_entry(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(prediction_cache.time, 'monotonic', clock)
+    cache = LRUCache(ttl=5)
+    calls = []
+
+    def compute():
+        calls.append(None)
+        return len(calls)
+
+    assert cache.get_or_compute('k', compute) == 1
+    assert cache.get_or_compute('k', compute) == 1
+    clock.now += 5
+    assert cache.get_or_compute('k', compute) == 2
+
+
+def test_cached_none_is_a_hit():
+    cache = LRUCache()
+    cache.put('k', None)
+    assert cache.get_or_compute('k', lambda: 'recomputed') is None
+    assert cache.stats()['hits'] == 1
+
+
+def test_feature_key_is_canonical():
+    assert feature_key([63, '1', -0.0], 'v1') == feature_key([63.0, 1, 0.0], 'v1')
+    assert feature_key([63], 'v1') != feature_key([63], 'v2')
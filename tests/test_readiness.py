@@ -0,0 +1,24 @@
+import pytest
+
+from common import readiness
+
+
+@pytest.fixture(autouse=True)
+def no_models(monkeypatch):
+    monkeypatch.setattr(readiness, '_models', {})
+
+
+def test_no_models_is_not_ready():
+    assert readiness.status() == {'ready': False, 'models': {}}
+    assert not readiness.is_ready()
+
+
+def test_mark_ready_records_the_timings():
+    readiness.mark_ready('heart', load_seconds=0.5, first_inference_ms=3.0, warm_latency_ms=1.0)
+
+    report = readiness.status()
+    assert report['ready']
+    assert report['models']['heart']['status'] == 'ready'
+    assert report['models']['heart']['warm_latency_ms'] == 1.0
+    assert readiness.is_ready(['heart'])
+    assert not readiness.is_ready(['heart', 'liver'])
@@ -0,0 +1,27 @@
+import socket
+
+import pytest
+
+from common import sidecar
+
+
+@pytest.fixture
+def taken_port(monkeypatch):
+    monkeypatch.setitem(sidecar._state, 'disabled', False)
+    monkeypatch.setenv('BCU_SIDECAR_HOST', '127.0.0.1')
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        sock.listen()
+        monkeypatch.setenv('BCU_SIDECAR_PORT', str(sock.getsockname()[1]))
+        yield
+    sidecar.stop()
+
+
+def test_taken_port_disables_the_sidecar(taken_port):
+    assert sidecar.start() is None
+    assert sidecar._state['server'] is None
+
+
+def test_taken_port_raises_when_required(taken_port):
+    with pytest.raises(OSError):
+        sidecar.start(required=True)